@@ -0,0 +1,196 @@
+# api/reportes.py
+# API HTTP asíncrona con los reportes de la UI y los mismos filtros, en JSON o
+# NDJSON por streaming. Corre sobre Starlette y SQLAlchemy asyncio (asyncpg),
+# y comparte con Streamlit los consulta_* y fila_* de services/reports.py. Un
+# solo proceso atiende muchos clientes: no hay rerun ni sesión por usuario, y
+# cada petición toma una conexión del pool sólo mientras consulta. No usa la
+# caché de services/cache.py (de un solo proceso, sin ver escrituras ajenas):
+# cada petición consulta la BD, y docker-compose la apaga con REPORTES_CACHE=false.
+# Uso (desde app/; POSTGRES_HOST=localhost contra un Postgres local):
+#   uvicorn api.reportes:app --host 0.0.0.0 --port 8000
+#   curl 'localhost:8000/reportes/donaciones_por_campana?fecha_inicio=2024-01-01&monto_minimo=100'
+#   curl 'localhost:8000/reportes/donaciones_por_donante?formato=ndjson'
+import asyncio
+import datetime
+import decimal
+import enum
+import json
+import os
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Callable
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+from db.connection import get_async_engine, dispose_async_engine
+from models import EstadoCampanaEnum
+from services.reports import (
+    fuente_campanas,
+    consulta_donaciones_por_campana, fila_donaciones_por_campana,
+    consulta_voluntarios_por_actividad, fila_voluntarios_por_actividad,
+    consulta_donaciones_por_donante, fila_donaciones_por_donante,
+    consulta_distribucion_voluntarios_por_edad, fila_distribucion_voluntarios_por_edad,
+    consulta_efectividad_campanas, fila_efectividad_campanas,
+)
+from services.vistas import asegurar_vista_fresca
+
+# Filas por lote que se traen del cursor de servidor en NDJSON
+LOTE_FILAS = int(os.getenv("API_LOTE_FILAS", "1000"))
+
+
+def _fecha(valor: str):
+    # Una fecha sola vale por el día completo como fecha_fin, igual que en la UI
+    try:
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        pass
+    try:
+        return datetime.datetime.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Fecha inválida: {valor}")
+
+
+def _monto(valor: str) -> decimal.Decimal:
+    try:
+        monto = decimal.Decimal(valor)
+    except decimal.InvalidOperation:
+        raise ValueError(f"Monto inválido: {valor}")
+    if not monto.is_finite() or monto < 0:
+        raise ValueError(f"Monto inválido: {valor}")
+    return monto
+
+
+def _entero(minimo: int):
+    def convertir(valor: str) -> int:
+        try:
+            numero = int(valor)
+        except ValueError:
+            raise ValueError(f"Número entero inválido: {valor}")
+        if numero < minimo:
+            raise ValueError(f"El valor debe ser mayor o igual a {minimo}: {valor}")
+        return numero
+    return convertir
+
+
+def _estado(valor: str) -> str:
+    if valor != "Todos" and valor not in {e.value for e in EstadoCampanaEnum}:
+        raise ValueError(f"Estado de campaña inválido: {valor}")
+    return valor
+
+
+@dataclass
+class Reporte:
+    consulta: Callable
+    fila: Callable
+    filtros: dict
+    # Si la consulta con esos filtros lee la vista materializada (hay que refrescarla antes)
+    usa_vista: Callable = lambda filtros: False
+
+    def formatear(self, filtros: dict) -> Callable:
+        if self.fila is fila_distribucion_voluntarios_por_edad:
+            return lambda r: self.fila(r, filtros.get("anios_por_grupo", 10))
+        return self.fila
+
+
+_FECHAS = {"fecha_inicio": _fecha, "fecha_fin": _fecha}
+_MONTOS = {"monto_minimo": _monto, "monto_maximo": _monto}
+_EDADES = {"edad_minima": _entero(0), "edad_maxima": _entero(0)}
+
+REPORTES = {
+    "donaciones_por_campana": Reporte(
+        consulta_donaciones_por_campana, fila_donaciones_por_campana, {**_FECHAS, **_MONTOS},
+        usa_vista=lambda f: fuente_campanas(
+            f.get("fecha_inicio"), f.get("fecha_fin"), f.get("monto_minimo"), f.get("monto_maximo")) == "vista"),
+    "voluntarios_por_actividad": Reporte(
+        consulta_voluntarios_por_actividad, fila_voluntarios_por_actividad, {**_FECHAS, **_EDADES}),
+    "donaciones_por_donante": Reporte(
+        consulta_donaciones_por_donante, fila_donaciones_por_donante, {**_FECHAS, **_MONTOS}),
+    "distribucion_voluntarios_por_edad": Reporte(
+        consulta_distribucion_voluntarios_por_edad, fila_distribucion_voluntarios_por_edad,
+        {**_EDADES, "anios_por_grupo": _entero(1)}),
+    "efectividad_campanas": Reporte(
+        consulta_efectividad_campanas, fila_efectividad_campanas, {**_FECHAS, "estado": _estado},
+        usa_vista=lambda f: fuente_campanas() == "vista"),
+}
+
+
+def leer_filtros(reporte: Reporte, parametros) -> dict:
+    """Convierte los parámetros de la URL; ValueError si alguno es desconocido o inválido."""
+    desconocidos = set(parametros) - set(reporte.filtros) - {"formato"}
+    if desconocidos:
+        raise ValueError(f"Filtros no admitidos: {', '.join(sorted(desconocidos))}")
+    return {nombre: convertir(parametros[nombre]) for nombre, convertir in reporte.filtros.items() if parametros.get(nombre)}
+
+
+def _json(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, decimal.Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def _dumps(valor) -> str:
+    return json.dumps(valor, default=_json, ensure_ascii=False, separators=(",", ":"))
+
+
+async def listar_reportes(request):
+    return JSONResponse({nombre: sorted(r.filtros) for nombre, r in REPORTES.items()})
+
+
+async def reporte(request):
+    nombre = request.path_params["nombre"]
+    if nombre not in REPORTES:
+        return JSONResponse({"error": f"Reporte desconocido: {nombre}"}, status_code=404)
+    rep = REPORTES[nombre]
+    formato = request.query_params.get("formato", "json")
+    if formato not in ("json", "ndjson"):
+        return JSONResponse({"error": f"Formato no soportado: {formato}"}, status_code=400)
+    try:
+        filtros = leer_filtros(rep, request.query_params)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    if rep.usa_vista(filtros):
+        # asegurar_vista_fresca es síncrono; no debe bloquear el event loop
+        await asyncio.to_thread(asegurar_vista_fresca)
+    stmt = rep.consulta(**filtros)
+    fila = rep.formatear(filtros)
+
+    if formato == "ndjson":
+        return StreamingResponse(_ndjson(stmt, fila), media_type="application/x-ndjson")
+    async with get_async_engine().connect() as conn:
+        filas = (await conn.execute(stmt)).all()
+    return Response(_dumps([fila(r) for r in filas]), media_type="application/json")
+
+
+async def _ndjson(stmt, fila):
+    # Cursor de servidor: la memoria queda acotada a LOTE_FILAS filas por cliente
+    async with get_async_engine().connect() as conn:
+        resultado = await conn.stream(stmt.execution_options(yield_per=LOTE_FILAS))
+        async for lote in resultado.partitions():
+            yield "".join(_dumps(fila(r)) + "\n" for r in lote)
+
+
+async def salud(request):
+    async with get_async_engine().connect() as conn:
+        await conn.exec_driver_sql("SELECT 1")
+    return JSONResponse({"estado": "ok"})
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    yield
+    await dispose_async_engine()
+
+
+app = Starlette(
+    routes=[
+        Route("/salud", salud),
+        Route("/reportes", listar_reportes),
+        Route("/reportes/{nombre}", reporte),
+    ],
+    lifespan=ciclo_de_vida,
+)
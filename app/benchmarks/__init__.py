@@ -0,0 +1 @@
+# Scripts de medición; ejecutar desde app/ con: python -m benchmarks.<script>
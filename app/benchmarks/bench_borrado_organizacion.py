@@ -0,0 +1,129 @@
+# benchmarks/bench_borrado_organizacion.py
+# Crea una organización grande (campañas, actividades con voluntarios,
+# recursos y donaciones) y la borra con el recorrido ORM anterior y con
+# delete_organizacion (un DELETE por tabla); compara tiempo y sentencias.
+# Cada variante corre en una transacción que se revierte al final: la BD queda como estaba.
+# Uso (desde app/, con la BD sembrada): python -m benchmarks.bench_borrado_organizacion [--campanas 200] [--donaciones 100000]
+import argparse
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from db.connection import get_engine
+from models import Actividad, Campana, Organizacion
+from services.crud_organization import delete_organizacion
+
+CREAR_ORGANIZACION = """
+INSERT INTO organizacion (nombre, email)
+VALUES ('Organización de prueba', 'bench-' || md5(random()::text) || '@ejemplo.com')
+RETURNING organizacion_id
+"""
+
+CREAR_CAMPANAS = """
+INSERT INTO campana (organizacion_id, nombre, fecha_inicio, meta_monetaria)
+SELECT %(org)s, 'Campaña de prueba ' || i, CURRENT_DATE, 100000
+FROM generate_series(1, %(campanas)s) AS g(i)
+"""
+
+CREAR_ACTIVIDADES = """
+INSERT INTO actividad (campana_id, nombre, fecha_inicio, fecha_fin)
+SELECT c.campana_id, 'Actividad de prueba ' || i, now(), now() + interval '2 hours'
+FROM campana c CROSS JOIN generate_series(1, %(actividades)s) AS g(i)
+WHERE c.organizacion_id = %(org)s
+"""
+
+CREAR_INSCRIPCIONES = """
+INSERT INTO voluntario_actividad (voluntario_id, actividad_id)
+SELECT v.voluntario_id, a.actividad_id
+FROM actividad a
+JOIN campana c ON c.campana_id = a.campana_id
+CROSS JOIN (SELECT voluntario_id FROM voluntario ORDER BY voluntario_id LIMIT %(voluntarios)s) AS v
+WHERE c.organizacion_id = %(org)s
+"""
+
+CREAR_RECURSOS = """
+INSERT INTO recurso (campana_id, nombre, cantidad_requerida)
+SELECT c.campana_id, 'Recurso de prueba ' || i, 10
+FROM campana c CROSS JOIN generate_series(1, %(recursos)s) AS g(i)
+WHERE c.organizacion_id = %(org)s
+"""
+
+CREAR_DONACIONES = """
+INSERT INTO donacion (campana_id, donante_id, tipo, monto)
+SELECT c.ids[1 + floor(random() * array_length(c.ids, 1))::int],
+       d.ids[1 + floor(random() * array_length(d.ids, 1))::int],
+       'monetaria', round((10 + random() * 990)::numeric, 2)
+FROM generate_series(1, %(donaciones)s)
+CROSS JOIN (SELECT array_agg(campana_id) AS ids FROM campana WHERE organizacion_id = %(org)s) AS c
+CROSS JOIN (SELECT array_agg(donante_id) AS ids FROM donante) AS d
+"""
+
+
+def _borrar_antes(db: Session, organizacion_id: int):
+    """Recorrido anterior: cada actividad y campaña como objeto, con las cascadas del ORM."""
+    org = db.get(Organizacion, organizacion_id)
+    campanas = db.query(Campana).filter(Campana.organizacion_id == organizacion_id).all()
+    for campana in campanas:
+        actividades = db.query(Actividad).filter(Actividad.campana_id == campana.campana_id).all()
+        for actividad in actividades:
+            db.delete(actividad)
+        db.delete(campana)
+    db.delete(org)
+    db.commit()
+
+
+VARIANTES = {
+    "ORM (anterior)": _borrar_antes,
+    "simulación": lambda db, org: delete_organizacion(db, org, simular=True),
+    "por conjuntos": delete_organizacion,
+}
+
+
+def medir(variante: str, args) -> tuple[float, int, dict]:
+    with get_engine().connect() as conn:
+        trans = conn.begin()
+        try:
+            org = conn.exec_driver_sql(CREAR_ORGANIZACION).scalar()
+            parametros = {"org": org, "campanas": args.campanas, "actividades": args.actividades,
+                          "voluntarios": args.voluntarios, "recursos": args.recursos, "donaciones": args.donaciones}
+            for sql in (CREAR_CAMPANAS, CREAR_ACTIVIDADES, CREAR_INSCRIPCIONES, CREAR_RECURSOS, CREAR_DONACIONES):
+                conn.exec_driver_sql(sql, parametros)
+            sentencias = 0
+
+            def contar(*_):
+                nonlocal sentencias
+                sentencias += 1
+
+            db = Session(bind=conn, join_transaction_mode="create_savepoint")
+            conteos = delete_organizacion(db, org, simular=True)
+            event.listen(conn, "before_cursor_execute", contar)
+            try:
+                inicio = time.perf_counter()
+                VARIANTES[variante](db, org)
+                duracion = time.perf_counter() - inicio
+            finally:
+                event.remove(conn, "before_cursor_execute", contar)
+                db.close()
+        finally:
+            trans.rollback()
+    return duracion, sentencias, conteos
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campanas", type=int, default=200)
+    parser.add_argument("--actividades", type=int, default=20, help="por campaña")
+    parser.add_argument("--voluntarios", type=int, default=5, help="inscritos por actividad")
+    parser.add_argument("--recursos", type=int, default=5, help="por campaña")
+    parser.add_argument("--donaciones", type=int, default=100_000, help="en total, repartidas entre las campañas")
+    args = parser.parse_args()
+
+    conteos = None
+    print(f"{'variante':>15} | {'tiempo (s)':>10} | {'sentencias':>10}")
+    for variante in VARIANTES:
+        duracion, sentencias, conteos = medir(variante, args)
+        print(f"{variante:>15} | {duracion:>10.2f} | {sentencias:>10}")
+    print("Filas por tabla: " + ", ".join(f"{tabla} {n}" for tabla, n in conteos.items()))
+
+
+if __name__ == "__main__":
+    main()
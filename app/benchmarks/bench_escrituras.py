@@ -0,0 +1,125 @@
+# benchmarks/bench_escrituras.py
+# Cuenta idas y vueltas a la BD por operación de escritura: el patrón anterior
+# de los crud_* (add/commit/refresh, get/setattr/commit/refresh, un commit por
+# crud) contra INSERT/UPDATE ... RETURNING y unidad_de_trabajo. Todo corre en
+# una transacción que se revierte al final: la BD queda como estaba.
+# Uso (desde app/, con la BD sembrada): python -m benchmarks.bench_escrituras [--repeticiones 200]
+import argparse
+import time
+import uuid
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from db.connection import get_engine
+from models import Campana, Donacion, Donante
+from services.crud_donacion import create_donacion
+from services.crud_donante import create_donante, update_donante
+from services.escritura import unidad_de_trabajo
+
+
+def _datos_donante():
+    return {"tipo": "individual", "nombre": "Prueba", "apellido": "Benchmark",
+            "email": f"bench-{uuid.uuid4().hex}@ejemplo.com"}
+
+
+def _datos_donacion(campana_id, donante_id):
+    return {"campana_id": campana_id, "donante_id": donante_id, "tipo": "monetaria", "monto": 10}
+
+
+# Patrón anterior, tal como estaba en los crud_*
+def _crear_antes(db, modelo, data):
+    obj = modelo(**data)
+    db.add(obj)
+    db.commit()
+    db.refresh(obj)
+    return obj
+
+
+def _actualizar_antes(db, modelo, obj_id, data):
+    obj = db.get(modelo, obj_id)
+    for key, value in data.items():
+        setattr(obj, key, value)
+    db.commit()
+    db.refresh(obj)
+    return obj
+
+
+def operaciones(campana_id, donante_id):
+    return {
+        "crear donante": (
+            lambda db: _crear_antes(db, Donante, _datos_donante()),
+            lambda db: create_donante(db, _datos_donante()),
+        ),
+        "actualizar donante": (
+            lambda db: _actualizar_antes(db, Donante, donante_id, {"telefono": "5555-0000"}),
+            lambda db: update_donante(db, donante_id, {"telefono": "5555-0000"}),
+        ),
+        "donante + donación": (
+            lambda db: _crear_antes(db, Donacion, _datos_donacion(
+                campana_id, _crear_antes(db, Donante, _datos_donante()).donante_id)),
+            lambda db: _nuevo_donante_con_donacion(db, campana_id),
+        ),
+    }
+
+
+def _nuevo_donante_con_donacion(db, campana_id):
+    with unidad_de_trabajo(db):
+        donante = create_donante(db, _datos_donante())
+        return create_donacion(db, _datos_donacion(campana_id, donante.donante_id))
+
+
+def medir(conn, operacion, repeticiones: int) -> tuple[float, float, float]:
+    """(sentencias, commits, segundos) promedio por operación."""
+    conteo = {"sentencias": 0, "commits": 0}
+
+    def contar_sentencia(conn, cursor, statement, *args):
+        # Los SAVEPOINT sustituyen al BEGIN/COMMIT de una sesión normal (ver abajo)
+        if "SAVEPOINT" not in statement:
+            conteo["sentencias"] += 1
+
+    def contar_commit(session):
+        conteo["commits"] += 1
+
+    # Las sesiones se unen a la transacción externa con savepoints: sus commit
+    # no confirman nada y el rollback final deshace todas las escrituras
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    event.listen(conn, "before_cursor_execute", contar_sentencia)
+    event.listen(db, "after_commit", contar_commit)
+    try:
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            operacion(db)
+            # Cada formulario enviado es una ejecución nueva del script, sin identity map previo
+            db.expunge_all()
+        duracion = time.perf_counter() - inicio
+    finally:
+        event.remove(conn, "before_cursor_execute", contar_sentencia)
+        db.close()
+    return conteo["sentencias"] / repeticiones, conteo["commits"] / repeticiones, duracion / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeticiones", type=int, default=200)
+    args = parser.parse_args()
+
+    with get_engine().connect() as conn:
+        trans = conn.begin()
+        try:
+            campana_id = conn.scalar(select(Campana.campana_id).limit(1))
+            donante_id = conn.scalar(select(Donante.donante_id).limit(1))
+            if campana_id is None or donante_id is None:
+                raise SystemExit("La BD no tiene campañas o donantes: ejecute primero el seed")
+            print(f"Promedio por operación en {args.repeticiones} repeticiones "
+                  "(idas y vueltas = sentencias + commits)")
+            print(f"{'operación':>20} | {'patrón':>7} | {'sentencias':>10} | {'commits':>7} | {'idas':>5} | {'ms':>7}")
+            for nombre, (antes, ahora) in operaciones(campana_id, donante_id).items():
+                for patron, operacion in (("antes", antes), ("ahora", ahora)):
+                    sentencias, commits, duracion = medir(conn, operacion, args.repeticiones)
+                    print(f"{nombre:>20} | {patron:>7} | {sentencias:>10.1f} | {commits:>7.1f} | "
+                          f"{sentencias + commits:>5.1f} | {duracion * 1000:>7.2f}")
+        finally:
+            trans.rollback()
+
+
+if __name__ == "__main__":
+    main()
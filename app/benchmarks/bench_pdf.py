@@ -0,0 +1,46 @@
+# benchmarks/bench_pdf.py
+# Compara df_to_pdf (bloques de LongTable) contra la tabla única original.
+# Uso: python -m benchmarks.bench_pdf [--filas 1000 10000 100000] [--sin-tabla-unica]
+import argparse
+import random
+import time
+import pandas as pd
+from components.ui_elements import df_to_pdf, df_to_pdf_tabla_unica
+
+
+def generar_df(filas: int) -> pd.DataFrame:
+    rng = random.Random(42)
+    return pd.DataFrame({
+        "campana_id": range(1, filas + 1),
+        "campana": [f"Campaña {rng.randint(1, 500)}" for _ in range(filas)],
+        "monto_total": [round(rng.uniform(10, 10000), 2) for _ in range(filas)],
+        "num_donaciones": [rng.randint(1, 300) for _ in range(filas)],
+    })
+
+
+def medir(funcion, df) -> tuple[float, int]:
+    inicio = time.perf_counter()
+    pdf = funcion(df)
+    return time.perf_counter() - inicio, len(pdf)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--sin-tabla-unica", action="store_true",
+                        help="omitir la versión original (muy lenta con 100k filas)")
+    args = parser.parse_args()
+
+    print(f"{'filas':>8} | {'paginado (s)':>12} | {'tabla única (s)':>15} | {'aceleración':>11}")
+    for filas in args.filas:
+        df = generar_df(filas)
+        t_paginado, _ = medir(lambda d: df_to_pdf(d, max_filas=None), df)
+        if args.sin_tabla_unica:
+            print(f"{filas:>8} | {t_paginado:>12.2f} | {'-':>15} | {'-':>11}")
+            continue
+        t_unica, _ = medir(df_to_pdf_tabla_unica, df)
+        print(f"{filas:>8} | {t_paginado:>12.2f} | {t_unica:>15.2f} | {t_unica / t_paginado:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
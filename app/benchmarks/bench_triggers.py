@@ -0,0 +1,143 @@
+# benchmarks/bench_triggers.py
+# Inserta N donaciones con los triggers por fila anteriores y con los de
+# DDL.sql (FOR EACH STATEMENT) y compara tiempos. Cada variante corre en una
+# transacción que se revierte al final: la BD queda como estaba.
+# Uso (desde app/, con la BD sembrada): python -m benchmarks.bench_triggers [--filas 100000] [--lote 100000]
+import argparse
+import time
+from db.connection import get_engine
+from db.ddl import TRIGGERS_ESTADISTICAS, NOMBRES_TRIGGERS_ESTADISTICAS
+
+# Trigger por fila original. Único cambio: LEAST() en porcentaje_meta; sin él
+# 100k donaciones desbordan NUMERIC(5,2) y la variante no llega a terminar.
+TRIGGER_POR_FILA = """
+CREATE OR REPLACE FUNCTION actualizar_estadisticas_donacion()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.tipo = 'monetaria' THEN
+        UPDATE estadisticas_campana
+        SET monto_recaudado = monto_recaudado + NEW.monto,
+            num_donaciones = num_donaciones + 1,
+            porcentaje_meta = (
+                SELECT CASE WHEN meta_monetaria > 0
+                       THEN LEAST(((monto_recaudado + NEW.monto) / meta_monetaria) * 100, 999.99)
+                       ELSE 0
+                       END
+                FROM campana WHERE campana_id = NEW.campana_id
+            ),
+            ultima_actualizacion = CURRENT_TIMESTAMP
+        WHERE campana_id = NEW.campana_id;
+    ELSE
+        UPDATE estadisticas_campana
+        SET num_donaciones = num_donaciones + 1,
+            ultima_actualizacion = CURRENT_TIMESTAMP
+        WHERE campana_id = NEW.campana_id;
+    END IF;
+
+    IF NOT FOUND THEN
+        INSERT INTO estadisticas_campana (campana_id, monto_recaudado, porcentaje_meta, num_donaciones)
+        VALUES (
+            NEW.campana_id,
+            CASE WHEN NEW.tipo = 'monetaria' THEN NEW.monto ELSE 0 END,
+            (
+                SELECT CASE WHEN meta_monetaria > 0
+                       THEN LEAST((CASE WHEN NEW.tipo = 'monetaria' THEN NEW.monto ELSE 0 END / meta_monetaria) * 100, 999.99)
+                       ELSE 0
+                       END
+                FROM campana WHERE campana_id = NEW.campana_id
+            ),
+            1
+        );
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER after_donacion_insert
+AFTER INSERT ON donacion
+FOR EACH ROW
+EXECUTE FUNCTION actualizar_estadisticas_donacion();"""
+
+VARIANTES = {
+    "por fila": [TRIGGER_POR_FILA],
+    "por sentencia": TRIGGERS_ESTADISTICAS,
+}
+
+# Mitad monetarias y mitad en especie, con campaña y donante al azar entre los existentes
+INSERTAR_DONACIONES = """
+INSERT INTO donacion (campana_id, donante_id, tipo, monto, descripcion_especie, fecha)
+SELECT c.ids[1 + floor(random() * array_length(c.ids, 1))::int],
+       d.ids[1 + floor(random() * array_length(d.ids, 1))::int],
+       t.tipo::tipo_donacion,
+       CASE WHEN t.tipo = 'monetaria' THEN round((10 + random() * 990)::numeric, 2) END,
+       CASE WHEN t.tipo = 'especie' THEN 'Donación de prueba' END,
+       now() - random() * interval '730 days'
+FROM generate_series(1, %(n)s) AS g(i)
+CROSS JOIN (SELECT array_agg(campana_id) AS ids FROM campana) AS c
+CROSS JOIN (SELECT array_agg(donante_id) AS ids FROM donante) AS d
+CROSS JOIN LATERAL (SELECT CASE WHEN g.i %% 2 = 0 THEN 'monetaria' ELSE 'especie' END AS tipo) AS t
+"""
+
+# Campañas cuyas estadísticas no coinciden con un recálculo desde donacion
+DESVIACIONES = """
+SELECT COUNT(*)
+FROM estadisticas_campana e
+LEFT JOIN (
+    SELECT campana_id,
+           COALESCE(SUM(monto) FILTER (WHERE tipo = 'monetaria'), 0) AS monto,
+           COUNT(*) AS num
+    FROM donacion GROUP BY campana_id
+) r ON r.campana_id = e.campana_id
+WHERE e.monto_recaudado IS DISTINCT FROM COALESCE(r.monto, 0)
+   OR e.num_donaciones IS DISTINCT FROM COALESCE(r.num, 0)
+"""
+
+
+def medir(variante: str, filas: int, lote: int) -> tuple[float, int, int]:
+    with get_engine().connect() as conn:
+        trans = conn.begin()
+        try:
+            for nombre, tabla in NOMBRES_TRIGGERS_ESTADISTICAS:
+                conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nombre} ON {tabla}")
+            for sql in VARIANTES[variante]:
+                conn.exec_driver_sql(sql)
+            # Parte de estadísticas correctas para que las desviaciones sean sólo de esta variante
+            conn.exec_driver_sql("DELETE FROM estadisticas_campana")
+            conn.exec_driver_sql("""
+                INSERT INTO estadisticas_campana (campana_id, monto_recaudado, num_donaciones)
+                SELECT campana_id, COALESCE(SUM(monto) FILTER (WHERE tipo = 'monetaria'), 0), COUNT(*)
+                FROM donacion GROUP BY campana_id
+            """)
+            conn.exec_driver_sql("SELECT setseed(0.42)")
+            sentencias = 0
+            inicio = time.perf_counter()
+            for desde in range(0, filas, lote):
+                conn.exec_driver_sql(INSERTAR_DONACIONES, {"n": min(lote, filas - desde)})
+                sentencias += 1
+            duracion = time.perf_counter() - inicio
+            desviaciones = conn.exec_driver_sql(DESVIACIONES).scalar()
+        finally:
+            trans.rollback()
+    return duracion, sentencias, desviaciones
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--lote", type=int, default=100_000,
+                        help="filas por sentencia INSERT (1 simula inserciones una a una)")
+    args = parser.parse_args()
+
+    print(f"{args.filas} donaciones en sentencias de {args.lote} filas")
+    print(f"{'variante':>14} | {'tiempo (s)':>10} | {'filas/s':>10} | {'desviaciones':>12}")
+    resultados = {}
+    for variante in VARIANTES:
+        duracion, _, desviaciones = medir(variante, args.filas, args.lote)
+        resultados[variante] = duracion
+        print(f"{variante:>14} | {duracion:>10.2f} | {args.filas / duracion:>10.0f} | {desviaciones:>12}")
+    print(f"aceleración: {resultados['por fila'] / resultados['por sentencia']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
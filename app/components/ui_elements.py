@@ -2,13 +2,46 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import io
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer
 from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from io import BytesIO
 
+logger = logging.getLogger(__name__)
 
-def df_to_pdf(df: pd.DataFrame):
+
+_ESTILO_TABLA_PDF = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+    ('FONTSIZE', (0, 0), (-1, -1), 8),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
+]
+
+# Parámetros del PDF paginado
+PDF_FILAS_POR_BLOQUE = 500
+PDF_MAX_FILAS = int(os.getenv("PDF_MAX_FILAS", "20000"))
+_PDF_MARGEN = 36
+_PDF_ALTO_FILA = 14
+_PDF_PADDING_CELDA = 8
+_PDF_ANCHO_MAX_COLUMNA = 220
+_PDF_FILAS_MUESTRA = 200
+# Ancho del carácter más ancho de Helvetica 8pt: textos más cortos que esto caben sin medir
+_PDF_ANCHO_MAX_CARACTER = 7.6
+
+
+def df_to_pdf_tabla_unica(df: pd.DataFrame):
+    """Versión original: una sola Table con todo el DataFrame (se conserva para comparar en benchmarks)"""
     # Crear un buffer en memoria
     buffer = BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=landscape(letter))
@@ -20,15 +53,7 @@ def df_to_pdf(df: pd.DataFrame):
     table = Table(data)
 
     # Estilo de la tabla
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-        ('FONTSIZE', (0, 0), (-1, -1), 8),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE')
-    ]))
+    table.setStyle(TableStyle(_ESTILO_TABLA_PDF))
 
     # Construir el documento
     doc.build([table])
@@ -37,6 +62,91 @@ def df_to_pdf(df: pd.DataFrame):
     buffer.seek(0)
     return buffer.read()
 
+
+def _recortar(texto: str, ancho: float) -> str:
+    """Acorta el texto con '…' para que quepa en una celda de ancho fijo"""
+    disponible = ancho - _PDF_PADDING_CELDA
+    medido = stringWidth(texto, 'Helvetica', 8)
+    if medido <= disponible:
+        return texto
+    # Corte proporcional al ancho medido y luego ajuste fino
+    texto = texto[:max(int(len(texto) * disponible / medido), 0)]
+    while texto and stringWidth(texto + '…', 'Helvetica', 8) > disponible:
+        texto = texto[:-1]
+    return texto + '…'
+
+
+def df_to_pdf(df: pd.DataFrame, max_filas: int | None = PDF_MAX_FILAS, orientacion: str = "auto",
+              filas_por_bloque: int = PDF_FILAS_POR_BLOQUE):
+    """PDF paginado: bloques de LongTable con encabezado repetido y anchos/altos fijos.
+
+    Los anchos se calculan una sola vez con una muestra de filas, así reportlab no
+    tiene que medir cada celda antes de partir páginas. `orientacion` puede ser
+    "auto", "portrait" o "landscape"; con `max_filas` se corta el documento y se
+    agrega una nota indicando cuántas filas se omitieron.
+    """
+    total = len(df)
+    truncado = max_filas is not None and total > max_filas
+    if truncado:
+        df = df.head(max_filas)
+
+    encabezado = [str(c) for c in df.columns]
+    celdas = df.astype(object).where(df.notna(), '').astype(str)
+
+    # Anchos de columna a partir del encabezado y una muestra de filas
+    muestra = celdas.head(_PDF_FILAS_MUESTRA)
+    anchos = []
+    for i, nombre in enumerate(encabezado):
+        ancho = stringWidth(nombre, 'Helvetica-Bold', 8)
+        for valor in muestra.iloc[:, i]:
+            ancho = max(ancho, stringWidth(valor, 'Helvetica', 8))
+        anchos.append(min(ancho + _PDF_PADDING_CELDA, _PDF_ANCHO_MAX_COLUMNA))
+
+    ancho_tabla = sum(anchos)
+    if orientacion == "portrait":
+        pagesize = letter
+    elif orientacion == "landscape":
+        pagesize = landscape(letter)
+    else:
+        pagesize = letter if ancho_tabla <= letter[0] - 2 * _PDF_MARGEN else landscape(letter)
+    disponible = pagesize[0] - 2 * _PDF_MARGEN
+    if ancho_tabla > disponible:
+        anchos = [a * disponible / ancho_tabla for a in anchos]
+
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=pagesize, leftMargin=_PDF_MARGEN, rightMargin=_PDF_MARGEN,
+                            topMargin=_PDF_MARGEN, bottomMargin=_PDF_MARGEN)
+    estilo = TableStyle(_ESTILO_TABLA_PDF)
+    fila_encabezado = [_recortar(nombre, ancho) for nombre, ancho in zip(encabezado, anchos)]
+    # Solo se miden (y recortan) las celdas que podrían no caber en su columna
+    for i, ancho in enumerate(anchos):
+        columna = celdas.iloc[:, i]
+        largas = columna.str.len() > int((ancho - _PDF_PADDING_CELDA) / _PDF_ANCHO_MAX_CARACTER)
+        if largas.any():
+            recortes = {texto: _recortar(texto, ancho) for texto in columna[largas].unique()}
+            celdas.iloc[largas.values, i] = columna[largas].map(recortes)
+    valores = celdas.values.tolist()
+
+    historia = []
+    for inicio in range(0, max(len(valores), 1), filas_por_bloque):
+        bloque = valores[inicio:inicio + filas_por_bloque]
+        tabla = LongTable([fila_encabezado] + bloque, colWidths=anchos,
+                          rowHeights=[_PDF_ALTO_FILA] * (len(bloque) + 1), repeatRows=1)
+        tabla.setStyle(estilo)
+        historia.append(tabla)
+
+    if truncado:
+        historia.append(Spacer(1, 8))
+        historia.append(Paragraph(
+            f"Reporte truncado: se muestran {max_filas:,} de {total:,} filas. "
+            "Use la exportación CSV o Excel para obtener el resultado completo.",
+            getSampleStyleSheet()['Italic']
+        ))
+
+    doc.build(historia)
+    buffer.seek(0)
+    return buffer.read()
+
 # Descargar Excel
 def to_excel(df):
     output = io.BytesIO()
@@ -44,18 +154,84 @@ def to_excel(df):
         df.to_excel(writer, index=False, sheet_name='Datos')
     return output.getvalue()
 
-def render_table(title: str, data: list[dict]):
+# Exportaciones generadas bajo demanda y memorizadas por contenido del DataFrame
+_EXPORTADORES = {
+    "csv": lambda df: df.to_csv(index=False).encode('utf-8'),
+    "xlsx": lambda df: to_excel(df),
+    "json": lambda df: df.to_json(orient="records", indent=2),
+    "pdf": lambda df: df_to_pdf(df),
+}
+_MAX_EXPORTACIONES = 32
+_exportaciones = OrderedDict()
+_exportaciones_lock = threading.Lock()
+_exportaciones_stats = {formato: {"generadas": 0, "reutilizadas": 0, "segundos": 0.0} for formato in _EXPORTADORES}
+
+def hash_dataframe(df: pd.DataFrame) -> str:
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    digest.update(repr(list(df.columns)).encode('utf-8'))
+    return digest.hexdigest()
+
+def exportar(df: pd.DataFrame, formato: str, clave: str | None = None):
+    """Serializa el DataFrame al formato pedido, reutilizando el resultado si el contenido no cambió"""
+    clave = (clave or hash_dataframe(df), formato)
+    with _exportaciones_lock:
+        if clave in _exportaciones:
+            _exportaciones.move_to_end(clave)
+            _exportaciones_stats[formato]["reutilizadas"] += 1
+            return _exportaciones[clave]
+    inicio = time.perf_counter()
+    contenido = _EXPORTADORES[formato](df)
+    duracion = time.perf_counter() - inicio
+    logger.info("Exportación %s generada en %.3f s (%d filas)", formato, duracion, len(df))
+    with _exportaciones_lock:
+        _exportaciones[clave] = contenido
+        while len(_exportaciones) > _MAX_EXPORTACIONES:
+            _exportaciones.popitem(last=False)
+        _exportaciones_stats[formato]["generadas"] += 1
+        _exportaciones_stats[formato]["segundos"] += duracion
+    return contenido
+
+def get_export_stats() -> dict:
+    with _exportaciones_lock:
+        return {formato: dict(stats) for formato, stats in _exportaciones_stats.items()}
+
+def render_descargas_streaming(title: str, consulta):
+    """Descarga del resultado completo de `consulta` sin cargarlo en un DataFrame.
+
+    El archivo se genera por lotes al hacer clic; Streamlit lo recibe entero como bytes.
+    """
+    from services.exportacion import exportar_consulta_csv, exportar_consulta_excel
+    nombre = f"{title.lower().replace(' ', '_')}_completo"
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button(
+            label="⬇️ CSV completo",
+            data=lambda: exportar_consulta_csv(consulta),
+            file_name=f"{nombre}.csv",
+            mime="text/csv",
+            on_click="ignore",
+            key=f"{nombre}_csv"
+        )
+    with col2:
+        st.download_button(
+            label="⬇️ Excel completo",
+            data=lambda: exportar_consulta_excel(consulta),
+            file_name=f"{nombre}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore",
+            key=f"{nombre}_xlsx"
+        )
+
+def render_table(title: str, data: list[dict], consulta=None):
     st.subheader(title)
     if not data:
         st.info("No hay datos disponibles.")
         return
 
-    df = pd.DataFrame(data)
-
-    csv = df.to_csv(index=False).encode('utf-8')
-    excel = to_excel(df)
-    json = df.to_json(orient="records", indent=2)
-    pdf_data = df_to_pdf(df)
+    df_export = pd.DataFrame(data)
+    # Solo se calcula el hash en cada rerun; la serialización ocurre al hacer clic
+    hash_export = hash_dataframe(df_export)
+    df = df_export.copy()
 
     # Asegurar que columnas monetarias y porcentajes sean numéricas
     for col in ['monto_total', 'monto_recaudado', 'meta_monetaria']:
@@ -92,36 +268,71 @@ def render_table(title: str, data: list[dict]):
     with col1:
         st.download_button(
             label="📄 Descargar CSV",
-            data=csv,
+            data=lambda: exportar(df_export, "csv", hash_export),
             file_name=f"{title.lower().replace(' ', '_')}.csv",
-            mime="text/csv"
+            mime="text/csv",
+            on_click="ignore"
         )
 
     with col2:
         st.download_button(
             label="📊 Descargar Excel",
-            data=excel,
+            data=lambda: exportar(df_export, "xlsx", hash_export),
             file_name=f"{title.lower().replace(' ', '_')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore"
         )
 
     with col3:
         st.download_button(
             label="🗂 Descargar JSON",
-            data=json,
+            data=lambda: exportar(df_export, "json", hash_export),
             file_name=f"{title.lower().replace(' ', '_')}.json",
-            mime="application/json"
+            mime="application/json",
+            on_click="ignore"
         )
 
     with col4:
         st.download_button(
             label="📄 Descargar PDF",
-            data=pdf_data,
+            data=lambda: exportar(df_export, "pdf", hash_export),
             file_name=f"{title.lower().replace(' ', '_')}.pdf",
-            mime="application/pdf"
+            mime="application/pdf",
+            on_click="ignore"
         )
 
+    if consulta is not None:
+        render_descargas_streaming(title, consulta)
+
+
+
+def cursor_actual(clave: str):
+    """Cursor de la página que se está mostrando para el paginador `clave`"""
+    return st.session_state.get(clave, [None])[-1]
 
+def _pagina_siguiente(clave: str, cursor: str):
+    st.session_state.setdefault(clave, [None]).append(cursor)
+
+def _pagina_anterior(clave: str):
+    pila = st.session_state.setdefault(clave, [None])
+    if len(pila) > 1:
+        pila.pop()
+
+def render_paginador(clave: str, pagina, limite: int):
+    """Botones Anterior/Siguiente para una página obtenida por keyset"""
+    pila = st.session_state.setdefault(clave, [None])
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("⬅️ Anterior", key=f"{clave}_anterior", disabled=len(pila) <= 1,
+                  on_click=_pagina_anterior, args=(clave,))
+    with col2:
+        texto = f"Página {len(pila)}"
+        if pagina.total_estimado:
+            texto += f" de ~{max(-(-pagina.total_estimado // limite), 1)} (~{pagina.total_estimado:,} registros)"
+        st.caption(texto)
+    with col3:
+        st.button("Siguiente ➡️", key=f"{clave}_siguiente", disabled=pagina.siguiente_cursor is None,
+                  on_click=_pagina_siguiente, args=(clave, pagina.siguiente_cursor))
 
 def render_metric(label: str, value: str | int | float, delta: str = ""):
     st.metric(label=label, value=value, delta=delta)
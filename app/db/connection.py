@@ -1,21 +1,221 @@
 # db/connection.py
+from contextlib import contextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from models import Base
+import contextvars
+import logging
 import os
+import sys
+import threading
+import time
+import weakref
 
-def get_engine():
-    return create_engine(
+logger = logging.getLogger(__name__)
+
+_engine = None
+_SessionLocal = None
+_async_engine = None
+_engine_lock = threading.RLock()
+
+# Sesión compartida por todas las secciones de una ejecución del script
+_sesion_rerun = contextvars.ContextVar("sesion_rerun", default=None)
+# Sesiones entregadas por get_session()/session_scope(), para detectar fugas
+_sesiones_rastreadas = weakref.WeakSet()
+
+
+class _PoolMedido(QueuePool):
+    """QueuePool que mide cuánto espera cada checkout por una conexión libre."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.num_checkouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            espera = time.perf_counter() - inicio
+            with self._stats_lock:
+                self.num_checkouts += 1
+                self.espera_total += espera
+                self.espera_max = max(self.espera_max, espera)
+
+
+def _env_bool(nombre: str, default: bool) -> bool:
+    valor = os.getenv(nombre)
+    if valor is None:
+        return default
+    return valor.strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def get_database_url() -> str:
+    return (
         f"postgresql://{os.getenv('POSTGRES_USER', 'admin')}:{os.getenv('POSTGRES_PASSWORD', 'admin_password')}@"
         f"{os.getenv('POSTGRES_HOST', 'db')}:{os.getenv('POSTGRES_PORT', '5432')}/"
         f"{os.getenv('POSTGRES_DB', 'reporteria_db')}"
     )
 
+
+def get_engine():
+    """Engine único por proceso; el pool se configura con variables DB_POOL_*."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(
+                    get_database_url(),
+                    poolclass=_PoolMedido,
+                    pool_size=int(os.getenv('DB_POOL_SIZE', '5')),
+                    max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '10')),
+                    pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+                    pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '1800')),
+                    pool_pre_ping=_env_bool('DB_POOL_PRE_PING', True),
+                )
+    return _engine
+
+
+def get_async_engine():
+    """Engine asyncio (asyncpg) único por proceso, para la API; mismas variables DB_POOL_*."""
+    global _async_engine
+    if _async_engine is None:
+        with _engine_lock:
+            if _async_engine is None:
+                _async_engine = create_async_engine(
+                    get_database_url().replace("postgresql://", "postgresql+asyncpg://", 1),
+                    pool_size=int(os.getenv('DB_POOL_SIZE', '5')),
+                    max_overflow=int(os.getenv('DB_MAX_OVERFLOW', '10')),
+                    pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', '30')),
+                    pool_recycle=int(os.getenv('DB_POOL_RECYCLE', '1800')),
+                    pool_pre_ping=_env_bool('DB_POOL_PRE_PING', True),
+                )
+    return _async_engine
+
+
+async def dispose_async_engine():
+    global _async_engine
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+
+
+def _get_sessionmaker():
+    global _SessionLocal
+    if _SessionLocal is None:
+        with _engine_lock:
+            if _SessionLocal is None:
+                _SessionLocal = sessionmaker(bind=get_engine())
+    return _SessionLocal
+
+
+def _nueva_sesion(profundidad: int = 2):
+    session = _get_sessionmaker()()
+    frame = sys._getframe(profundidad)
+    session.info["origen"] = f"{frame.f_code.co_filename}:{frame.f_lineno} ({frame.f_code.co_name})"
+    session.info["hilo"] = threading.get_ident()
+    _sesiones_rastreadas.add(session)
+    return session
+
+
 def get_session():
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
-    return Session()
+    """Devuelve la sesión de la ejecución actual si hay una abierta (ver rerun_scope).
+
+    Fuera de un rerun_scope el llamador es responsable de cerrar la sesión;
+    preferir session_scope().
+    """
+    actual = _sesion_rerun.get()
+    if actual is not None:
+        return actual
+    return _nueva_sesion(profundidad=2)
+
+
+@contextmanager
+def session_scope():
+    """Sesión con commit al salir, rollback ante error y cierre garantizado."""
+    session = _nueva_sesion(profundidad=3)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+@contextmanager
+def rerun_scope():
+    """Una sola sesión para toda la ejecución del script de Streamlit.
+
+    Mientras el bloque está activo, get_session() devuelve siempre la misma
+    sesión. Al terminar se hace commit (rollback si hubo error), se cierra y
+    se reportan las sesiones que hayan quedado abiertas en este hilo.
+    """
+    session = _nueva_sesion(profundidad=3)
+    token = _sesion_rerun.set(session)
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        _sesion_rerun.reset(token)
+        session.close()
+        detectar_sesiones_abiertas()
+
+
+def detectar_sesiones_abiertas(cerrar: bool = True) -> list[str]:
+    """Registra (y por defecto cierra) las sesiones de este hilo que siguen en transacción."""
+    hilo = threading.get_ident()
+    fugas = []
+    for session in list(_sesiones_rastreadas):
+        if session.info.get("hilo") != hilo or not session.in_transaction():
+            continue
+        origen = session.info.get("origen", "desconocido")
+        fugas.append(origen)
+        logger.warning("Sesión de base de datos abierta tras el rerun, creada en %s", origen)
+        if cerrar:
+            session.close()
+    return fugas
+
+
+def get_pool_stats() -> dict:
+    pool = get_engine().pool
+    stats = {
+        "tamano": pool.size(),
+        "en_reposo": pool.checkedin(),
+        "en_uso": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+    }
+    if isinstance(pool, _PoolMedido):
+        with pool._stats_lock:
+            stats.update({
+                "num_checkouts": pool.num_checkouts,
+                "espera_total_s": pool.espera_total,
+                "espera_promedio_s": pool.espera_total / pool.num_checkouts if pool.num_checkouts else 0.0,
+                "espera_max_s": pool.espera_max,
+            })
+    return stats
+
+
+def dispose_engine():
+    global _engine, _SessionLocal
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = None
+        _SessionLocal = None
+
 
 def init_db():
     engine = get_engine()
-    Base.metadata.create_all(engine)
\ No newline at end of file
+    # Las vistas (info is_view) las crea DDL.sql; create_all las crearía como tablas
+    tablas = [t for t in Base.metadata.sorted_tables if not t.info.get("is_view")]
+    Base.metadata.create_all(engine, tables=tablas)
@@ -1,11 +1,309 @@
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, Boolean, Date, Time, Numeric, TIMESTAMP, Enum, ForeignKey, CheckConstraint, UniqueConstraint
-from sqlalchemy.schema import CreateTable
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, Boolean, Date, Time, Numeric, TIMESTAMP, Enum, ForeignKey, CheckConstraint, UniqueConstraint, Index
+from sqlalchemy.schema import CreateTable, CreateIndex
 from sqlalchemy.dialects.postgresql import ENUM as PG_ENUM
 from sqlalchemy.sql import text
 import os
 import re
 
-def generate_ddl():
+# Totales por campaña precalculados. El índice único permite
+# REFRESH MATERIALIZED VIEW CONCURRENTLY (sin bloquear las lecturas) y
+# calculada_en indica la antigüedad de los datos (ver services/vistas.py).
+VISTA_DONACIONES_CAMPANA = """
+--vistas
+CREATE MATERIALIZED VIEW vista_donaciones_campana AS
+SELECT c.campana_id,
+       c.nombre AS nombre_campana,
+       c.meta_monetaria,
+       c.estado,
+       c.fecha_inicio,
+       c.fecha_fin,
+       COALESCE(SUM(d.monto), 0) AS monto_total,
+       COUNT(d.donacion_id) AS num_donaciones,
+       now() AS calculada_en
+FROM campana c
+LEFT JOIN donacion d ON d.campana_id = c.campana_id
+GROUP BY c.campana_id;
+
+CREATE UNIQUE INDEX uq_vista_donaciones_campana ON vista_donaciones_campana (campana_id);
+CREATE INDEX idx_vista_donaciones_campana_fecha_inicio ON vista_donaciones_campana (fecha_inicio);"""
+
+# Estadísticas por campaña mantenidas con triggers FOR EACH STATEMENT: las
+# tablas de transición (nuevas/viejas) traen todas las filas de la sentencia y
+# los cambios se agregan por campaña una sola vez, también en COPY masivos.
+def _sql_deltas_donacion(filas: str) -> str:
+    return f"""
+        INSERT INTO estadisticas_campana AS e (campana_id, monto_recaudado, porcentaje_meta, num_donaciones, ultima_actualizacion)
+        SELECT d.campana_id, d.monto,
+               LEAST(CASE WHEN c.meta_monetaria > 0 THEN d.monto / c.meta_monetaria * 100 ELSE 0 END, 999.99),
+               d.num, CURRENT_TIMESTAMP
+        FROM (
+            SELECT campana_id,
+                   SUM(signo * CASE WHEN tipo = 'monetaria' THEN monto ELSE 0 END) AS monto,
+                   SUM(signo) AS num
+            FROM ({filas}) AS cambios
+            GROUP BY campana_id
+        ) d
+        JOIN campana c ON c.campana_id = d.campana_id
+        WHERE d.monto <> 0 OR d.num <> 0
+        ON CONFLICT (campana_id) DO UPDATE
+        SET monto_recaudado = COALESCE(e.monto_recaudado, 0) + EXCLUDED.monto_recaudado,
+            num_donaciones = COALESCE(e.num_donaciones, 0) + EXCLUDED.num_donaciones,
+            porcentaje_meta = LEAST((
+                SELECT CASE WHEN c.meta_monetaria > 0
+                       THEN (COALESCE(e.monto_recaudado, 0) + EXCLUDED.monto_recaudado) / c.meta_monetaria * 100
+                       ELSE 0 END
+                FROM campana c WHERE c.campana_id = e.campana_id
+            ), 999.99),
+            ultima_actualizacion = CURRENT_TIMESTAMP;"""
+
+
+def _sql_recalculo_voluntarios(filas: str) -> str:
+    # COUNT(DISTINCT) no admite deltas (un voluntario puede estar en varias
+    # actividades de la campaña): se recalcula, una vez por campaña afectada
+    return f"""
+        INSERT INTO estadisticas_campana AS e (campana_id, num_voluntarios, ultima_actualizacion)
+        SELECT af.campana_id,
+               (SELECT COUNT(DISTINCT va.voluntario_id)
+                FROM voluntario_actividad va
+                JOIN actividad a ON a.actividad_id = va.actividad_id
+                WHERE a.campana_id = af.campana_id),
+               CURRENT_TIMESTAMP
+        FROM (
+            SELECT DISTINCT a.campana_id
+            FROM ({filas}) AS cambios
+            JOIN actividad a ON a.actividad_id = cambios.actividad_id
+        ) af
+        ON CONFLICT (campana_id) DO UPDATE
+        SET num_voluntarios = EXCLUDED.num_voluntarios,
+            ultima_actualizacion = CURRENT_TIMESTAMP;"""
+
+
+TRIGGERS_ESTADISTICAS = [
+    f"""
+--TRIGGERS
+CREATE OR REPLACE FUNCTION actualizar_estadisticas_donacion()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{_sql_deltas_donacion("SELECT campana_id, tipo, monto, 1 AS signo FROM nuevas")}
+    ELSIF TG_OP = 'DELETE' THEN{_sql_deltas_donacion("SELECT campana_id, tipo, monto, -1 AS signo FROM viejas")}
+    ELSE{_sql_deltas_donacion(
+        "SELECT campana_id, tipo, monto, 1 AS signo FROM nuevas "
+        "UNION ALL SELECT campana_id, tipo, monto, -1 FROM viejas")}
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Una tabla de transición no puede usarse en un trigger de varios eventos: uno por evento
+CREATE TRIGGER after_donacion_insert
+AFTER INSERT ON donacion
+REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_estadisticas_donacion();
+
+CREATE TRIGGER after_donacion_update
+AFTER UPDATE ON donacion
+REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_estadisticas_donacion();
+
+CREATE TRIGGER after_donacion_delete
+AFTER DELETE ON donacion
+REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_estadisticas_donacion();""",
+    f"""
+CREATE OR REPLACE FUNCTION actualizar_estadisticas_voluntario()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN{_sql_recalculo_voluntarios("SELECT actividad_id FROM nuevas")}
+    ELSIF TG_OP = 'DELETE' THEN{_sql_recalculo_voluntarios("SELECT actividad_id FROM viejas")}
+    ELSE{_sql_recalculo_voluntarios("SELECT actividad_id FROM nuevas UNION SELECT actividad_id FROM viejas")}
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER after_voluntario_actividad_insert
+AFTER INSERT ON voluntario_actividad
+REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_estadisticas_voluntario();
+
+CREATE TRIGGER after_voluntario_actividad_update
+AFTER UPDATE ON voluntario_actividad
+REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_estadisticas_voluntario();
+
+CREATE TRIGGER after_voluntario_actividad_delete
+AFTER DELETE ON voluntario_actividad
+REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_estadisticas_voluntario();""",
+]
+# Nombres de todos los triggers de estadísticas (para reemplazarlos en una BD existente)
+NOMBRES_TRIGGERS_ESTADISTICAS = [
+    ('after_donacion_insert', 'donacion'), ('after_donacion_update', 'donacion'), ('after_donacion_delete', 'donacion'),
+    ('after_voluntario_actividad_insert', 'voluntario_actividad'),
+    ('after_voluntario_actividad_update', 'voluntario_actividad'),
+    ('after_voluntario_actividad_delete', 'voluntario_actividad'),
+]
+
+# Resumen diario de donaciones (día × campaña × donante × tipo) que usan los
+# reportes filtrados por fecha. Las altas suman deltas con LEAST/GREATEST; en
+# bajas y cambios el mínimo y el máximo no se pueden "restar", así que se
+# recalculan los grupos afectados desde donacion.
+_CLAVE_DIARIA = "dia, campana_id, donante_id, tipo"
+
+
+def _sql_recalculo_diario(filas: str) -> str:
+    afectados = f"SELECT DISTINCT fecha::date AS dia, campana_id, donante_id, tipo FROM ({filas}) AS cambios"
+    return f"""
+        DELETE FROM donacion_diaria r
+        USING ({afectados}) a
+        WHERE r.dia = a.dia AND r.campana_id = a.campana_id AND r.donante_id = a.donante_id AND r.tipo = a.tipo;
+        INSERT INTO donacion_diaria ({_CLAVE_DIARIA}, monto_total, num_donaciones, monto_min, monto_max)
+        SELECT a.dia, a.campana_id, a.donante_id, a.tipo, COALESCE(SUM(d.monto), 0), COUNT(*), MIN(d.monto), MAX(d.monto)
+        FROM ({afectados}) a
+        JOIN donacion d ON d.campana_id = a.campana_id AND d.donante_id = a.donante_id AND d.tipo = a.tipo
+                       AND d.fecha >= a.dia AND d.fecha < a.dia + 1
+        GROUP BY a.dia, a.campana_id, a.donante_id, a.tipo;"""
+
+
+TRIGGERS_DONACION_DIARIA = [
+    f"""
+CREATE OR REPLACE FUNCTION actualizar_donacion_diaria()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO donacion_diaria AS r ({_CLAVE_DIARIA}, monto_total, num_donaciones, monto_min, monto_max)
+        SELECT fecha::date, campana_id, donante_id, tipo, COALESCE(SUM(monto), 0), COUNT(*), MIN(monto), MAX(monto)
+        FROM nuevas
+        GROUP BY fecha::date, campana_id, donante_id, tipo
+        ON CONFLICT ({_CLAVE_DIARIA}) DO UPDATE
+        SET monto_total = r.monto_total + EXCLUDED.monto_total,
+            num_donaciones = r.num_donaciones + EXCLUDED.num_donaciones,
+            monto_min = LEAST(r.monto_min, EXCLUDED.monto_min),
+            monto_max = GREATEST(r.monto_max, EXCLUDED.monto_max);
+    ELSIF TG_OP = 'DELETE' THEN{_sql_recalculo_diario("SELECT fecha, campana_id, donante_id, tipo FROM viejas")}
+    ELSE{_sql_recalculo_diario(
+        "SELECT fecha, campana_id, donante_id, tipo FROM viejas "
+        "UNION ALL SELECT fecha, campana_id, donante_id, tipo FROM nuevas")}
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER after_donacion_insert_diaria
+AFTER INSERT ON donacion
+REFERENCING NEW TABLE AS nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_donacion_diaria();
+
+CREATE TRIGGER after_donacion_update_diaria
+AFTER UPDATE ON donacion
+REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_donacion_diaria();
+
+CREATE TRIGGER after_donacion_delete_diaria
+AFTER DELETE ON donacion
+REFERENCING OLD TABLE AS viejas
+FOR EACH STATEMENT
+EXECUTE FUNCTION actualizar_donacion_diaria();""",
+]
+NOMBRES_TRIGGERS_DONACION_DIARIA = [
+    ('after_donacion_insert_diaria', 'donacion'),
+    ('after_donacion_update_diaria', 'donacion'),
+    ('after_donacion_delete_diaria', 'donacion'),
+]
+
+# Reconstrucción completa (BD existente al instalar los triggers)
+RECONSTRUIR_DONACION_DIARIA = f"""
+DELETE FROM donacion_diaria;
+INSERT INTO donacion_diaria ({_CLAVE_DIARIA}, monto_total, num_donaciones, monto_min, monto_max)
+SELECT fecha::date, campana_id, donante_id, tipo, COALESCE(SUM(monto), 0), COUNT(*), MIN(monto), MAX(monto)
+FROM donacion
+GROUP BY fecha::date, campana_id, donante_id, tipo;"""
+
+# Estadísticas recalculadas desde cero para todas las campañas (conjunto, sin
+# cursores); base de la carga inicial y de db/reconciliar_estadisticas.py
+_ESTADISTICAS_CALCULADAS = """
+    SELECT c.campana_id,
+           COALESCE(d.monto, 0) AS monto_recaudado,
+           LEAST(CASE WHEN c.meta_monetaria > 0 THEN COALESCE(d.monto, 0) / c.meta_monetaria * 100 ELSE 0 END, 999.99)::NUMERIC(5, 2) AS porcentaje_meta,
+           COALESCE(d.num, 0) AS num_donaciones,
+           COALESCE(v.num, 0) AS num_voluntarios
+    FROM campana c
+    LEFT JOIN (
+        SELECT campana_id, SUM(monto) FILTER (WHERE tipo = 'monetaria') AS monto, COUNT(*) AS num
+        FROM donacion GROUP BY campana_id
+    ) d ON d.campana_id = c.campana_id
+    LEFT JOIN (
+        SELECT a.campana_id, COUNT(DISTINCT va.voluntario_id) AS num
+        FROM voluntario_actividad va
+        JOIN actividad a ON a.actividad_id = va.actividad_id
+        GROUP BY a.campana_id
+    ) v ON v.campana_id = c.campana_id"""
+
+# Sólo escribe las filas que cambian (el rowcount son las campañas corregidas)
+RECALCULAR_ESTADISTICAS = f"""
+INSERT INTO estadisticas_campana AS e (campana_id, monto_recaudado, porcentaje_meta, num_donaciones, num_voluntarios, ultima_actualizacion)
+SELECT calc.*, CURRENT_TIMESTAMP
+FROM ({_ESTADISTICAS_CALCULADAS}
+) AS calc
+ON CONFLICT (campana_id) DO UPDATE
+SET monto_recaudado = EXCLUDED.monto_recaudado,
+    porcentaje_meta = EXCLUDED.porcentaje_meta,
+    num_donaciones = EXCLUDED.num_donaciones,
+    num_voluntarios = EXCLUDED.num_voluntarios,
+    ultima_actualizacion = CURRENT_TIMESTAMP
+WHERE (e.monto_recaudado, e.porcentaje_meta, e.num_donaciones, e.num_voluntarios)
+      IS DISTINCT FROM (EXCLUDED.monto_recaudado, EXCLUDED.porcentaje_meta, EXCLUDED.num_donaciones, EXCLUDED.num_voluntarios)"""
+
+# Diferencias entre los contadores guardados y el recálculo (NULL = falta la fila)
+DESVIACIONES_ESTADISTICAS = f"""
+SELECT calc.campana_id,
+       e.monto_recaudado AS monto_guardado, calc.monto_recaudado AS monto_real,
+       e.num_donaciones AS donaciones_guardadas, calc.num_donaciones AS donaciones_reales,
+       e.num_voluntarios AS voluntarios_guardados, calc.num_voluntarios AS voluntarios_reales
+FROM ({_ESTADISTICAS_CALCULADAS}
+) AS calc
+LEFT JOIN estadisticas_campana e ON e.campana_id = calc.campana_id
+WHERE (e.monto_recaudado, e.porcentaje_meta, e.num_donaciones, e.num_voluntarios)
+      IS DISTINCT FROM (calc.monto_recaudado, calc.porcentaje_meta, calc.num_donaciones, calc.num_voluntarios)
+ORDER BY abs(COALESCE(e.monto_recaudado, 0) - calc.monto_recaudado) DESC, calc.campana_id"""
+
+# Los datos sembrados traen ids explícitos y las secuencias SERIAL quedan en 1.
+# Un solo bloque pone cada secuencia del esquema (SERIAL o IDENTITY) en
+# MAX(id) + 1; nunca la retrocede, así no repite ids ya entregados a
+# transacciones en curso.
+RECONCILIAR_SECUENCIAS = """
+DO $$
+DECLARE
+    s record;
+BEGIN
+    FOR s IN
+        SELECT seq.oid::regclass AS secuencia, tab.oid::regclass AS tabla, col.attname AS columna
+        FROM pg_class seq
+        JOIN pg_depend dep ON dep.classid = 'pg_class'::regclass AND dep.objid = seq.oid
+                          AND dep.refclassid = 'pg_class'::regclass AND dep.deptype IN ('a', 'i')
+        JOIN pg_class tab ON tab.oid = dep.refobjid
+        JOIN pg_attribute col ON col.attrelid = tab.oid AND col.attnum = dep.refobjsubid
+        WHERE seq.relkind = 'S' AND tab.relnamespace = current_schema()::regnamespace
+    LOOP
+        -- is_called = false: el próximo nextval devuelve exactamente el valor fijado
+        EXECUTE format(
+            'SELECT setval(%L, GREATEST(COALESCE(MAX(%I), 0), '
+            '(SELECT CASE WHEN is_called THEN last_value ELSE last_value - 1 END FROM %s)) + 1, false) FROM %s',
+            s.secuencia, s.columna, s.secuencia, s.tabla);
+    END LOOP;
+END
+$$"""
+
+def construir_ddl() -> str:
+    """Texto de DDL.sql: tablas, índices, vista materializada y triggers"""
     engine = create_engine('postgresql://admin:admin_password@db:5432/reporteria_db')
     metadata = MetaData()
 
@@ -62,7 +360,9 @@ def generate_ddl():
         Column('fecha_fin', Date),
         Column('meta_monetaria', Numeric(12, 2), CheckConstraint('meta_monetaria > 0')),
         Column('estado', estado_campana, nullable=False, server_default=text("'planificada'")),
-        CheckConstraint('fecha_fin IS NULL OR fecha_fin >= fecha_inicio', name='chk_fechas')
+        CheckConstraint('fecha_fin IS NULL OR fecha_fin >= fecha_inicio', name='chk_fechas'),
+        Index('idx_campana_organizacion', 'organizacion_id'),
+        Index('idx_campana_fecha_inicio', 'fecha_inicio')
     )
 
     actividad = Table('actividad', metadata,
@@ -74,7 +374,8 @@ def generate_ddl():
         Column('fecha_inicio', TIMESTAMP, nullable=False),
         Column('fecha_fin', TIMESTAMP, nullable=False),
         Column('capacidad_max', Integer, CheckConstraint('capacidad_max > 0')),
-        CheckConstraint('fecha_fin > fecha_inicio', name='chk_fechas_actividad')
+        CheckConstraint('fecha_fin > fecha_inicio', name='chk_fechas_actividad'),
+        Index('idx_actividad_campana', 'campana_id')
     )
 
     donante = Table('donante', metadata,
@@ -96,7 +397,7 @@ def generate_ddl():
 
     preferencia_contacto = Table('preferencia_contacto', metadata,
         Column('preferencia_id', Integer, primary_key=True, autoincrement=True),
-        Column('donante_id', Integer, ForeignKey('donante.donante_id')),
+        Column('donante_id', Integer, ForeignKey('donante.donante_id', ondelete='CASCADE')),
         Column('tipo', tipo_contacto, nullable=False),
         Column('valor', String(100)),
         Column('permitido', Boolean, server_default=text('TRUE')),
@@ -108,7 +409,7 @@ def generate_ddl():
     donacion = Table('donacion', metadata,
         Column('donacion_id', Integer, primary_key=True, autoincrement=True),
         Column('donante_id', Integer, ForeignKey('donante.donante_id', ondelete='CASCADE', onupdate='CASCADE'), nullable=False),
-        Column('campana_id', Integer, ForeignKey('campana.campana_id'), nullable=False),
+        Column('campana_id', Integer, ForeignKey('campana.campana_id', ondelete='CASCADE'), nullable=False),
         Column('tipo', tipo_donacion, nullable=False),
         Column('monto', Numeric(12, 2), CheckConstraint('monto > 0')),
         Column('descripcion_especie', Text),
@@ -119,7 +420,11 @@ def generate_ddl():
             "(tipo = 'monetaria' AND monto IS NOT NULL AND descripcion_especie IS NULL) OR "
             "(tipo = 'especie' AND descripcion_especie IS NOT NULL)",
             name='chk_tipo_donacion'
-        )
+        ),
+        # Índices de cobertura: los reportes agregan monto sin tocar la tabla
+        Index('idx_donacion_campana', 'campana_id', postgresql_include=['monto']),
+        Index('idx_donacion_donante', 'donante_id', postgresql_include=['monto']),
+        Index('idx_donacion_fecha', 'fecha', postgresql_include=['campana_id', 'donante_id', 'monto'])
     )
 
     voluntario = Table('voluntario', metadata,
@@ -133,12 +438,13 @@ def generate_ddl():
         Column('fecha_registro', Date, nullable=False, server_default=text('CURRENT_DATE')),
         Column('activo', Boolean, server_default=text('TRUE')),
         CheckConstraint("fecha_nacimiento <= CURRENT_DATE - INTERVAL '16 years'", name='chk_edad'),
-        CheckConstraint("email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,}$'", name='chk_email_voluntario')
+        CheckConstraint("email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,}$'", name='chk_email_voluntario'),
+        Index('idx_voluntario_fecha_nacimiento', 'fecha_nacimiento', postgresql_include=['voluntario_id'])
     )
 
     disponibilidad_voluntario = Table('disponibilidad_voluntario', metadata,
         Column('disponibilidad_id', Integer, primary_key=True, autoincrement=True),
-        Column('voluntario_id', Integer, ForeignKey('voluntario.voluntario_id')),
+        Column('voluntario_id', Integer, ForeignKey('voluntario.voluntario_id', ondelete='CASCADE')),
         Column('dia', dia_semana, nullable=False),
         Column('hora_inicio', Time, nullable=False),
         Column('hora_fin', Time, nullable=False),
@@ -155,33 +461,38 @@ def generate_ddl():
 
     recurso = Table('recurso', metadata,
         Column('recurso_id', Integer, primary_key=True, autoincrement=True),
-        Column('campana_id', Integer, ForeignKey('campana.campana_id'), nullable=False),
+        Column('campana_id', Integer, ForeignKey('campana.campana_id', ondelete='CASCADE'), nullable=False),
         Column('nombre', String(100), nullable=False),
         Column('descripcion', Text),
         Column('cantidad_requerida', Integer, CheckConstraint('cantidad_requerida > 0'), nullable=False),
         Column('cantidad_actual', Integer, CheckConstraint('cantidad_actual >= 0'), nullable=False, server_default=text('0')),
-        Column('unidad_medida', String(20))
+        Column('unidad_medida', String(20)),
+        # El borrado en cascada desde campana busca los recursos por campana_id
+        Index('idx_recurso_campana', 'campana_id')
     )
 
     voluntario_actividad = Table('voluntario_actividad', metadata,
-        Column('voluntario_id', Integer, ForeignKey('voluntario.voluntario_id'), primary_key=True),
-        Column('actividad_id', Integer, ForeignKey('actividad.actividad_id'), primary_key=True),
+        Column('voluntario_id', Integer, ForeignKey('voluntario.voluntario_id', ondelete='CASCADE'), primary_key=True),
+        Column('actividad_id', Integer, ForeignKey('actividad.actividad_id', ondelete='CASCADE'), primary_key=True),
         Column('fecha_registro', TIMESTAMP, nullable=False, server_default=text('CURRENT_TIMESTAMP')),
         Column('horas_dedicadas', Numeric(5, 2), server_default=text('0')),
         Column('comentarios', Text),
-        Column('estado', String(20), server_default=text("'pendiente'"))
+        Column('estado', String(20), server_default=text("'pendiente'")),
+        # La PK (voluntario_id, actividad_id) no sirve para buscar por actividad
+        Index('idx_voluntario_actividad_actividad', 'actividad_id'),
+        Index('idx_voluntario_actividad_fecha', 'fecha_registro', postgresql_include=['actividad_id', 'voluntario_id'])
     )
 
     voluntario_habilidad = Table('voluntario_habilidad', metadata,
-        Column('voluntario_id', Integer, ForeignKey('voluntario.voluntario_id'), primary_key=True),
-        Column('habilidad_id', Integer, ForeignKey('habilidad.habilidad_id'), primary_key=True),
+        Column('voluntario_id', Integer, ForeignKey('voluntario.voluntario_id', ondelete='CASCADE'), primary_key=True),
+        Column('habilidad_id', Integer, ForeignKey('habilidad.habilidad_id', ondelete='CASCADE'), primary_key=True),
         Column('nivel', nivel_habilidad, nullable=False, server_default=text("'básico'")),
         Column('anios_experiencia', Integer, CheckConstraint('anios_experiencia >= 0')),
         Column('certificado', Boolean, server_default=text('FALSE'))
     )
 
     estadisticas_campana = Table('estadisticas_campana', metadata,
-        Column('campana_id', Integer, ForeignKey('campana.campana_id'), primary_key=True),
+        Column('campana_id', Integer, ForeignKey('campana.campana_id', ondelete='CASCADE'), primary_key=True),
         Column('monto_recaudado', Numeric(12, 2), server_default=text('0')),
         Column('porcentaje_meta', Numeric(5, 2), server_default=text('0')),
         Column('num_donaciones', Integer, server_default=text('0')),
@@ -189,6 +500,19 @@ def generate_ddl():
         Column('ultima_actualizacion', TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
     )
 
+    # Tabla derivada de donacion (la mantienen sus triggers): sin llaves foráneas,
+    # que chocarían con el borrado en cascada de donante -> donacion
+    donacion_diaria = Table('donacion_diaria', metadata,
+        Column('dia', Date, primary_key=True),
+        Column('campana_id', Integer, primary_key=True),
+        Column('donante_id', Integer, primary_key=True),
+        Column('tipo', tipo_donacion, primary_key=True),
+        Column('monto_total', Numeric(14, 2), nullable=False, server_default=text('0')),
+        Column('num_donaciones', Integer, nullable=False, server_default=text('0')),
+        Column('monto_min', Numeric(12, 2)),
+        Column('monto_max', Numeric(12, 2))
+    )
+
     # Generar el DDL
     ddl = []
     
@@ -220,98 +544,17 @@ def generate_ddl():
         # Agregar punto y coma al final
         create_table = create_table.rstrip() + ';'
         ddl.append(create_table)
-    
-    # Agregar triggers
-    triggers = [
-        """
---TRIGGERS
-CREATE OR REPLACE FUNCTION actualizar_estadisticas_donacion()
-RETURNS TRIGGER AS $$
-BEGIN
-    IF NEW.tipo = 'monetaria' THEN
-        UPDATE estadisticas_campana
-        SET monto_recaudado = monto_recaudado + NEW.monto,
-            num_donaciones = num_donaciones + 1,
-            porcentaje_meta = (
-                SELECT CASE WHEN meta_monetaria > 0 
-                       THEN ((monto_recaudado + NEW.monto) / meta_monetaria) * 100
-                       ELSE 0 
-                       END
-                FROM campana WHERE campana_id = NEW.campana_id
-            ),
-            ultima_actualizacion = CURRENT_TIMESTAMP
-        WHERE campana_id = NEW.campana_id;
-    ELSE
-        UPDATE estadisticas_campana
-        SET num_donaciones = num_donaciones + 1,
-            ultima_actualizacion = CURRENT_TIMESTAMP
-        WHERE campana_id = NEW.campana_id;
-    END IF;
-    
-    IF NOT FOUND THEN
-        INSERT INTO estadisticas_campana (
-            campana_id, 
-            monto_recaudado, 
-            porcentaje_meta,
-            num_donaciones
-        ) VALUES (
-            NEW.campana_id, 
-            CASE WHEN NEW.tipo = 'monetaria' THEN NEW.monto ELSE 0 END,
-            (
-                SELECT CASE WHEN meta_monetaria > 0 
-                       THEN (CASE WHEN NEW.tipo = 'monetaria' THEN NEW.monto ELSE 0 END / meta_monetaria) * 100
-                       ELSE 0 
-                       END
-                FROM campana WHERE campana_id = NEW.campana_id
-            ),
-            1
-        );
-    END IF;
-    
-    RETURN NEW;
-END;
-$$ LANGUAGE plpgsql;
 
-CREATE TRIGGER after_donacion_insert
-AFTER INSERT ON donacion
-FOR EACH ROW
-EXECUTE FUNCTION actualizar_estadisticas_donacion();""",
-        """
-CREATE OR REPLACE FUNCTION actualizar_estadisticas_voluntario()
-RETURNS TRIGGER AS $$
-BEGIN
-    UPDATE estadisticas_campana
-    SET num_voluntarios = (
-            SELECT COUNT(DISTINCT va.voluntario_id) 
-            FROM voluntario_actividad va
-            JOIN actividad a ON va.actividad_id = a.actividad_id
-            WHERE a.campana_id = (
-                SELECT campana_id FROM actividad WHERE actividad_id = NEW.actividad_id
-            )
-        ),
-        ultima_actualizacion = CURRENT_TIMESTAMP
-    WHERE campana_id = (
-        SELECT campana_id FROM actividad WHERE actividad_id = NEW.actividad_id
-    );
-    
-    IF NOT FOUND THEN
-        INSERT INTO estadisticas_campana (
-            campana_id,
-            num_voluntarios
-        ) VALUES (
-            (SELECT campana_id FROM actividad WHERE actividad_id = NEW.actividad_id),
-            1
-        );
-    END IF;
-    
-    RETURN NEW;
-END;
-$$ LANGUAGE plpgsql;
+    # Índices secundarios (los reportes filtran y agrupan por estas columnas)
+    ddl.append("\n--indices")
+    for table in metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            ddl.append(str(CreateIndex(index).compile(engine)).strip() + ';')
 
-CREATE TRIGGER after_voluntario_actividad_insert
-AFTER INSERT ON voluntario_actividad
-FOR EACH ROW
-EXECUTE FUNCTION actualizar_estadisticas_voluntario();""",
+    ddl.append(VISTA_DONACIONES_CAMPANA)
+    
+    # Agregar triggers
+    triggers = TRIGGERS_ESTADISTICAS + TRIGGERS_DONACION_DIARIA + [
         """
 CREATE OR REPLACE FUNCTION actualizar_estado_campana()
 RETURNS TRIGGER AS $$
@@ -338,13 +581,14 @@ EXECUTE FUNCTION actualizar_estado_campana();"""
     ]
     
     ddl.extend(triggers)
-    
+    return '-- DDL generado automáticamente\n' + ''.join(l + '\n' for l in ddl)
+
+
+def generate_ddl():
     # Escribir a archivo
     os.makedirs("/database", exist_ok=True)
     with open("/database/DDL.sql", "w", encoding="utf-8") as f:
-        f.write('-- DDL generado automáticamente\n')
-        for l in ddl:
-            f.write(l + '\n')
+        f.write(construir_ddl())
     print('Archivo DDL.sql generado en /database/DDL.sql')
 
 if __name__ == '__main__':
@@ -0,0 +1,47 @@
+# db/reconciliar_estadisticas.py
+# Recalcula estadisticas_campana desde donacion y voluntario_actividad con
+# sentencias de conjunto e informa las campañas cuyos contadores se habían desviado.
+# Uso (desde app/): python -m db.reconciliar_estadisticas [--solo-reportar] [--mostrar 10]
+import argparse
+import time
+from db.connection import get_engine
+from db.ddl import RECALCULAR_ESTADISTICAS, DESVIACIONES_ESTADISTICAS
+
+
+def reconciliar_estadisticas(aplicar: bool = True, mostrar: int = 10) -> dict:
+    """Devuelve {'desviadas', 'corregidas', 'muestra', 'duracion'}; con aplicar=False no escribe."""
+    inicio = time.perf_counter()
+    with get_engine().begin() as conn:
+        if aplicar:
+            # Bloquea a los triggers (ROW EXCLUSIVE) mientras se recalcula: una
+            # donación confirmada a mitad del recálculo quedaría contada a medias
+            conn.exec_driver_sql("LOCK TABLE estadisticas_campana IN SHARE ROW EXCLUSIVE MODE")
+        desviaciones = conn.exec_driver_sql(DESVIACIONES_ESTADISTICAS).mappings().all()
+        corregidas = conn.exec_driver_sql(RECALCULAR_ESTADISTICAS).rowcount if aplicar else 0
+    return {
+        "desviadas": len(desviaciones),
+        "corregidas": corregidas,
+        "muestra": [dict(fila) for fila in desviaciones[:mostrar]],
+        "duracion": time.perf_counter() - inicio,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--solo-reportar", action="store_true", help="informar la desviación sin corregirla")
+    parser.add_argument("--mostrar", type=int, default=10, help="campañas desviadas a listar")
+    args = parser.parse_args()
+
+    resultado = reconciliar_estadisticas(aplicar=not args.solo_reportar, mostrar=args.mostrar)
+    print(f"Campañas con contadores desviados: {resultado['desviadas']}")
+    for fila in resultado["muestra"]:
+        print(f"  campaña {fila['campana_id']}: monto {fila['monto_guardado']} -> {fila['monto_real']}, "
+              f"donaciones {fila['donaciones_guardadas']} -> {fila['donaciones_reales']}, "
+              f"voluntarios {fila['voluntarios_guardados']} -> {fila['voluntarios_reales']}")
+    if not args.solo_reportar:
+        print(f"Filas corregidas: {resultado['corregidas']}")
+    print(f"Duración: {resultado['duracion']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
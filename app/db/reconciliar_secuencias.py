@@ -0,0 +1,47 @@
+# db/reconciliar_secuencias.py
+# Pone cada secuencia SERIAL en MAX(id) + 1 con un solo bloque (ver
+# RECONCILIAR_SECUENCIAS en db/ddl.py). Registros.sql ya lo hace al final de la
+# carga; la app lo ejecuta una vez al arrancar por si la BD se sembró o
+# restauró por otro camino.
+# Uso (desde app/): python -m db.reconciliar_secuencias
+import logging
+import threading
+import time
+from db.connection import get_engine
+from db.ddl import RECONCILIAR_SECUENCIAS
+
+logger = logging.getLogger(__name__)
+
+_reconciliadas = False
+_reconciliar_lock = threading.Lock()
+
+
+def reconciliar_secuencias() -> float:
+    """Devuelve la duración en segundos."""
+    inicio = time.perf_counter()
+    with get_engine().begin() as conn:
+        # Sin parámetros: el bloque usa % de format() y el driver no debe interpretarlos
+        conn.exec_driver_sql(RECONCILIAR_SECUENCIAS, execution_options={"no_parameters": True})
+    return time.perf_counter() - inicio
+
+
+def reconciliar_secuencias_al_iniciar():
+    """Una vez por proceso; las ejecuciones siguientes del script no van a la BD."""
+    global _reconciliadas
+    if _reconciliadas:
+        return
+    with _reconciliar_lock:
+        if _reconciliadas:
+            return
+        try:
+            duracion = reconciliar_secuencias()
+        except Exception:
+            # Sin reconciliar, un create_* puede fallar con llave duplicada; se reintenta en la próxima ejecución
+            logger.exception("No se pudieron reconciliar las secuencias")
+            return
+        _reconciliadas = True
+        logger.info("Secuencias reconciliadas en %.3fs", duracion)
+
+
+if __name__ == "__main__":
+    print(f"Secuencias reconciliadas en {reconciliar_secuencias():.2f}s")
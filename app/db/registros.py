@@ -4,7 +4,18 @@ from datetime import datetime, timedelta
 from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Text, Boolean, Date, Time, Numeric, TIMESTAMP, Enum, ForeignKey
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
+import argparse
+import io
+import multiprocessing
 import os
+import time
+import zlib
+from functools import partial
+try:
+    from db.ddl import RECALCULAR_ESTADISTICAS, RECONCILIAR_SECUENCIAS
+except ImportError:
+    # Ejecutado como script (python db/registros.py): ddl.py es un módulo hermano
+    from ddl import RECALCULAR_ESTADISTICAS, RECONCILIAR_SECUENCIAS
 
 # Configuración inicial
 fake = Faker('es_ES')
@@ -58,244 +69,384 @@ class Campana(Base):
     categoria_id = Column(Integer)
     sede_principal_id = Column(Integer)
 
-# --- Función para generar INSERTs desde modelos ORM ---
-def generar_inserts_sql():
-    inserts = []
-    total_registros = 0
-    # Organizaciones
-    org_ids = []
-    num_orgs = random.randint(20, 30)
-    for i in range(1, num_orgs+1):
+# Orden de escritura según dependencias de llaves foráneas
+ORDEN_TABLAS = [
+    'organizacion', 'categoria', 'sede', 'campana', 'donante', 'voluntario', 'donacion',
+    'habilidad', 'recurso', 'actividad', 'voluntario_actividad', 'voluntario_habilidad',
+    'disponibilidad_voluntario', 'preferencia_contacto',
+]
+# estadisticas_campana no se genera: la llenan los triggers durante la carga y
+# al final se recalcula con RECALCULAR_ESTADISTICAS (también cubre campañas sin donaciones)
+
+
+def _valor_copy(valor) -> str:
+    """Valor en formato texto de COPY: \\N para NULL y escapes para \\, tab y saltos de línea"""
+    if valor is None:
+        return '\\N'
+    if isinstance(valor, bool):
+        return 't' if valor else 'f'
+    texto = str(valor)
+    return (texto.replace('\\', '\\\\').replace('\t', '\\t')
+                 .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def _valor_sql(valor) -> str:
+    if valor is None:
+        return 'NULL'
+    if isinstance(valor, bool):
+        return 'TRUE' if valor else 'FALSE'
+    if isinstance(valor, (int, float)):
+        return str(valor)
+    return "'" + str(valor).replace("'", "''") + "'"
+
+
+def _linea_copy(fila) -> str:
+    return '\t'.join(_valor_copy(v) for v in fila) + '\n'
+
+
+def escribir_inserts(f, tabla: str, columnas: list, filas: list, sufijo: str = ''):
+    for fila in filas:
+        f.write(f"INSERT INTO {tabla} ({', '.join(columnas)}) VALUES ({', '.join(_valor_sql(v) for v in fila)}){sufijo};\n")
+
+
+# --- Generación de registros a partir de modelos ORM ---
+# Cada tabla se genera en shards de tamaño fijo y cada shard usa su propia
+# semilla derivada de (SEMILLA, tabla, shard): el archivo resultante es el mismo
+# sin importar cuántos procesos participen.
+SEMILLA = 42
+FILAS_POR_SHARD = int(os.getenv('REGISTROS_FILAS_POR_SHARD', '5000'))
+
+CATEGORIAS = ['Medio Ambiente', 'Educación', 'Salud', 'Animales', 'Derechos Humanos', 'Arte y Cultura', 'Desarrollo Comunitario']
+HABILIDADES = ['Liderazgo', 'Comunicación', 'Organización', 'Trabajo en equipo', 'Gestión de proyectos', 'Creatividad', 'Resolución de problemas', 'Empatía', 'Negociación', 'Planificación', 'Análisis', 'Adaptabilidad']
+DIAS_SEMANA = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+TIPOS_CONTACTO = ['email', 'teléfono', 'correo', 'sms', 'whatsapp']
+# Marcas de tiempo relativas a la medianoche de hoy y no a 'now': cada proceso
+# arranca en un instante distinto y el resultado no sería reproducible
+_AHORA = datetime.combine(datetime.today().date(), datetime.min.time())
+
+COLUMNAS = {
+    'organizacion': ['organizacion_id', 'nombre', 'descripcion', 'email', 'telefono', 'direccion', 'sitio_web', 'fecha_registro', 'activa'],
+    'categoria': ['categoria_id', 'nombre', 'descripcion'],
+    'sede': ['sede_id', 'nombre', 'direccion', 'ciudad', 'region', 'codigo_postal', 'telefono', 'email', 'horario_apertura', 'horario_cierre'],
+    'campana': ['campana_id', 'nombre', 'descripcion', 'fecha_inicio', 'fecha_fin', 'meta_monetaria', 'estado', 'organizacion_id', 'categoria_id', 'sede_principal_id'],
+    'donante': ['donante_id', 'tipo', 'nombre', 'apellido', 'empresa', 'email'],
+    'voluntario': ['voluntario_id', 'nombre', 'apellido', 'email', 'fecha_nacimiento'],
+    'donacion': ['donacion_id', 'campana_id', 'donante_id', 'tipo', 'monto', 'descripcion_especie', 'fecha'],
+    'habilidad': ['habilidad_id', 'nombre'],
+    'recurso': ['recurso_id', 'campana_id', 'nombre', 'descripcion', 'cantidad_requerida', 'cantidad_actual', 'unidad_medida'],
+    'actividad': ['actividad_id', 'campana_id', 'nombre', 'sede_id', 'fecha_inicio', 'fecha_fin'],
+    'voluntario_actividad': ['voluntario_id', 'actividad_id', 'fecha_registro'],
+    'voluntario_habilidad': ['voluntario_id', 'habilidad_id'],
+    'disponibilidad_voluntario': ['disponibilidad_id', 'voluntario_id', 'dia', 'hora_inicio', 'hora_fin'],
+    'preferencia_contacto': ['preferencia_id', 'donante_id', 'tipo', 'valor', 'permitido', 'prioridad', 'fecha_creacion'],
+}
+
+
+def _semilla_shard(tabla: str, shard) -> int:
+    # crc32 y no hash(): el hash de un str cambia entre procesos (PYTHONHASHSEED)
+    return zlib.crc32(f"{SEMILLA}:{tabla}:{shard}".encode('utf-8'))
+
+
+def _email_unico(email: str, n: int) -> str:
+    # Con escalas grandes Faker repite correos; el id garantiza la restricción UNIQUE
+    local, dominio = email.split('@', 1)
+    return f"{local}.{n}@{dominio}"
+
+
+def _escalar(rng, minimo: int, maximo: int, escala: float) -> int:
+    return max(1, round(rng.randint(minimo, maximo) * escala))
+
+
+# Generadores por tabla: reciben el generador aleatorio y el Faker del shard y
+# devuelven las filas de un rango de ids (o de padres) como tuplas.
+def _filas_organizacion(rng, fake, inicio, fin):
+    filas = []
+    for i in range(inicio, fin):
         org = Organizacion(
             nombre=fake.company(),
             descripcion=fake.paragraph(),
-            email=fake.company_email(),
+            email=_email_unico(fake.company_email(), i),
             telefono=fake.phone_number(),
             direccion=fake.address().replace('\n', ', '),
             sitio_web=fake.url(),
             fecha_registro=fake.date_between(start_date='-5y', end_date='today'),
-            activa=random.choice([True, False])
-        )
-        inserts.append(
-            f"INSERT INTO organizacion (organizacion_id, nombre, descripcion, email, telefono, direccion, sitio_web, fecha_registro, activa) "
-            f"VALUES ({i}, '{org.nombre}', '{org.descripcion}', '{org.email}', '{org.telefono}', "
-            f"'{org.direccion}', '{org.sitio_web}', '{org.fecha_registro}', {org.activa});"
+            activa=rng.choice([True, False])
         )
-        org_ids.append(i)
-        total_registros += 1
-    # Categorías (garantizar unicidad)
-    cat_ids = []
-    categorias = ['Medio Ambiente', 'Educación', 'Salud', 'Animales', 'Derechos Humanos', 'Arte y Cultura', 'Desarrollo Comunitario']
-    random.shuffle(categorias)
-    num_cats = min(random.randint(7, 10), len(categorias))
-    categorias_unicas = categorias[:num_cats]
-    for j, cat in enumerate(categorias_unicas, 1):
-        inserts.append(f"INSERT INTO categoria (categoria_id, nombre, descripcion) VALUES ({j}, '{cat}', '{fake.sentence()}');")
-        cat_ids.append(j)
-        total_registros += 1
-    # Sedes (5-10 por organización)
-    sede_ids = []
-    sede_id_counter = 1
-    for org_id in org_ids:
-        for _ in range(random.randint(5, 10)):
-            nombre = fake.company() + " Sede"
-            direccion = fake.address().replace('\n', ', ')
-            ciudad = fake.city()
-            region = fake.state()
-            codigo_postal = fake.postcode()
-            telefono = fake.phone_number()
-            email = fake.company_email()
-            horario_apertura = '08:00:00'
-            horario_cierre = '17:00:00'
-            inserts.append(
-                f"INSERT INTO sede (sede_id, nombre, direccion, ciudad, region, codigo_postal, telefono, email, horario_apertura, horario_cierre) "
-                f"VALUES ({sede_id_counter}, '{nombre}', '{direccion}', '{ciudad}', '{region}', '{codigo_postal}', '{telefono}', '{email}', '{horario_apertura}', '{horario_cierre}');"
-            )
-            sede_ids.append(sede_id_counter)
-            sede_id_counter += 1
-            total_registros += 1
-    # Campañas (10-20 por organización)
-    campana_id_counter = 1
-    for org_id in org_ids:
-        for _ in range(random.randint(10, 20)):
-            nombre = fake.catch_phrase()
-            descripcion = fake.paragraph()
+        filas.append((i, org.nombre, org.descripcion, org.email, org.telefono, org.direccion, org.sitio_web, org.fecha_registro, org.activa))
+    return filas
+
+
+def _filas_categoria(rng, fake, num_categorias):
+    categorias = list(CATEGORIAS)
+    rng.shuffle(categorias)
+    return [(j, cat, fake.sentence()) for j, cat in enumerate(categorias[:num_categorias], 1)]
+
+
+def _filas_sede(rng, fake, inicio, fin):
+    filas = []
+    for sede_id in range(inicio, fin):
+        filas.append((sede_id, fake.company() + " Sede", fake.address().replace('\n', ', '), fake.city(), fake.state(),
+                      fake.postcode(), fake.phone_number(), fake.company_email(), '08:00:00', '17:00:00'))
+    return filas
+
+
+def _filas_campana(rng, fake, primer_padre, conteos, primer_id, num_categorias, num_sedes):
+    filas = []
+    campana_id = primer_id
+    for org_id, n in enumerate(conteos, primer_padre):
+        for _ in range(n):
             fecha_inicio = fake.date_between(start_date='-3y', end_date='today')
-            fecha_fin = fecha_inicio + timedelta(days=random.randint(30, 180))
-            meta_monetaria = random.randint(1000, 10000)
-            estado = random.choice(['planificada', 'activa', 'pausada', 'finalizada'])
-            categoria_id = random.choice(cat_ids)
-            sede_principal_id = random.choice(sede_ids)
-            inserts.append(
-                f"INSERT INTO campana (campana_id, nombre, descripcion, fecha_inicio, fecha_fin, meta_monetaria, estado, organizacion_id, categoria_id, sede_principal_id) "
-                f"VALUES ({campana_id_counter}, '{nombre}', '{descripcion}', '{fecha_inicio}', '{fecha_fin}', {meta_monetaria}, '{estado}', {org_id}, {categoria_id}, {sede_principal_id});"
-            )
-            campana_id_counter += 1
-            total_registros += 1
-    # Donantes (200-300 individuales, 80-120 empresas)
-    donante_id_counter = 1
-    for _ in range(random.randint(200, 300)):
-        nombre = fake.first_name()
-        apellido = fake.last_name()
-        email = fake.email()
-        tipo = 'individual'
-        inserts.append(
-            f"INSERT INTO donante (donante_id, tipo, nombre, apellido, email) VALUES ({donante_id_counter}, '{tipo}', '{nombre}', '{apellido}', '{email}');"
-        )
-        donante_id_counter += 1
-        total_registros += 1
-    for _ in range(random.randint(80, 120)):
-        empresa = fake.company()
-        email = fake.company_email()
-        tipo = 'empresa'
-        inserts.append(
-            f"INSERT INTO donante (donante_id, tipo, empresa, email) VALUES ({donante_id_counter}, '{tipo}', '{empresa}', '{email}');"
-        )
-        donante_id_counter += 1
-        total_registros += 1
-    # Voluntarios (200-300)
-    voluntario_id_counter = 1
-    for _ in range(random.randint(200, 300)):
-        nombre = fake.first_name()
-        apellido = fake.last_name()
-        email = fake.email()
-        fecha_nacimiento = fake.date_of_birth(minimum_age=18, maximum_age=65)
-        inserts.append(
-            f"INSERT INTO voluntario (voluntario_id, nombre, apellido, email, fecha_nacimiento) VALUES ({voluntario_id_counter}, '{nombre}', '{apellido}', '{email}', '{fecha_nacimiento}');"
-        )
-        voluntario_id_counter += 1
-        total_registros += 1
-    # Donaciones (600-900)
-    donacion_id_counter = 1
-    for _ in range(random.randint(600, 900)):
-        campana_id = random.randint(1, campana_id_counter-1)
-        donante_id = random.randint(1, donante_id_counter-1)
-        tipo = random.choice(['monetaria', 'especie'])
+            fecha_fin = fecha_inicio + timedelta(days=rng.randint(30, 180))
+            filas.append((campana_id, fake.catch_phrase(), fake.paragraph(), fecha_inicio, fecha_fin,
+                          rng.randint(1000, 10000), rng.choice(['planificada', 'activa', 'pausada', 'finalizada']),
+                          org_id, rng.randint(1, num_categorias), rng.randint(1, num_sedes)))
+            campana_id += 1
+    return filas
+
+
+def _filas_donante(rng, fake, inicio, fin, num_individuales):
+    # Los primeros num_individuales ids son personas y el resto empresas
+    filas = []
+    for donante_id in range(inicio, fin):
+        if donante_id <= num_individuales:
+            filas.append((donante_id, 'individual', fake.first_name(), fake.last_name(), None,
+                          _email_unico(fake.email(), donante_id)))
+        else:
+            filas.append((donante_id, 'empresa', None, None, fake.company(),
+                          _email_unico(fake.company_email(), donante_id)))
+    return filas
+
+
+def _filas_voluntario(rng, fake, inicio, fin):
+    return [
+        (voluntario_id, fake.first_name(), fake.last_name(), _email_unico(fake.email(), voluntario_id),
+         fake.date_of_birth(minimum_age=18, maximum_age=65))
+        for voluntario_id in range(inicio, fin)
+    ]
+
+
+def _filas_donacion(rng, fake, inicio, fin, num_campanas, num_donantes):
+    filas = []
+    for donacion_id in range(inicio, fin):
+        campana_id = rng.randint(1, num_campanas)
+        donante_id = rng.randint(1, num_donantes)
+        tipo = rng.choice(['monetaria', 'especie'])
         if tipo == 'monetaria':
-            monto = round(random.uniform(10, 1000), 2)
-            descripcion_especie = 'NULL'
+            monto = round(rng.uniform(10, 1000), 2)
+            descripcion_especie = None
         else:
-            monto = 'NULL'
-            desc = f"{fake.word().capitalize()} {fake.word()} {fake.word()}".replace("'", "''")
-            descripcion_especie = f"'{desc}'"
+            monto = None
+            descripcion_especie = f"{fake.word().capitalize()} {fake.word()} {fake.word()}"
         fecha = fake.date_between(start_date='-2y', end_date='today')
-        # Asegurar que el campo tipo siempre esté presente en el insert
-        inserts.append(
-            f"INSERT INTO donacion (donacion_id, campana_id, donante_id, tipo, monto, descripcion_especie, fecha) VALUES ({donacion_id_counter}, {campana_id}, {donante_id}, '{tipo}', {monto}, {descripcion_especie}, '{fecha}');"
-        )
-        donacion_id_counter += 1
-        total_registros += 1
-    # Habilidad (10-20)
-    habilidad_id_counter = 1
-    habilidades = ['Liderazgo', 'Comunicación', 'Organización', 'Trabajo en equipo', 'Gestión de proyectos', 'Creatividad', 'Resolución de problemas', 'Empatía', 'Negociación', 'Planificación', 'Análisis', 'Adaptabilidad']
-    for nombre in habilidades[:random.randint(10, 12)]:
-        inserts.append(
-            f"INSERT INTO habilidad (habilidad_id, nombre) VALUES ({habilidad_id_counter}, '{nombre}');"
-        )
-        habilidad_id_counter += 1
-        total_registros += 1
-    # Recurso (100-200)
-    recurso_id_counter = 1
-    for _ in range(random.randint(100, 200)):
-        campana_id = random.randint(1, campana_id_counter-1)
-        nombre = fake.word().capitalize()
-        descripcion = fake.sentence()
-        cantidad_requerida = random.randint(1, 100)
-        cantidad_actual = random.randint(0, cantidad_requerida)
-        unidad_medida = random.choice(['unidades', 'kg', 'litros', 'paquetes', 'cajas'])
-        inserts.append(
-            f"INSERT INTO recurso (recurso_id, campana_id, nombre, descripcion, cantidad_requerida, cantidad_actual, unidad_medida) "
-            f"VALUES ({recurso_id_counter}, {campana_id}, '{nombre}', '{descripcion}', {cantidad_requerida}, {cantidad_actual}, '{unidad_medida}');"
-        )
-        recurso_id_counter += 1
-        total_registros += 1
-    # Actividad (200-400)
-    actividad_id_counter = 1
-    for campana_id in range(1, campana_id_counter):
-        for _ in range(random.randint(2, 4)):
-            nombre = fake.bs().capitalize()
-            sede_id = random.choice(sede_ids)
+        filas.append((donacion_id, campana_id, donante_id, tipo, monto, descripcion_especie, fecha))
+    return filas
+
+
+def _filas_habilidad(rng, fake, num_habilidades):
+    return [(i, nombre) for i, nombre in enumerate(HABILIDADES[:num_habilidades], 1)]
+
+
+def _filas_recurso(rng, fake, inicio, fin, num_campanas):
+    filas = []
+    for recurso_id in range(inicio, fin):
+        cantidad_requerida = rng.randint(1, 100)
+        filas.append((recurso_id, rng.randint(1, num_campanas), fake.word().capitalize(), fake.sentence(),
+                      cantidad_requerida, rng.randint(0, cantidad_requerida),
+                      rng.choice(['unidades', 'kg', 'litros', 'paquetes', 'cajas'])))
+    return filas
+
+
+def _filas_actividad(rng, fake, primer_padre, conteos, primer_id, num_sedes):
+    filas = []
+    actividad_id = primer_id
+    for campana_id, n in enumerate(conteos, primer_padre):
+        for _ in range(n):
             fecha_inicio = fake.date_between(start_date='-2y', end_date='today')
-            fecha_fin = fecha_inicio + timedelta(days=random.randint(1, 10))
-            inserts.append(
-                f"INSERT INTO actividad (actividad_id, campana_id, nombre, sede_id, fecha_inicio, fecha_fin) VALUES ({actividad_id_counter}, {campana_id}, '{nombre}', {sede_id}, '{fecha_inicio}', '{fecha_fin}');"
-            )
-            actividad_id_counter += 1
-            total_registros += 1
-    # Voluntario_Actividad (300-600)
-    for voluntario_id in range(1, voluntario_id_counter):
-        for _ in range(random.randint(1, 2)):
-            actividad_id = random.randint(1, actividad_id_counter-1)
-            inserts.append(
-                f"INSERT INTO voluntario_actividad (voluntario_id, actividad_id) VALUES ({voluntario_id}, {actividad_id});"
-            )
-            total_registros += 1
-    # Voluntario_Habilidad (300-600)
-    for voluntario_id in range(1, voluntario_id_counter):
-        habilidades_asignadas = random.sample(range(1, habilidad_id_counter), random.randint(1, 2))
-        for habilidad_id in habilidades_asignadas:
-            inserts.append(
-                f"INSERT INTO voluntario_habilidad (voluntario_id, habilidad_id) VALUES ({voluntario_id}, {habilidad_id});"
-            )
-            total_registros += 1
-    # Disponibilidad_Voluntario (300-600)
-    disponibilidad_id_counter = 1
-    dias_semana = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
-    for voluntario_id in range(1, voluntario_id_counter):
-        for _ in range(random.randint(1, 2)):
-            dia = random.choice(dias_semana)
-            hora_inicio = f"{random.randint(7, 12)}:00:00"
-            hora_fin = f"{random.randint(13, 20)}:00:00"
-            inserts.append(
-                f"INSERT INTO disponibilidad_voluntario (disponibilidad_id, voluntario_id, dia, hora_inicio, hora_fin) VALUES ({disponibilidad_id_counter}, {voluntario_id}, '{dia}', '{hora_inicio}', '{hora_fin}');"
-            )
-            disponibilidad_id_counter += 1
-            total_registros += 1
-    # Preferencia_Contacto (200-400)
-    preferencia_id_counter = 1
-    tipos_contacto = ['email', 'teléfono', 'correo', 'sms', 'whatsapp']
-    for donante_id in range(1, donante_id_counter):
-        tipo = random.choice(tipos_contacto)
+            fecha_fin = fecha_inicio + timedelta(days=rng.randint(1, 10))
+            filas.append((actividad_id, campana_id, fake.bs().capitalize(), rng.randint(1, num_sedes), fecha_inicio, fecha_fin))
+            actividad_id += 1
+    return filas
+
+
+def _filas_voluntario_actividad(rng, fake, inicio, fin, num_actividades):
+    # Sin repetir actividad: (voluntario_id, actividad_id) es la llave primaria.
+    # fecha_registro repartida en dos años para que los filtros por fecha sean selectivos
+    return [
+        (voluntario_id, actividad_id, fake.date_time_between(start_date=_AHORA - timedelta(days=730), end_date=_AHORA))
+        for voluntario_id in range(inicio, fin)
+        for actividad_id in rng.sample(range(1, num_actividades + 1), min(rng.randint(1, 2), num_actividades))
+    ]
+
+
+def _filas_voluntario_habilidad(rng, fake, inicio, fin, num_habilidades):
+    return [
+        (voluntario_id, habilidad_id)
+        for voluntario_id in range(inicio, fin)
+        for habilidad_id in rng.sample(range(1, num_habilidades + 1), rng.randint(1, 2))
+    ]
+
+
+def _filas_disponibilidad_voluntario(rng, fake, primer_padre, conteos, primer_id):
+    filas = []
+    disponibilidad_id = primer_id
+    for voluntario_id, n in enumerate(conteos, primer_padre):
+        # Días distintos: dos franjas del mismo voluntario no chocan en uq_disponibilidad
+        for dia in rng.sample(DIAS_SEMANA, n):
+            filas.append((disponibilidad_id, voluntario_id, dia,
+                          f"{rng.randint(7, 12)}:00:00", f"{rng.randint(13, 20)}:00:00"))
+            disponibilidad_id += 1
+    return filas
+
+
+def _filas_preferencia_contacto(rng, fake, inicio, fin):
+    # Una preferencia por donante: preferencia_id coincide con donante_id
+    filas = []
+    for donante_id in range(inicio, fin):
+        tipo = rng.choice(TIPOS_CONTACTO)
         valor = fake.phone_number() if tipo != 'email' else fake.email()
-        permitido = random.choice([True, False])
-        prioridad = random.randint(1, 3)
-        fecha_creacion = fake.date_time_between(start_date='-2y', end_date='now')
-        inserts.append(
-            f"INSERT INTO preferencia_contacto (preferencia_id, donante_id, tipo, valor, permitido, prioridad, fecha_creacion) "
-            f"VALUES ({preferencia_id_counter}, {donante_id}, '{tipo}', '{valor}', {permitido}, {prioridad}, '{fecha_creacion}');"
-        )
-        preferencia_id_counter += 1
-        total_registros += 1
-    # Estadisticas_Campana (1 por campaña)
-    estadisticas_insertadas = set()  # Conjunto para rastrear campañas ya procesadas
-
-    for campana_id in range(1, campana_id_counter):
-        if campana_id not in estadisticas_insertadas:  # Solo insertar si no existe
-            num_donaciones = random.randint(0, 100)
-            monto_recaudado = round(random.uniform(0, 10000), 2)
-            porcentaje_meta = round(random.uniform(0, 100), 2)
-            num_voluntarios = random.randint(0, 50)
-            ultima_actualizacion = fake.date_time_between(start_date='-2y', end_date='now')
-            
-            inserts.append(
-                f"INSERT INTO estadisticas_campana (campana_id, monto_recaudado, porcentaje_meta, num_donaciones, num_voluntarios, ultima_actualizacion) "
-                f"VALUES ({campana_id}, {monto_recaudado}, {porcentaje_meta}, {num_donaciones}, {num_voluntarios}, '{ultima_actualizacion}') "
-                f"ON CONFLICT (campana_id) DO NOTHING;"
-            )
-            estadisticas_insertadas.add(campana_id)
-            total_registros += 1
-    
-    # Escribir archivo de registros en <project_root>/database/Registros.sql
-    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
-    database_dir = os.path.join(project_root, "database")
-    os.makedirs(database_dir, exist_ok=True)      # sólo crea la carpeta
-    file_path = os.path.join(database_dir, "Registros.sql")
-
-    # ahora sí abrimos el archivo para escribir
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write("-- Datos generados automáticamente con ORM (sin conexión a BD)\n")
-        f.write("\n".join(inserts))
-    print(f"Archivo Registros.sql generado con {len(inserts)} INSERTs y {total_registros} registros distribuidos.")
+        filas.append((donante_id, donante_id, tipo, valor, rng.choice([True, False]), rng.randint(1, 3),
+                      fake.date_time_between(start_date=_AHORA - timedelta(days=730), end_date=_AHORA)))
+    return filas
+
+
+_GENERADORES = {tabla: globals()[f"_filas_{tabla}"] for tabla in ORDEN_TABLAS}
+
+
+def _rangos(tabla: str, total: int, **params):
+    """Shards de ids consecutivos [inicio, fin) de FILAS_POR_SHARD filas"""
+    for shard, inicio in enumerate(range(1, total + 1, FILAS_POR_SHARD)):
+        yield (tabla, shard, dict(params, inicio=inicio, fin=min(inicio + FILAS_POR_SHARD, total + 1)))
+
+
+def _rangos_por_padre(tabla: str, conteos: list, **params):
+    """Shards de padres completos cuyos hijos suman ~FILAS_POR_SHARD filas; los ids de los hijos siguen el orden de los padres"""
+    shard = 0
+    primer_padre = 1
+    primer_id = 1
+    acumulado = 0
+    for i, n in enumerate(conteos):
+        acumulado += n
+        if acumulado >= FILAS_POR_SHARD or i == len(conteos) - 1:
+            yield (tabla, shard, dict(params, primer_padre=primer_padre, conteos=conteos[primer_padre - 1:i + 1], primer_id=primer_id))
+            shard += 1
+            primer_padre = i + 2
+            primer_id += acumulado
+            acumulado = 0
+
+
+def planificar(escala: float = 1.0):
+    """Tamaños de cada tabla y lista de shards. Sólo depende de la escala, no del número de procesos."""
+    rng = random.Random(_semilla_shard('plan', 0))
+    num_orgs = _escalar(rng, 20, 30, escala)
+    # Categorías y habilidades tienen nombre único: su número no crece con la escala
+    num_categorias = min(rng.randint(7, 10), len(CATEGORIAS))
+    num_sedes = sum(rng.randint(5, 10) for _ in range(num_orgs))
+    campanas_por_org = [rng.randint(10, 20) for _ in range(num_orgs)]
+    num_campanas = sum(campanas_por_org)
+    num_individuales = _escalar(rng, 200, 300, escala)
+    num_donantes = num_individuales + _escalar(rng, 80, 120, escala)
+    num_voluntarios = _escalar(rng, 200, 300, escala)
+    num_donaciones = _escalar(rng, 600, 900, escala)
+    num_habilidades = min(rng.randint(10, 12), len(HABILIDADES))
+    num_recursos = _escalar(rng, 100, 200, escala)
+    actividades_por_campana = [rng.randint(2, 4) for _ in range(num_campanas)]
+    num_actividades = sum(actividades_por_campana)
+    disponibilidades_por_voluntario = [rng.randint(1, 2) for _ in range(num_voluntarios)]
+
+    tareas = []
+    tareas += _rangos('organizacion', num_orgs)
+    tareas.append(('categoria', 0, {'num_categorias': num_categorias}))
+    tareas += _rangos('sede', num_sedes)
+    tareas += _rangos_por_padre('campana', campanas_por_org, num_categorias=num_categorias, num_sedes=num_sedes)
+    tareas += _rangos('donante', num_donantes, num_individuales=num_individuales)
+    tareas += _rangos('voluntario', num_voluntarios)
+    tareas += _rangos('donacion', num_donaciones, num_campanas=num_campanas, num_donantes=num_donantes)
+    tareas.append(('habilidad', 0, {'num_habilidades': num_habilidades}))
+    tareas += _rangos('recurso', num_recursos, num_campanas=num_campanas)
+    tareas += _rangos_por_padre('actividad', actividades_por_campana, num_sedes=num_sedes)
+    tareas += _rangos('voluntario_actividad', num_voluntarios, num_actividades=num_actividades)
+    tareas += _rangos('voluntario_habilidad', num_voluntarios, num_habilidades=num_habilidades)
+    tareas += _rangos_por_padre('disponibilidad_voluntario', disponibilidades_por_voluntario)
+    tareas += _rangos('preferencia_contacto', num_donantes)
+    return tareas
+
+
+def generar_shard(tarea, formato: str = 'copy'):
+    """Genera un shard y lo devuelve ya serializado: (tabla, texto, número de filas)"""
+    tabla, shard, params = tarea
+    semilla = _semilla_shard(tabla, shard)
+    fake.seed_instance(semilla)
+    filas = _GENERADORES[tabla](random.Random(semilla), fake, **params)
+    buffer = io.StringIO()
+    if formato == 'copy':
+        buffer.writelines(_linea_copy(fila) for fila in filas)
+    else:
+        escribir_inserts(buffer, tabla, COLUMNAS[tabla], filas)
+    return tabla, buffer.getvalue(), len(filas)
+
+
+def generar_inserts_sql(formato: str = 'copy', escala: float = 1.0, procesos: int = None, ruta: str = None):
+    """Genera database/Registros.sql como bloques COPY por tabla (por defecto) o como INSERTs.
+
+    Los shards se generan en un pool de procesos y se escriben a disco en
+    orden a medida que terminan, sin acumular el archivo en memoria.
+    """
+    if ruta is None:
+        # Escribir archivo de registros en <project_root>/database/Registros.sql
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+        database_dir = os.path.join(project_root, "database")
+        os.makedirs(database_dir, exist_ok=True)      # sólo crea la carpeta
+        ruta = os.path.join(database_dir, "Registros.sql")
+    procesos = procesos or os.cpu_count() or 1
+
+    inicio = time.perf_counter()
+    tareas = planificar(escala)
+    conteo = {}
+    tabla_abierta = None
+    trabajo = partial(generar_shard, formato=formato)
+    pool = multiprocessing.Pool(procesos) if procesos > 1 else None
+    try:
+        # imap conserva el orden de las tareas: el archivo no depende de qué proceso termina primero
+        resultados = pool.imap(trabajo, tareas) if pool else map(trabajo, tareas)
+        with open(ruta, "w", encoding="utf-8") as f:
+            f.write(f"-- Datos generados automáticamente con ORM (sin conexión a BD), formato {formato}, escala {escala:g}\n")
+            f.write("BEGIN;\n\n")
+            for tabla, texto, num_filas in resultados:
+                if tabla != tabla_abierta:
+                    if tabla_abierta is not None and formato == 'copy':
+                        f.write('\\.\n\n')
+                    if formato == 'copy':
+                        f.write(f"COPY {tabla} ({', '.join(COLUMNAS[tabla])}) FROM stdin;\n")
+                    tabla_abierta = tabla
+                f.write(texto)
+                conteo[tabla] = conteo.get(tabla, 0) + num_filas
+            if tabla_abierta is not None and formato == 'copy':
+                f.write('\\.\n\n')
+            # Contadores exactos para todas las campañas (cuadra con db/reconciliar_estadisticas.py)
+            f.write(RECALCULAR_ESTADISTICAS.strip() + ";\n\n")
+            # Los ids se cargaron explícitos: las secuencias siguen en 1 hasta aquí
+            f.write(RECONCILIAR_SECUENCIAS.strip() + ";\n\n")
+            # La vista materializada se creó vacía en DDL.sql
+            f.write("REFRESH MATERIALIZED VIEW vista_donaciones_campana;\n")
+            f.write("COMMIT;\n")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    total_registros = sum(conteo.values())
+    print(f"Archivo {os.path.basename(ruta)} generado ({formato}, escala {escala:g}, {procesos} procesos) con "
+          f"{len(conteo)} tablas y {total_registros} registros en {time.perf_counter() - inicio:.1f}s.")
+    return conteo
+
 
 if __name__ == '__main__':
-    generar_inserts_sql()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Genera database/Registros.sql con datos de prueba")
+    parser.add_argument('--formato', choices=['copy', 'insert'], default='copy',
+                        help="copy: un bloque COPY ... FROM stdin por tabla (carga en una pasada); insert: un INSERT por fila")
+    parser.add_argument('--scale', '--escala', dest='escala', type=float, default=1.0,
+                        help="factor que multiplica el tamaño de todas las tablas (p. ej. 10, 100, 1000)")
+    parser.add_argument('--procesos', type=int, default=None,
+                        help="procesos del pool (por defecto, uno por CPU); no cambia el resultado")
+    parser.add_argument('--salida', default=None, help="ruta del archivo generado (por defecto database/Registros.sql)")
+    args = parser.parse_args()
+    generar_inserts_sql(args.formato, args.escala, args.procesos, args.salida)
@@ -0,0 +1,98 @@
+# db/verificar_planes.py
+# Ejecuta EXPLAIN (FORMAT JSON) de cada reporte contra la base sembrada y falla
+# si alguno recorre secuencialmente una tabla grande.
+# Uso (desde app/, con la BD sembrada, p. ej. registros.py --scale 100):
+#   python -m db.verificar_planes [--umbral-filas 10000] [--sin-analyze]
+import argparse
+import datetime
+import sys
+from sqlalchemy import text
+from db.connection import get_engine
+from services.reports import (
+    consulta_donaciones_por_campana,
+    consulta_voluntarios_por_actividad,
+    consulta_donaciones_por_donante,
+    consulta_distribucion_voluntarios_por_edad,
+    consulta_efectividad_campanas,
+)
+
+# Incluye lo que leen los reportes en lugar de donacion: el resumen diario y
+# los contadores por campaña (ver fuente_campanas en services/reports.py)
+TABLAS_REPORTES = ['donacion', 'donacion_diaria', 'estadisticas_campana', 'campana', 'donante',
+                   'voluntario', 'voluntario_actividad', 'actividad']
+
+
+def casos(hoy: datetime.date) -> list:
+    """Filtros representativos de cada reporte: los rangos de fecha cortos que usa la UI"""
+    hace_30 = hoy - datetime.timedelta(days=30)
+    return [
+        ("donaciones_por_campana (último mes)", consulta_donaciones_por_campana(fecha_inicio=hace_30, fecha_fin=hoy)),
+        ("donaciones_por_campana (último mes, monto >= 500)", consulta_donaciones_por_campana(fecha_inicio=hace_30, monto_minimo=500)),
+        ("voluntarios_por_actividad (último mes)", consulta_voluntarios_por_actividad(fecha_inicio=hace_30, fecha_fin=hoy)),
+        ("donaciones_por_donante (último mes)", consulta_donaciones_por_donante(fecha_inicio=hace_30, fecha_fin=hoy)),
+        ("distribucion_voluntarios_por_edad", consulta_distribucion_voluntarios_por_edad()),
+        ("efectividad_campanas (iniciadas el último mes)", consulta_efectividad_campanas(fecha_inicio=hace_30)),
+    ]
+
+
+def nodos(plan: dict):
+    yield plan
+    for hijo in plan.get("Plans", []):
+        yield from nodos(hijo)
+
+
+def explicar(conn, stmt) -> dict:
+    compilado = stmt.compile(dialect=conn.dialect)
+    fila = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compilado.string, compilado.params).scalar()
+    return fila[0]["Plan"]
+
+
+def filas_por_tabla(conn) -> dict:
+    return dict(conn.execute(
+        text("SELECT relname, reltuples::bigint FROM pg_class WHERE relname = ANY(:tablas) AND relkind = 'r'"),
+        {"tablas": TABLAS_REPORTES}
+    ).all())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--umbral-filas", type=int, default=10_000,
+                        help="tablas con al menos estas filas no pueden recorrerse con Seq Scan")
+    parser.add_argument("--sin-analyze", action="store_true",
+                        help="no ejecutar VACUUM ANALYZE antes (las estadísticas ya están al día)")
+    args = parser.parse_args()
+
+    engine = get_engine()
+    if not args.sin_analyze:
+        # VACUUM no corre dentro de una transacción; además marca el mapa de
+        # visibilidad, sin el cual los índices de cobertura no dan Index Only Scan
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for tabla in TABLAS_REPORTES:
+                conn.exec_driver_sql(f"VACUUM ANALYZE {tabla}")
+
+    fallos = 0
+    with engine.connect() as conn:
+        filas = filas_por_tabla(conn)
+        print("Filas estimadas: " + ", ".join(f"{t}={filas.get(t, '?')}" for t in TABLAS_REPORTES))
+        for nombre, stmt in casos(datetime.date.today()):
+            plan = explicar(conn, stmt)
+            escaneos = [n for n in nodos(plan) if "Relation Name" in n]
+            secuenciales = [
+                n["Relation Name"] for n in escaneos
+                if n["Node Type"] == "Seq Scan" and filas.get(n["Relation Name"], 0) >= args.umbral_filas
+            ]
+            estado = "FALLA" if secuenciales else "ok"
+            print(f"[{estado}] {nombre} (costo {plan['Total Cost']:.0f})")
+            for n in escaneos:
+                indice = f" usando {n['Index Name']}" if "Index Name" in n else ""
+                print(f"        {n['Node Type']} en {n['Relation Name']}{indice}")
+            fallos += bool(secuenciales)
+
+    if fallos:
+        print(f"{fallos} reporte(s) recorren secuencialmente tablas de más de {args.umbral_filas} filas")
+        sys.exit(1)
+    print("Todos los reportes usan índices en las tablas grandes")
+
+
+if __name__ == "__main__":
+    main()
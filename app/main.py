@@ -1,15 +1,130 @@
 # main.py (actualizado)
 import streamlit as st
 import pandas as pd
-from db.connection import get_session
+from db.connection import get_session, rerun_scope
 from services.crud_organization import (
-    get_organizaciones, 
+    listar_organizaciones,
     get_organizacion,  # <-- Agrega esta importación
     create_organizacion,
     update_organizacion,
     delete_organizacion
 )
+from services.paginacion import TAMANO_PAGINA
+from components.ui_elements import cursor_actual, render_paginador, render_descargas_streaming
+from services.cargador import CargadorReportes
+from services.opciones import get_opciones
+from services.escritura import unidad_de_trabajo
+from db.reconciliar_secuencias import reconciliar_secuencias_al_iniciar
+from functools import partial
+import calendar
 import datetime
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+def _mes_siguiente(fecha: datetime.date) -> datetime.date:
+    """Mismo día del mes siguiente (el último del mes si no existe: 31 de enero -> 28/29 de febrero)"""
+    anio, mes = (fecha.year + 1, 1) if fecha.month == 12 else (fecha.year, fecha.month + 1)
+    return fecha.replace(year=anio, month=mes, day=min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+# Filtros de cada reporte: la sección los dibuja y main() los lee para precargar
+def filtros_reportes(today: datetime.date) -> dict:
+    # Por defecto: desde el primer día del mes de hace tres años hasta dentro de un mes
+    desde = today.replace(year=today.year - 3, day=1)
+    hasta = _mes_siguiente(today)
+    return {
+        "donaciones_por_campana": {
+            "fecha_inicio_campana": {"type": "date", "label": "Fecha inicio", "value": desde},
+            "fecha_fin_campana": {"type": "date", "label": "Fecha fin", "value": hasta},
+            "monto_minimo_campana": {"type": "number", "label": "Monto mínimo", "value": 0, "min": 0},
+            "monto_maximo_campana": {"type": "number", "label": "Monto máximo", "value": 10000, "min": 0},
+        },
+        "voluntarios_por_actividad": {
+            "fecha_inicio_voluntarios": {"type": "date", "label": "Fecha inicio", "value": desde},
+            "fecha_fin_voluntarios": {"type": "date", "label": "Fecha fin", "value": hasta},
+            "edad_minima_voluntarios": {"type": "number", "label": "Edad mínima", "value": 16, "min": 0},
+            "edad_maxima_voluntarios": {"type": "number", "label": "Edad máxima", "value": 99, "min": 0},
+        },
+        "donaciones_por_donante": {
+            "fecha_inicio_donante": {"type": "date", "label": "Fecha inicio", "value": desde},
+            "fecha_fin_donante": {"type": "date", "label": "Fecha fin", "value": hasta},
+            "monto_minimo_donante": {"type": "number", "label": "Monto mínimo", "value": 0, "min": 0},
+            "monto_maximo_donante": {"type": "number", "label": "Monto máximo", "value": 10000, "min": 0},
+        },
+        "distribucion_voluntarios_por_edad": {
+            "edad_minima_edad": {"type": "number", "label": "Edad mínima", "value": 16, "min": 0},
+            "edad_maxima_edad": {"type": "number", "label": "Edad máxima", "value": 99, "min": 0},
+            "anios_por_grupo": {"type": "number", "label": "Años por grupo", "value": 5, "min": 1}
+        },
+        "efectividad_campanas": {
+            "fecha_inicio_efectividad": {"type": "date", "label": "Fecha inicio", "value": desde},
+            "fecha_fin_efectividad": {"type": "date", "label": "Fecha fin", "value": hasta},
+            "estado_efectividad": {"type": "select", "label": "Estado", "options": ["Todos", "planificada", "activa", "pausada", "finalizada"]},
+        },
+    }
+
+def _valor_filtro(clave, config):
+    # Antes de dibujar el widget (primera ejecución) vale su valor inicial
+    if clave in st.session_state:
+        return st.session_state[clave]
+    return config["value"] if "value" in config else config["options"][0]
+
+def parametros_reportes(today: datetime.date) -> dict:
+    """Argumentos de cada get_* de services.reports según el estado actual de los filtros"""
+    f = {
+        clave: _valor_filtro(clave, config)
+        for filtros in filtros_reportes(today).values()
+        for clave, config in filtros.items()
+    }
+    return {
+        "donaciones_por_campana": dict(
+            fecha_inicio=f["fecha_inicio_campana"], fecha_fin=f["fecha_fin_campana"],
+            monto_minimo=f["monto_minimo_campana"], monto_maximo=f["monto_maximo_campana"]),
+        "voluntarios_por_actividad": dict(
+            fecha_inicio=f["fecha_inicio_voluntarios"], fecha_fin=f["fecha_fin_voluntarios"],
+            edad_minima=int(f["edad_minima_voluntarios"] or 0), edad_maxima=int(f["edad_maxima_voluntarios"] or 99)),
+        "donaciones_por_donante": dict(
+            fecha_inicio=f["fecha_inicio_donante"], fecha_fin=f["fecha_fin_donante"],
+            monto_minimo=f["monto_minimo_donante"], monto_maximo=f["monto_maximo_donante"]),
+        "distribucion_voluntarios_por_edad": dict(
+            edad_minima=int(f["edad_minima_edad"] or 16), edad_maxima=int(f["edad_maxima_edad"] or 99),
+            anios_por_grupo=int(f["anios_por_grupo"] or 5)),
+        "efectividad_campanas": dict(
+            fecha_inicio=f["fecha_inicio_efectividad"], fecha_fin=f["fecha_fin_efectividad"],
+            estado=None if f["estado_efectividad"] == "Todos" else f["estado_efectividad"]),
+    }
+
+def precargar_reportes(*nombres: str, cargador=None) -> CargadorReportes:
+    """Lanza en paralelo los reportes indicados (todos si no se indica ninguno) con los filtros actuales"""
+    from services.reports import (
+        get_donaciones_por_campana, get_voluntarios_por_actividad, get_donaciones_por_donante,
+        get_distribucion_voluntarios_por_edad, get_efectividad_campanas
+    )
+    funciones = {
+        "donaciones_por_campana": get_donaciones_por_campana,
+        "voluntarios_por_actividad": get_voluntarios_por_actividad,
+        "donaciones_por_donante": get_donaciones_por_donante,
+        "distribucion_voluntarios_por_edad": get_distribucion_voluntarios_por_edad,
+        "efectividad_campanas": get_efectividad_campanas,
+    }
+    cargador = cargador or CargadorReportes()
+    for nombre, parametros in parametros_reportes(datetime.date.today()).items():
+        if not nombres or nombre in nombres:
+            cargador.lanzar(nombre, funciones[nombre], **parametros)
+    return cargador
+
+def conservar_filtros():
+    """Mantiene los filtros de las secciones que no se dibujan en esta ejecución.
+
+    Streamlit borra el estado de los widgets que no se renderizan; reasignarlo
+    lo convierte en estado propio y sobrevive al cambio de sección.
+    """
+    for filtros in filtros_reportes(datetime.date.today()).values():
+        for clave in filtros:
+            if clave in st.session_state:
+                st.session_state[clave] = st.session_state[clave]
 
 # CRUD Organización
 def organizacion_crud():
@@ -20,13 +135,15 @@ def organizacion_crud():
     tab1, tab2, tab3 = st.tabs(["Ver", "Crear", "Editar/Eliminar"])
     
     with tab1:
-        orgs = get_organizaciones(db)
-        st.table([{
-            "ID": o.organizacion_id,
-            "Nombre": o.nombre,
-            "Email": o.email,
-            "Activa": "✅" if o.activa else "❌"
-        } for o in orgs])
+        pagina = listar_organizaciones(db, cursor=cursor_actual("pag_organizaciones"), estimar=True)
+        orgs = pagina.items
+        st.table(pd.DataFrame({
+            "ID": orgs["organizacion_id"],
+            "Nombre": orgs["nombre"],
+            "Email": orgs["email"],
+            "Activa": orgs["activa"].map(lambda activa: "✅" if activa else "❌")
+        }))
+        render_paginador("pag_organizaciones", pagina, TAMANO_PAGINA)
     
     with tab2:
         with st.form("crear_org"):
@@ -58,6 +175,7 @@ def organizacion_crud():
                     activa = st.checkbox("Activa", value=org.activa, key="edit_org_activa")
                     submitted_update = st.form_submit_button("Actualizar")
                     submitted_delete = st.form_submit_button("Eliminar")
+                    submitted_simular = st.form_submit_button("Simular eliminación")
                     if submitted_update:
                         try:
                             update_organizacion(db, org_id, {
@@ -68,106 +186,105 @@ def organizacion_crud():
                             st.success("Organización actualizada!")
                         except Exception as e:
                             st.error(f"Error: {e}")
-                    if submitted_delete:
+                    if submitted_delete or submitted_simular:
                         try:
-                            if delete_organizacion(db, org_id):
-                                st.success("Organización eliminada!")
-                            else:
+                            conteos = delete_organizacion(db, org_id, simular=submitted_simular)
+                            if not conteos:
                                 st.error("Error al eliminar")
+                            elif submitted_simular:
+                                st.info("Se eliminarían: " + ", ".join(f"{n} {tabla}" for tabla, n in conteos.items()))
+                            else:
+                                st.success("Organización eliminada!")
                         except Exception as e:
                             st.error(f"Error: {e}")
 
-def resumen_donaciones_por_campana():
-    from services.reports import get_donaciones_por_campana
+def render_importacion_donaciones(db):
+    from services.importacion import COLUMNAS_DONACION, COLUMNAS_OBLIGATORIAS, importar_donaciones
+    st.caption(
+        f"Columnas: {', '.join(COLUMNAS_DONACION)} (obligatorias: {', '.join(COLUMNAS_OBLIGATORIAS)}). "
+        "Se cargan las filas válidas en una sola transacción y se listan las rechazadas."
+    )
+    archivo = st.file_uploader("Archivo CSV o XLSX", type=["csv", "xlsx"], key="importar_donaciones_archivo")
+    if archivo is None or not st.button("Importar", key="importar_donaciones_boton"):
+        return
+    try:
+        resultado = importar_donaciones(db, archivo, archivo.name)
+    except Exception as e:
+        st.error(f"Error al importar: {e}")
+        return
+    st.success(f"{resultado.insertadas} donaciones importadas en {resultado.duracion:.2f} s")
+    if not resultado.rechazadas.empty:
+        st.warning(f"{len(resultado.rechazadas)} filas rechazadas")
+        st.dataframe(resultado.rechazadas, height=300)
+        st.download_button(
+            "Descargar filas rechazadas (CSV)",
+            resultado.rechazadas.to_csv(index=False).encode("utf-8"),
+            file_name="donaciones_rechazadas.csv",
+            mime="text/csv",
+            key="importar_donaciones_rechazadas"
+        )
+
+def resumen_donaciones_por_campana(cargador=None):
+    from services.reports import get_donaciones_por_campana, consulta_donaciones_por_campana
     from components.ui_elements import render_table, render_filters
     from db.connection import get_session
-    from services.crud_donacion import get_donaciones, create_donacion, update_donacion, delete_donacion
-    from services.crud_campana import get_campanas, create_campana, update_campana, delete_campana, get_campana
+    from services.crud_donacion import listar_donaciones, consulta_listado_donaciones, create_donacion, update_donacion, delete_donacion
+    from services.crud_campana import listar_campanas, create_campana, update_campana, delete_campana, get_campana
     st.header("Resumen de Donaciones por Campaña")
 
     # Filtros
     today = datetime.date.today()
-    filters = {
-        "fecha_inicio_campana": {"type": "date", "label": "Fecha inicio", "value": today.replace(day=1).replace(year=today.year - 3)},
-        "fecha_fin_campana": {"type": "date", "label": "Fecha fin", "value": today.replace(month=today.month + 1)},
-        "monto_minimo_campana": {"type": "number", "label": "Monto mínimo", "value": 0, "min": 0},
-        "monto_maximo_campana": {"type": "number", "label": "Monto máximo", "value": 10000, "min": 0},
-    }
-    render_filters(filters)
-    fecha_inicio = st.session_state.get("fecha_inicio_campana")
-    fecha_fin = st.session_state.get("fecha_fin_campana")
-    monto_minimo = st.session_state.get("monto_minimo_campana")
-    monto_maximo = st.session_state.get("monto_maximo_campana")
+    render_filters(filtros_reportes(today)["donaciones_por_campana"])
+    parametros = parametros_reportes(today)["donaciones_por_campana"]
+    fecha_inicio = parametros["fecha_inicio"]
+    fecha_fin = parametros["fecha_fin"]
+    monto_minimo = parametros["monto_minimo"]
+    monto_maximo = parametros["monto_maximo"]
 
     db = get_session()
-    # Consultar datos
-    data = get_donaciones_por_campana(
-        db,
-        fecha_inicio=fecha_inicio,
-        fecha_fin=fecha_fin,
-        monto_minimo=monto_minimo,
-        monto_maximo=monto_maximo
-    )
-    render_table("Donaciones por Campaña", data)
+    # Consultar datos (normalmente ya precargados en paralelo por main())
+    data = (cargador or CargadorReportes()).resultado("donaciones_por_campana", get_donaciones_por_campana, **parametros)
+    render_table("Donaciones por Campaña", data, consulta=consulta_donaciones_por_campana(
+        fecha_inicio, fecha_fin, monto_minimo, monto_maximo
+    ))
 
     st.subheader("CRUD Donaciones")
-    tab1, tab2, tab3 = st.tabs(["Ver Donaciones", "Crear Donación", "Editar/Eliminar Donación"])
+    tab1, tab2, tab3, tab4 = st.tabs(["Ver Donaciones", "Crear Donación", "Editar/Eliminar Donación", "Importar Donaciones"])
     with tab1:
-        donaciones = get_donaciones(db)
-        df = pd.DataFrame([
-            {
-                k: getattr(d, k).value if hasattr(getattr(d, k), "value") else getattr(d, k)
-                for k in d.__table__.columns.keys()
-            }
-            for d in donaciones
-        ])
-        st.dataframe(df, height=400)
+        pagina = listar_donaciones(db, cursor=cursor_actual("pag_donaciones"), estimar=True)
+        st.dataframe(pagina.items, height=400)
+        render_paginador("pag_donaciones", pagina, TAMANO_PAGINA)
+        # Historial completo de donaciones, exportado por lotes desde el servidor
+        render_descargas_streaming("Historial de Donaciones", consulta_listado_donaciones())
     with tab2:
         # Importar create_donante de forma segura para usarlo más adelante
         try:
             from services.crud_donante import create_donante
         except ImportError:
             create_donante = None
-        # Obtener campañas existentes para sugerencias
-        campanas_existentes = get_campanas(db)
-        campana_options = [
-            (f"{c.campana_id} - {c.nombre}", c.campana_id) for c in campanas_existentes
-        ]
-        campana_labels = [label for label, _ in campana_options]
-        campana_ids = [cid for _, cid in campana_options]
-
-        # Obtener donantes existentes para sugerencias
-        try:
-            from services.crud_donante import get_donantes
-            donantes_existentes = get_donantes(db)
-            donante_options = [
-                (f"{d.donante_id} - {getattr(d, 'nombre', str(d.donante_id))}", d.donante_id) for d in donantes_existentes
-            ]
-            donante_labels = [label for label, _ in donante_options]
-            donante_ids = [did for _, did in donante_options]
-        except ImportError:
-            donante_labels = []
-            donante_ids = []
+        # Campañas y donantes existentes para sugerencias (cacheados, ver services/opciones.py)
+        campana_labels = get_opciones(db, "campana")
+        campana_ids = list(campana_labels)
+        donante_labels = get_opciones(db, "donante")
+        donante_ids = list(donante_labels)
         with st.form("crear_donacion"):
-            campana_idx = st.selectbox(
+            campana_id = st.selectbox(
                 "Campaña ID",
-                options=range(len(campana_ids)),
-                format_func=lambda i: campana_labels[i] if i < len(campana_labels) else "",
+                options=campana_ids,
+                format_func=campana_labels.get,
                 key="donacion_campana_id"
             ) if campana_ids else None
-            campana_id = campana_ids[campana_idx] if campana_idx is not None else None
 
             donante_mode = st.radio("¿Donante existente o nuevo?", ["Existente", "Nuevo"], key="donacion_donante_mode")
             donante_id = None
             if donante_mode == "Existente":
                 if donante_ids:
-                    donante_idx = st.selectbox(
+                    donante_id = st.selectbox(
                         "Donante ID",
-                        options=range(len(donante_ids)),
-                        format_func=lambda i: donante_labels[i] if i < len(donante_labels) else "",
+                        options=donante_ids,
+                        format_func=donante_labels.get,
                         key="donacion_donante_id"
                     )
-                    donante_id = donante_ids[donante_idx]
                 else:
                     st.info("No hay donantes registrados. Por favor, agregue un nuevo donante.")
             else:
@@ -182,52 +299,43 @@ def resumen_donaciones_por_campana():
             descripcion_especie = st.text_input("Descripción Especie", key="donacion_desc_especie") if tipo == "especie" else None
             fecha = st.date_input("Fecha", value=today, key="donacion_fecha")
             if st.form_submit_button("Crear"):
-                try:
-                    if donante_mode == "Existente":
-                        if not donante_ids:
-                            st.error("Debe agregar un donante primero.")
-                            raise Exception("No hay donantes existentes")
-                        if donante_id is None:
-                            st.error("Debe seleccionar un donante válido.")
-                            raise Exception("Donante no seleccionado")
-                    else:
-                        if not nombre or not apellido or not email:
-                            st.error("Debe completar los datos del nuevo donante.")
-                            raise Exception("Datos de donante incompletos")
-                        if create_donante is None:
-                            st.error("La función para crear donantes no está disponible.")
-                            raise Exception("create_donante no importado")
-                        try:
-                            nuevo_donante = create_donante(db, {
-                                "nombre": nombre,
-                                "apellido": apellido,
-                                "email": email,
-                                "tipo": tipo_donante
+                error = None
+                if donante_mode == "Existente":
+                    if not donante_ids:
+                        error = "Debe agregar un donante primero."
+                    elif donante_id is None:
+                        error = "Debe seleccionar un donante válido."
+                elif not nombre or not apellido or not email:
+                    error = "Debe completar los datos del nuevo donante."
+                elif create_donante is None:
+                    error = "La función para crear donantes no está disponible."
+                if error is None and tipo == "monetaria" and (monto is None or monto <= 0):
+                    error = "No se ingresó monto"
+                if error:
+                    st.error(error)
+                else:
+                    try:
+                        # Donante nuevo y donación en una sola transacción: si la donación
+                        # falla no queda un donante huérfano
+                        with unidad_de_trabajo(db):
+                            if donante_mode != "Existente":
+                                donante_id = create_donante(db, {
+                                    "nombre": nombre,
+                                    "apellido": apellido,
+                                    "email": email,
+                                    "tipo": tipo_donante
+                                }).donante_id
+                            create_donacion(db, {
+                                "campana_id": campana_id,
+                                "donante_id": donante_id,
+                                "tipo": tipo,
+                                "monto": monto if tipo == "monetaria" else None,
+                                "descripcion_especie": descripcion_especie if tipo == "especie" else None,
+                                "fecha": fecha
                             })
-                            donante_id = nuevo_donante.donante_id
-                        except Exception as e:
-                            st.error(f"Error al crear el nuevo donante: {e}")
-                            db.rollback()
-                            raise e
-
-                    if tipo == "monetaria" and (monto is None or monto <= 0):
-                        st.error("No se ingresó monto")
-                    else:
-                        data = {
-                            "campana_id": campana_id,
-                            "donante_id": donante_id,
-                            "tipo": tipo,
-                            "monto": monto if tipo == "monetaria" else None,
-                            "descripcion_especie": descripcion_especie if tipo == "especie" else None,
-                            "fecha": fecha
-                        }
-                        create_donacion(db, data)
                         st.success("Donación creada!")
-                except ValueError as ve:
-                    st.error(f"Error al crear donación: {str(ve)}")
-                except Exception as e:
-                    st.error(f"Error al crear donación: {str(e)}")
-                    db.rollback()
+                    except Exception as e:
+                        st.error(f"Error al crear donación: {str(e)}")
     with tab3:
         donacion_id = st.number_input("ID Donación", min_value=1, key="edit_donacion_id")
         if donacion_id:
@@ -265,53 +373,23 @@ def resumen_donaciones_por_campana():
                                 st.error("Error al eliminar")
                         except Exception as e:
                             st.error(f"Error: {e}")
+    with tab4:
+        render_importacion_donaciones(db)
     # CRUD Campañas (opcional, similar a donaciones)
     st.subheader("CRUD Campañas")
     tabc1, tabc2, tabc3 = st.tabs(["Ver Campañas", "Crear Campaña", "Editar/Eliminar Campaña"])
     with tabc1:
-        campanas = get_campanas(db)
-        df = pd.DataFrame([
-            {
-                k: getattr(c, k).value if hasattr(getattr(c, k), "value") else getattr(c, k)
-                for k in c.__table__.columns.keys()
-            }
-            for c in campanas
-        ])
-        st.dataframe(df, height=400)
+        pagina = listar_campanas(db, cursor=cursor_actual("pag_campanas"), estimar=True)
+        st.dataframe(pagina.items, height=400)
+        render_paginador("pag_campanas", pagina, TAMANO_PAGINA)
     with tabc2:
-        # Obtener organizaciones existentes para sugerencias
-        organizaciones_existentes = get_organizaciones(db)
-        org_options = [
-            (f"{o.organizacion_id} - {o.nombre}", o.organizacion_id) for o in organizaciones_existentes
-        ]
-        org_labels = [label for label, _ in org_options]
-        org_ids = [oid for _, oid in org_options]
-
-        # Obtener categorías existentes para sugerencias
-        try:
-            from services.crud_categoria import get_categorias
-            categorias_existentes = get_categorias(db)
-            cat_options = [
-                (f"{c.categoria_id} - {getattr(c, 'nombre', str(c.categoria_id))}", c.categoria_id) for c in categorias_existentes
-            ]
-            cat_labels = [label for label, _ in cat_options]
-            cat_ids = [cid for _, cid in cat_options]
-        except ImportError:
-            cat_labels = []
-            cat_ids = []
-
-        # Obtener sedes existentes para sugerencias
-        try:
-            from services.crud_sede import get_sedes
-            sedes_existentes = get_sedes(db)
-            sede_options = [
-                (f"{s.sede_id} - {getattr(s, 'nombre', str(s.sede_id))}", s.sede_id) for s in sedes_existentes
-            ]
-            sede_labels = [label for label, _ in sede_options]
-            sede_ids = [sid for _, sid in sede_options]
-        except ImportError:
-            sede_labels = []
-            sede_ids = []
+        # Organizaciones, categorías y sedes existentes para sugerencias (cacheadas)
+        org_labels = get_opciones(db, "organizacion")
+        org_ids = list(org_labels)
+        cat_labels = get_opciones(db, "categoria")
+        cat_ids = list(cat_labels)
+        sede_labels = get_opciones(db, "sede")
+        sede_ids = list(sede_labels)
 
         with st.form("crear_campana"):
             nombre = st.text_input("Nombre", key="crear_campana_nombre")
@@ -321,31 +399,28 @@ def resumen_donaciones_por_campana():
             meta_monetaria = st.number_input("Meta monetaria", min_value=0.0, step=0.01, key="crear_campana_meta")
             estado = st.selectbox("Estado", ["planificada", "activa", "pausada", "finalizada"], key="crear_campana_estado")
             # Usar selectbox para sugerir organizaciones válidas
-            org_idx = st.selectbox(
+            organizacion_id = st.selectbox(
                 "Organización ID",
-                options=range(len(org_ids)),
-                format_func=lambda i: org_labels[i] if i < len(org_labels) else "",
+                options=org_ids,
+                format_func=org_labels.get,
                 key="crear_campana_org_id"
             ) if org_ids else None
-            organizacion_id = org_ids[org_idx] if org_idx is not None else None
 
             # Usar selectbox para sugerir categorías válidas solo si hay categorías
-            cat_idx = st.selectbox(
+            categoria_id = st.selectbox(
                 "Categoría ID",
-                options=range(len(cat_ids)),
-                format_func=lambda i: cat_labels[i] if i < len(cat_labels) else "",
+                options=cat_ids,
+                format_func=cat_labels.get,
                 key="crear_campana_cat_id"
             ) if cat_ids else None
-            categoria_id = cat_ids[cat_idx] if cat_idx is not None else None
 
             # Usar selectbox para sugerir sedes válidas
-            sede_idx = st.selectbox(
+            sede_principal_id = st.selectbox(
                 "Sede Principal ID",
-                options=range(len(sede_ids)),
-                format_func=lambda i: sede_labels[i] if i < len(sede_labels) else "",
+                options=sede_ids,
+                format_func=sede_labels.get,
                 key="crear_campana_sede_id"
             ) if sede_ids else None
-            sede_principal_id = sede_ids[sede_idx] if sede_idx is not None else None
             if st.form_submit_button("Crear"):
                 try:
                     if organizacion_id is None:
@@ -418,54 +493,45 @@ def resumen_donaciones_por_campana():
                             st.error(f"Error al eliminar campaña: {str(ve)}")
                         except Exception as e:
                             st.error(f"Error inesperado: {str(e)}")
-def participacion_voluntarios_por_actividad():
+def participacion_voluntarios_por_actividad(cargador=None):
     from components.ui_elements import render_table, render_filters
     from db.connection import get_session
     from services.crud_voluntario_actividad import (
-        get_voluntario_actividades, create_voluntario_actividad, update_voluntario_actividad, delete_voluntario_actividad, get_voluntario_actividad
+        listar_voluntario_actividades, create_voluntario_actividad, update_voluntario_actividad, delete_voluntario_actividad, get_voluntario_actividad
     )
     st.header("Participación de Voluntarios por Actividad")
 
     # Filtros con keys únicos para este segmento
     today = datetime.date.today()
-    filters = {
-        "fecha_inicio_voluntarios": {"type": "date", "label": "Fecha inicio", "value": today.replace(day=1).replace(year=today.year - 3).replace(year=today.year - 3)},
-        "fecha_fin_voluntarios": {"type": "date", "label": "Fecha fin", "value": today.replace(month=today.month + 1)},
-        "edad_minima_voluntarios": {"type": "number", "label": "Edad mínima", "value": 16, "min": 0},
-        "edad_maxima_voluntarios": {"type": "number", "label": "Edad máxima", "value": 99, "min": 0},
-    }
-    render_filters(filters)
-    fecha_inicio = st.session_state.get("fecha_inicio_voluntarios")
-    fecha_fin = st.session_state.get("fecha_fin_voluntarios")
-    edad_minima = int(st.session_state.get("edad_minima_voluntarios") or 0)
-    edad_maxima = int(st.session_state.get("edad_maxima_voluntarios") or 99)
+    render_filters(filtros_reportes(today)["voluntarios_por_actividad"])
+    parametros = parametros_reportes(today)["voluntarios_por_actividad"]
 
     # Reporte (requiere función get_voluntarios_por_actividad en services.reports)
+    db = get_session()
     try:
         from services.reports import get_voluntarios_por_actividad
-        db = get_session()
-        data = get_voluntarios_por_actividad(
-            db,
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin,
-            edad_minima=edad_minima,
-            edad_maxima=edad_maxima
-        )
+        data = (cargador or CargadorReportes()).resultado("voluntarios_por_actividad", get_voluntarios_por_actividad, **parametros)
     except Exception:
+        db.rollback()
         data = []
     render_table("Voluntarios por Actividad", data)
 
     st.subheader("CRUD Participación Voluntario-Actividad")
-    db = get_session()
     tab1, tab2, tab3 = st.tabs(["Ver Participaciones", "Crear Participación", "Editar/Eliminar Participación"])
     with tab1:
-        participaciones = get_voluntario_actividades(db)
-        df = pd.DataFrame([{k: getattr(v, k) for k in v.__table__.columns.keys()} for v in participaciones])
-        st.dataframe(df, height=400)
+        pagina = listar_voluntario_actividades(db, cursor=cursor_actual("pag_participaciones"), estimar=True)
+        st.dataframe(pagina.items, height=400)
+        render_paginador("pag_participaciones", pagina, TAMANO_PAGINA)
     with tab2:
         with st.form("crear_va"):
             voluntario_id = st.number_input("Voluntario ID", min_value=1, key="va_voluntario_id")
-            actividad_id = st.number_input("Actividad ID", min_value=1, key="va_actividad_id")
+            actividad_labels = get_opciones(db, "actividad")
+            actividad_id = st.selectbox(
+                "Actividad ID",
+                options=list(actividad_labels),
+                format_func=actividad_labels.get,
+                key="va_actividad_id"
+            )
             horas_dedicadas = st.number_input("Horas dedicadas", min_value=0.0, step=0.5, key="va_horas")
             comentarios = st.text_area("Comentarios", key="va_comentarios")
             estado = st.selectbox("Estado", ["pendiente", "aprobado", "rechazado"], key="va_estado")
@@ -515,15 +581,15 @@ def participacion_voluntarios_por_actividad():
     # CRUD Actividad (opcional, similar a campañas)
     # ...Puedes agregar aquí CRUD para Actividad si lo deseas...
 
-def donaciones_por_donante():
+def donaciones_por_donante(cargador=None):
     import datetime
     import streamlit as st
     from components.ui_elements import render_table, render_filters
     from db.connection import get_session
-    from services.crud_donacion import get_donaciones, create_donacion, update_donacion, delete_donacion, get_donacion
+    from services.crud_donacion import create_donacion, update_donacion, delete_donacion, get_donacion
     # Se asume que existe un CRUD de donante similar
     try:
-        from services.crud_donante import get_donantes, create_donante, update_donante, delete_donante, get_donante
+        from services.crud_donante import listar_donantes, create_donante, update_donante, delete_donante, get_donante
         donante_crud = True
     except ImportError:
         donante_crud = False
@@ -531,47 +597,34 @@ def donaciones_por_donante():
 
     # Filtros
     today = datetime.date.today()
-    filters = {
-        "fecha_inicio_donante": {"type": "date", "label": "Fecha inicio", "value": today.replace(day=1).replace(year=today.year - 3)},
-        "fecha_fin_donante": {"type": "date", "label": "Fecha fin", "value": today.replace(month=today.month + 1)},
-        "monto_minimo_donante": {"type": "number", "label": "Monto mínimo", "value": 0, "min": 0},
-        "monto_maximo_donante": {"type": "number", "label": "Monto máximo", "value": 10000, "min": 0},
-    }
-    render_filters(filters)
-    fecha_inicio = st.session_state.get("fecha_inicio_donante")
-    fecha_fin = st.session_state.get("fecha_fin_donante")
-    monto_minimo = st.session_state.get("monto_minimo_donante")
-    monto_maximo = st.session_state.get("monto_maximo_donante")
+    render_filters(filtros_reportes(today)["donaciones_por_donante"])
+    parametros = parametros_reportes(today)["donaciones_por_donante"]
+    fecha_inicio = parametros["fecha_inicio"]
+    fecha_fin = parametros["fecha_fin"]
+    monto_minimo = parametros["monto_minimo"]
+    monto_maximo = parametros["monto_maximo"]
 
     # Reporte (requiere función get_donaciones_por_donante en services.reports)
+    db = get_session()
+    from services.reports import consulta_donaciones_por_donante
     try:
         from services.reports import get_donaciones_por_donante
-        db = get_session()
-        data = get_donaciones_por_donante(
-            db,
-            fecha_inicio=fecha_inicio,
-            fecha_fin=fecha_fin,
-            monto_minimo=monto_minimo,
-            monto_maximo=monto_maximo
-        )
+        data = (cargador or CargadorReportes()).resultado("donaciones_por_donante", get_donaciones_por_donante, **parametros)
     except Exception:
+        db.rollback()
         data = []
-    render_table("Donaciones por Donante", data)
+    render_table("Donaciones por Donante", data, consulta=consulta_donaciones_por_donante(
+        fecha_inicio, fecha_fin, monto_minimo, monto_maximo
+    ))
 
     # CRUD Donantes (opcional, si existe CRUD de donante)
     if donante_crud:
         st.subheader("CRUD Donantes")
         tabd1, tabd2, tabd3 = st.tabs(["Ver Donantes", "Crear Donante", "Editar/Eliminar Donante"])
         with tabd1:
-            donantes = get_donantes(db)
-            df = pd.DataFrame([
-                {
-                    k: getattr(d, k).value if hasattr(getattr(d, k), "value") else getattr(d, k)
-                    for k in d.__table__.columns.keys()
-                }
-                for d in donantes
-            ])
-            st.dataframe(df, height=400)
+            pagina = listar_donantes(db, cursor=cursor_actual("pag_donantes"), estimar=True)
+            st.dataframe(pagina.items, height=400)
+            render_paginador("pag_donantes", pagina, TAMANO_PAGINA)
         with tabd2:
             with st.form("crear_donante"):
                 nombre = st.text_input("Nombre", key="crear_donante_nombre")
@@ -612,19 +665,20 @@ def donaciones_por_donante():
                         except Exception as e:
                             st.error(f"Error: {e}")
 
-def distribucion_voluntarios_por_edad():
+def distribucion_voluntarios_por_edad(cargador=None):
     import datetime
     import streamlit as st
     import pandas as pd
     import plotly.express as px
     from components.ui_elements import render_table, render_filters
     from db.connection import get_session
+    from utils.helpers import calcular_edad
     try:
         from services.reports import get_distribucion_voluntarios_por_edad
     except ImportError:
         get_distribucion_voluntarios_por_edad = None
     try:
-        from services.crud_voluntario import get_voluntarios, create_voluntario, update_voluntario, delete_voluntario, get_voluntario
+        from services.crud_voluntario import listar_voluntarios, create_voluntario, update_voluntario, delete_voluntario, get_voluntario
         voluntario_crud = True
     except ImportError:
         voluntario_crud = False
@@ -632,27 +686,18 @@ def distribucion_voluntarios_por_edad():
 
     # Filtros
     today = datetime.date.today()
-    filters = {
-        "edad_minima_edad": {"type": "number", "label": "Edad mínima", "value": 16, "min": 0},
-        "edad_maxima_edad": {"type": "number", "label": "Edad máxima", "value": 99, "min": 0},
-        "anios_por_grupo": {"type": "number", "label": "Años por grupo", "value": 5, "min": 1}
-    }
-    render_filters(filters)
-    edad_minima = int(st.session_state.get("edad_minima_edad") or 16)
-    edad_maxima = int(st.session_state.get("edad_maxima_edad") or 99)
-    anios_por_grupo = int(st.session_state.get("anios_por_grupo") or 5)
+    render_filters(filtros_reportes(today)["distribucion_voluntarios_por_edad"])
+    parametros = parametros_reportes(today)["distribucion_voluntarios_por_edad"]
 
     # Reporte (requiere función get_distribucion_voluntarios_por_edad en services.reports)
+    db = get_session()
     if get_distribucion_voluntarios_por_edad:
         try:
-            db = get_session()
-            data = get_distribucion_voluntarios_por_edad(
-                db,
-                edad_minima=edad_minima,
-                edad_maxima=edad_maxima,
-                anios_por_grupo=anios_por_grupo
+            data = (cargador or CargadorReportes()).resultado(
+                "distribucion_voluntarios_por_edad", get_distribucion_voluntarios_por_edad, **parametros
             )
         except Exception:
+            db.rollback()
             data = []
     else:
         data = []
@@ -666,19 +711,12 @@ def distribucion_voluntarios_por_edad():
             st.plotly_chart(fig, use_container_width=True)
 
     st.subheader("CRUD Voluntarios")
-    db = get_session()
     if voluntario_crud:
         tab1, tab2, tab3 = st.tabs(["Ver Voluntarios", "Crear Voluntario", "Editar/Eliminar Voluntario"])
         with tab1:
-            voluntarios = get_voluntarios(db)
-            df = pd.DataFrame([
-                {
-                    k: getattr(v, k).value if hasattr(getattr(v, k), "value") else getattr(v, k)
-                    for k in v.__table__.columns.keys()
-                }
-                for v in voluntarios
-            ])
-            st.dataframe(df, height=400)
+            pagina = listar_voluntarios(db, cursor=cursor_actual("pag_voluntarios"), estimar=True)
+            st.dataframe(pagina.items, height=400)
+            render_paginador("pag_voluntarios", pagina, TAMANO_PAGINA)
         with tab2:
             with st.form("crear_voluntario"):
                 nombre = st.text_input("Nombre", key="crear_voluntario_nombre")
@@ -687,7 +725,7 @@ def distribucion_voluntarios_por_edad():
                 fecha_nacimiento = st.date_input("Fecha de Nacimiento", value=today.replace(year=today.year-20), key="crear_voluntario_fecha_nac")
                 # Validación de edad mínima (por ejemplo, 16 años)
                 edad_minima = 16
-                edad = today.year - fecha_nacimiento.year - ((today.month, today.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
+                edad = calcular_edad(fecha_nacimiento, today)
                 if st.form_submit_button("Crear"):
                     try:
                         if edad < edad_minima:
@@ -744,7 +782,7 @@ def distribucion_voluntarios_por_edad():
                             st.error(f"Error: {e}")
             elif voluntario_id:
                 st.warning("No se encontró voluntario con ese ID.")
-def efectividad_campanas():
+def efectividad_campanas(cargador=None):
     import datetime
     import streamlit as st
     import pandas as pd
@@ -758,33 +796,35 @@ def efectividad_campanas():
 
     # Filtros
     today = datetime.date.today()
-    filters = {
-        "fecha_inicio_efectividad": {"type": "date", "label": "Fecha inicio", "value": today.replace(day=1).replace(year=today.year - 3)},
-        "fecha_fin_efectividad": {"type": "date", "label": "Fecha fin", "value": today.replace(month=today.month + 1).replace(month=today.month + 1)},
-        "estado_efectividad": {"type": "select", "label": "Estado", "options": ["Todos", "planificada", "activa", "pausada", "finalizada"]},
-    }
-    render_filters(filters)
-    fecha_inicio = st.session_state.get("fecha_inicio_efectividad")
-    fecha_fin = st.session_state.get("fecha_fin_efectividad")
-    estado = st.session_state.get("estado_efectividad")
-    if estado == "Todos":
-        estado = None
+    render_filters(filtros_reportes(today)["efectividad_campanas"])
+    parametros = parametros_reportes(today)["efectividad_campanas"]
+    cargador = cargador or CargadorReportes()
 
     # Reporte (requiere función get_efectividad_campanas en services.reports)
     if get_efectividad_campanas:
+        from services.reports import fuente_campanas
+        from services.vistas import get_estado_vista, refrescar_vista
+        db = get_session()
+        if fuente_campanas() == "vista":
+            if st.button("Actualizar datos", key="refrescar_vista_campanas"):
+                refrescar_vista()
+                # Lo precargado puede ser anterior al refresco
+                cargador.cancelar("efectividad_campanas")
         try:
-            db = get_session()
-            data = get_efectividad_campanas(
-                db,
-                fecha_inicio=fecha_inicio,
-                fecha_fin=fecha_fin,
-                estado=estado
-            )
+            data = cargador.resultado("efectividad_campanas", get_efectividad_campanas, **parametros)
             for row in data:
                 if "estado" in row and hasattr(row["estado"], "value"):
                     row["estado"] = row["estado"].value
         except Exception:
+            db.rollback()
             data = []
+        if fuente_campanas() == "vista":
+            try:
+                antiguedad = get_estado_vista()["antiguedad"]
+            except Exception:
+                antiguedad = None
+            if antiguedad is not None:
+                st.caption(f"Totales calculados hace {int(antiguedad)} s (vista materializada)")
     else:
         data = []
     render_table("Efectividad de Campañas", data)
@@ -810,14 +850,71 @@ def efectividad_campanas():
             )
             st.plotly_chart(fig2, use_container_width=True)
 
+# Secciones de la navegación: (título, función, reporte que precarga)
+SECCIONES = [
+    ("Organizaciones", organizacion_crud, None),
+    ("Donaciones por campaña", resumen_donaciones_por_campana, "donaciones_por_campana"),
+    ("Voluntarios por actividad", participacion_voluntarios_por_actividad, "voluntarios_por_actividad"),
+    ("Donaciones por donante", donaciones_por_donante, "donaciones_por_donante"),
+    ("Voluntarios por edad", distribucion_voluntarios_por_edad, "distribucion_voluntarios_por_edad"),
+    ("Efectividad de campañas", efectividad_campanas, "efectividad_campanas"),
+]
+
+# Con UI_NAVEGACION=false se dibujan todas las secciones en cada ejecución (como
+# antes); sirve para comparar el tiempo por interacción con la navegación
+NAVEGACION_POR_SECCION = os.getenv("UI_NAVEGACION", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+# Ejecuciones recientes que se promedian por sección
+HISTORIAL_TIEMPOS = 20
+
+def ejecutar_seccion_activa(cargador: CargadorReportes) -> str:
+    """Dibuja la navegación y ejecuta sólo la sección elegida; devuelve su título"""
+    paginas = {
+        titulo: st.Page(
+            partial(funcion, cargador) if reporte else funcion,
+            title=titulo, url_path=funcion.__name__, default=i == 0
+        )
+        for i, (titulo, funcion, reporte) in enumerate(SECCIONES)
+    }
+    pagina = st.navigation(list(paginas.values()), position="sidebar")
+    reporte = next(r for titulo, _, r in SECCIONES if titulo == pagina.title)
+    if reporte:
+        # El reporte se consulta mientras se dibujan los filtros y el CRUD
+        precargar_reportes(reporte, cargador=cargador)
+    pagina.run()
+    return pagina.title
+
+def render_tiempos(seccion: str, duracion: float, cargador: CargadorReportes):
+    historial = st.session_state.setdefault("tiempos_rerun", {}).setdefault(seccion, [])
+    historial.append(duracion)
+    del historial[:-HISTORIAL_TIEMPOS]
+    logger.info("Rerun de %s en %.3fs", seccion, duracion)
+    with st.sidebar.expander("Tiempos de carga"):
+        st.caption(f"Esta ejecución ({seccion}): {duracion:.3f} s")
+        st.caption(f"Promedio de las últimas {len(historial)}: {sum(historial) / len(historial):.3f} s")
+        for nombre, tiempo in sorted(cargador.tiempos.items(), key=lambda t: -t[1]):
+            st.caption(f"{nombre}: {tiempo:.3f} s")
+
 def main():
     st.set_page_config(page_title="ONG ORM", layout="wide")
-    organizacion_crud()
-    resumen_donaciones_por_campana()
-    participacion_voluntarios_por_actividad()
-    donaciones_por_donante()
-    distribucion_voluntarios_por_edad()
-    efectividad_campanas()
+    conservar_filtros()
+    # Los create_* confían en que las secuencias van por delante de los ids sembrados
+    reconciliar_secuencias_al_iniciar()
+    # Una sola sesión (y conexión) por ejecución del script
+    with rerun_scope():
+        inicio = time.perf_counter()
+        cargador = CargadorReportes()
+        try:
+            if NAVEGACION_POR_SECCION:
+                seccion = ejecutar_seccion_activa(cargador)
+            else:
+                seccion = "Todas las secciones"
+                precargar_reportes(cargador=cargador)
+                organizacion_crud()
+                for _, funcion, reporte in SECCIONES[1:]:
+                    funcion(cargador)
+        finally:
+            cargador.cancelar()
+        render_tiempos(seccion, time.perf_counter() - inicio, cargador)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,43 @@
+# migrations/cascadas.py
+from sqlalchemy.schema import CreateIndex
+from db.connection import get_engine
+from models import Base, Recurso
+
+# Nombre y acción ON DELETE de la FK de una columna (los nombres difieren según
+# se haya creado la BD con DDL.sql o con create_all)
+CONSTRAINT_FK = """
+SELECT c.conname, c.confdeltype
+FROM pg_constraint c
+JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+WHERE c.contype = 'f' AND c.conrelid = %(tabla)s::regclass
+  AND cardinality(c.conkey) = 1 AND a.attname = %(columna)s
+"""
+
+
+def create_cascadas():
+    """Pasa a ON DELETE CASCADE en una BD existente las llaves foráneas que models.py declara así"""
+    engine = get_engine()
+    with engine.begin() as conn:
+        for tabla in Base.metadata.sorted_tables:
+            for fk in tabla.foreign_keys:
+                if fk.ondelete != 'CASCADE':
+                    continue
+                columna = fk.parent.name
+                fila = conn.exec_driver_sql(CONSTRAINT_FK, {"tabla": tabla.name, "columna": columna}).first()
+                if fila is None or fila.confdeltype == 'c':
+                    continue
+                referencia = fk.column
+                acciones = " ON DELETE CASCADE" + (f" ON UPDATE {fk.onupdate}" if fk.onupdate else "")
+                # Mismo nombre y columnas: sólo cambia la acción al borrar
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {tabla.name} DROP CONSTRAINT {fila.conname}, "
+                    f"ADD CONSTRAINT {fila.conname} FOREIGN KEY ({columna}) "
+                    f"REFERENCES {referencia.table.name} ({referencia.name}){acciones}"
+                )
+                print(f"{tabla.name}.{columna}: {fila.conname} ON DELETE CASCADE")
+        # El borrado en cascada desde campana busca los recursos por campana_id
+        for index in Recurso.__table__.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+if __name__ == '__main__':
+    create_cascadas()
@@ -1,25 +1,24 @@
 # migrations/triggers.py
-from sqlalchemy import text
 from db.connection import get_engine
+from db.ddl import (
+    TRIGGERS_ESTADISTICAS, NOMBRES_TRIGGERS_ESTADISTICAS,
+    TRIGGERS_DONACION_DIARIA, NOMBRES_TRIGGERS_DONACION_DIARIA, RECONSTRUIR_DONACION_DIARIA,
+)
 
 def create_triggers():
+    """Instala en una BD existente los triggers de DDL.sql (FOR EACH STATEMENT) y llena el resumen diario"""
     engine = get_engine()
-    with engine.connect() as conn:
-        # Función para actualizar estadísticas
-        conn.execute(text("""
-        CREATE OR REPLACE FUNCTION actualizar_estadisticas_campana()
-        RETURNS TRIGGER AS $$
-        BEGIN
-            -- Lógica del trigger
-        END;
-        $$ LANGUAGE plpgsql;
-        """))
-        
-        # Trigger para donaciones
-        conn.execute(text("""
-        CREATE TRIGGER tr_actualizar_estadisticas
-        AFTER INSERT OR UPDATE OR DELETE ON donacion
-        FOR EACH ROW EXECUTE FUNCTION actualizar_estadisticas_campana();
-        """))
-        
-        conn.commit()
\ No newline at end of file
+    with engine.begin() as conn:
+        # Triggers por fila anteriores y el de esta migración en su versión inicial
+        conn.exec_driver_sql("DROP TRIGGER IF EXISTS tr_actualizar_estadisticas ON donacion")
+        conn.exec_driver_sql("DROP FUNCTION IF EXISTS actualizar_estadisticas_campana()")
+        for nombre, tabla in NOMBRES_TRIGGERS_ESTADISTICAS + NOMBRES_TRIGGERS_DONACION_DIARIA:
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {nombre} ON {tabla}")
+        for sql in TRIGGERS_ESTADISTICAS + TRIGGERS_DONACION_DIARIA:
+            conn.exec_driver_sql(sql)
+        # El resumen diario se llena desde cero; los triggers lo mantienen desde aquí
+        conn.exec_driver_sql("LOCK TABLE donacion IN SHARE MODE")
+        conn.exec_driver_sql(RECONSTRUIR_DONACION_DIARIA)
+
+if __name__ == '__main__':
+    create_triggers()
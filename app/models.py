@@ -1,10 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, Date, Time, Numeric, ForeignKey, Enum, TIMESTAMP, CheckConstraint, UniqueConstraint, text
+from sqlalchemy import Column, Integer, String, Text, Boolean, Date, Time, Numeric, ForeignKey, Enum, TIMESTAMP, CheckConstraint, UniqueConstraint, Index, text
+from sqlalchemy.dialects.postgresql import ENUM as PG_ENUM
 from sqlalchemy.orm import declarative_base, relationship
 import enum
 
 Base = declarative_base()
 
-# Enums
+# Enums (los tipos los crea DDL.sql; las columnas usan sus nombres porque
+# asyncpg envía los parámetros con el tipo de la columna: $1::tipo_donacion)
 class EstadoCampanaEnum(enum.Enum):
     planificada = 'planificada'
     activa = 'activa'
@@ -92,17 +94,20 @@ class Campana(Base):
     fecha_inicio = Column(Date, nullable=False)
     fecha_fin = Column(Date)
     meta_monetaria = Column(Numeric(12, 2), CheckConstraint('meta_monetaria > 0'))
-    estado = Column(Enum(EstadoCampanaEnum), nullable=False, server_default=text("'planificada'"))
+    estado = Column(PG_ENUM(EstadoCampanaEnum, name='estado_campana', create_type=False), nullable=False, server_default=text("'planificada'"))
     __table_args__ = (
         CheckConstraint('fecha_fin IS NULL OR fecha_fin >= fecha_inicio', name='chk_fechas'),
+        Index('idx_campana_organizacion', 'organizacion_id'),
+        Index('idx_campana_fecha_inicio', 'fecha_inicio'),
     )
     organizacion = relationship('Organizacion', back_populates='campanas')
     categoria = relationship('Categoria', back_populates='campanas')
     sede_principal = relationship('Sede', back_populates='campanas')
-    actividades = relationship('Actividad', back_populates='campana')
-    donaciones = relationship('Donacion', back_populates='campana', cascade='all, delete-orphan')
-    recursos = relationship('Recurso', back_populates='campana', cascade='all, delete-orphan')
-    estadisticas = relationship('EstadisticasCampana', back_populates='campana', uselist=False, cascade='all, delete-orphan')
+    # Sin cascada: la FK de actividad rechaza borrar una campaña con actividades
+    actividades = relationship('Actividad', back_populates='campana', passive_deletes='all')
+    donaciones = relationship('Donacion', back_populates='campana', cascade='all, delete-orphan', passive_deletes=True)
+    recursos = relationship('Recurso', back_populates='campana', cascade='all, delete-orphan', passive_deletes=True)
+    estadisticas = relationship('EstadisticasCampana', back_populates='campana', uselist=False, cascade='all, delete-orphan', passive_deletes=True)
 
 class Actividad(Base):
     __tablename__ = 'actividad'
@@ -116,9 +121,10 @@ class Actividad(Base):
     capacidad_max = Column(Integer, CheckConstraint('capacidad_max > 0'))
     __table_args__ = (
         CheckConstraint('fecha_fin > fecha_inicio', name='chk_fechas_actividad'),
+        Index('idx_actividad_campana', 'campana_id'),
     )
     campana = relationship('Campana', back_populates='actividades')
-    voluntarios = relationship('VoluntarioActividad', back_populates='actividad', cascade='all, delete-orphan')
+    voluntarios = relationship('VoluntarioActividad', back_populates='actividad', cascade='all, delete-orphan', passive_deletes=True)
     sede = relationship('Sede')
 
 class Donante(Base):
@@ -139,13 +145,13 @@ class Donante(Base):
             name='chk_tipo_donante'
         ),
     )
-    donaciones = relationship('Donacion', back_populates='donante', cascade='all, delete-orphan')
-    preferencias_contacto = relationship('PreferenciaContacto', back_populates='donante', cascade='all, delete-orphan')
+    donaciones = relationship('Donacion', back_populates='donante', cascade='all, delete-orphan', passive_deletes=True)
+    preferencias_contacto = relationship('PreferenciaContacto', back_populates='donante', cascade='all, delete-orphan', passive_deletes=True)
 
 class PreferenciaContacto(Base):
     __tablename__ = 'preferencia_contacto'
     preferencia_id = Column(Integer, primary_key=True, autoincrement=True)
-    donante_id = Column(Integer, ForeignKey('donante.donante_id'))
+    donante_id = Column(Integer, ForeignKey('donante.donante_id', ondelete='CASCADE'))
     tipo = Column(Enum(TipoContactoEnum), nullable=False)
     permitido = Column(Boolean, server_default=text('TRUE'))
     __table_args__ = (
@@ -157,8 +163,8 @@ class Donacion(Base):
     __tablename__ = 'donacion'
     donacion_id = Column(Integer, primary_key=True, autoincrement=True)
     donante_id = Column(Integer, ForeignKey('donante.donante_id', ondelete='CASCADE', onupdate='CASCADE'), nullable=False)
-    campana_id = Column(Integer, ForeignKey('campana.campana_id'), nullable=False)
-    tipo = Column(Enum(TipoDonacionEnum), nullable=False)
+    campana_id = Column(Integer, ForeignKey('campana.campana_id', ondelete='CASCADE'), nullable=False)
+    tipo = Column(PG_ENUM(TipoDonacionEnum, name='tipo_donacion', create_type=False), nullable=False)
     monto = Column(Numeric(12, 2), CheckConstraint('monto > 0'))
     descripcion_especie = Column(Text)
     fecha = Column(TIMESTAMP, nullable=False, server_default=text('CURRENT_TIMESTAMP'))
@@ -170,6 +176,10 @@ class Donacion(Base):
             "(tipo = 'especie' AND descripcion_especie IS NOT NULL)",
             name='chk_tipo_donacion'
         ),
+        # Índices de cobertura: los reportes agregan monto sin tocar la tabla
+        Index('idx_donacion_campana', 'campana_id', postgresql_include=['monto']),
+        Index('idx_donacion_donante', 'donante_id', postgresql_include=['monto']),
+        Index('idx_donacion_fecha', 'fecha', postgresql_include=['campana_id', 'donante_id', 'monto']),
     )
     campana = relationship('Campana', back_populates='donaciones')
     donante = relationship('Donante', back_populates='donaciones')
@@ -188,15 +198,16 @@ class Voluntario(Base):
     __table_args__ = (
         CheckConstraint("fecha_nacimiento <= CURRENT_DATE - INTERVAL '16 years'", name='chk_edad'),
         CheckConstraint("email ~* '^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\\.[A-Za-z]{2,}$'", name='chk_email_voluntario'),
+        Index('idx_voluntario_fecha_nacimiento', 'fecha_nacimiento', postgresql_include=['voluntario_id']),
     )
-    disponibilidades = relationship('DisponibilidadVoluntario', back_populates='voluntario', cascade='all, delete-orphan')
-    actividades = relationship('VoluntarioActividad', back_populates='voluntario', cascade='all, delete-orphan')
-    habilidades = relationship('VoluntarioHabilidad', back_populates='voluntario', cascade='all, delete-orphan')
+    disponibilidades = relationship('DisponibilidadVoluntario', back_populates='voluntario', cascade='all, delete-orphan', passive_deletes=True)
+    actividades = relationship('VoluntarioActividad', back_populates='voluntario', cascade='all, delete-orphan', passive_deletes=True)
+    habilidades = relationship('VoluntarioHabilidad', back_populates='voluntario', cascade='all, delete-orphan', passive_deletes=True)
 
 class DisponibilidadVoluntario(Base):
     __tablename__ = 'disponibilidad_voluntario'
     disponibilidad_id = Column(Integer, primary_key=True, autoincrement=True)
-    voluntario_id = Column(Integer, ForeignKey('voluntario.voluntario_id'))
+    voluntario_id = Column(Integer, ForeignKey('voluntario.voluntario_id', ondelete='CASCADE'))
     dia = Column(Enum(DiaSemanaEnum), nullable=False)
     hora_inicio = Column(Time, nullable=False)
     hora_fin = Column(Time, nullable=False)
@@ -212,34 +223,43 @@ class Habilidad(Base):
     nombre = Column(String(50), nullable=False, unique=True)
     descripcion = Column(Text)
     categoria = Column(String(50))
-    voluntarios = relationship('VoluntarioHabilidad', back_populates='habilidad', cascade='all, delete-orphan')
+    voluntarios = relationship('VoluntarioHabilidad', back_populates='habilidad', cascade='all, delete-orphan', passive_deletes=True)
 
 class Recurso(Base):
     __tablename__ = 'recurso'
     recurso_id = Column(Integer, primary_key=True, autoincrement=True)
-    campana_id = Column(Integer, ForeignKey('campana.campana_id'), nullable=False)
+    campana_id = Column(Integer, ForeignKey('campana.campana_id', ondelete='CASCADE'), nullable=False)
     nombre = Column(String(100), nullable=False)
     descripcion = Column(Text)
     cantidad_requerida = Column(Integer, CheckConstraint('cantidad_requerida > 0'), nullable=False)
     cantidad_actual = Column(Integer, CheckConstraint('cantidad_actual >= 0'), nullable=False, server_default=text('0'))
     unidad_medida = Column(String(20))
+    __table_args__ = (
+        # El borrado en cascada desde campana busca los recursos por campana_id
+        Index('idx_recurso_campana', 'campana_id'),
+    )
     campana = relationship('Campana', back_populates='recursos')
 
 class VoluntarioActividad(Base):
     __tablename__ = 'voluntario_actividad'
-    voluntario_id = Column(Integer, ForeignKey('voluntario.voluntario_id'), primary_key=True)
-    actividad_id = Column(Integer, ForeignKey('actividad.actividad_id'), primary_key=True)
+    voluntario_id = Column(Integer, ForeignKey('voluntario.voluntario_id', ondelete='CASCADE'), primary_key=True)
+    actividad_id = Column(Integer, ForeignKey('actividad.actividad_id', ondelete='CASCADE'), primary_key=True)
     fecha_registro = Column(TIMESTAMP, nullable=False, server_default=text('CURRENT_TIMESTAMP'))
     horas_dedicadas = Column(Numeric(5, 2), server_default=text('0'))
     comentarios = Column(Text)
     estado = Column(String(20), server_default=text("'pendiente'"))
+    __table_args__ = (
+        # La PK (voluntario_id, actividad_id) no sirve para buscar por actividad
+        Index('idx_voluntario_actividad_actividad', 'actividad_id'),
+        Index('idx_voluntario_actividad_fecha', 'fecha_registro', postgresql_include=['actividad_id', 'voluntario_id']),
+    )
     voluntario = relationship('Voluntario', back_populates='actividades')
     actividad = relationship('Actividad', back_populates='voluntarios')
 
 class VoluntarioHabilidad(Base):
     __tablename__ = 'voluntario_habilidad'
-    voluntario_id = Column(Integer, ForeignKey('voluntario.voluntario_id'), primary_key=True)
-    habilidad_id = Column(Integer, ForeignKey('habilidad.habilidad_id'), primary_key=True)
+    voluntario_id = Column(Integer, ForeignKey('voluntario.voluntario_id', ondelete='CASCADE'), primary_key=True)
+    habilidad_id = Column(Integer, ForeignKey('habilidad.habilidad_id', ondelete='CASCADE'), primary_key=True)
     nivel = Column(Enum(NivelHabilidadEnum), nullable=False, server_default=text("'básico'"))
     anios_experiencia = Column(Integer, CheckConstraint('anios_experiencia >= 0'))
     certificado = Column(Boolean, server_default=text('FALSE'))
@@ -248,7 +268,7 @@ class VoluntarioHabilidad(Base):
 
 class EstadisticasCampana(Base):
     __tablename__ = 'estadisticas_campana'
-    campana_id = Column(Integer, ForeignKey('campana.campana_id'), primary_key=True)
+    campana_id = Column(Integer, ForeignKey('campana.campana_id', ondelete='CASCADE'), primary_key=True)
     monto_recaudado = Column(Numeric(12, 2), server_default=text('0'))
     porcentaje_meta = Column(Numeric(5, 2), server_default=text('0'))
     num_donaciones = Column(Integer, server_default=text('0'))
@@ -256,22 +276,31 @@ class EstadisticasCampana(Base):
     ultima_actualizacion = Column(TIMESTAMP, server_default=text('CURRENT_TIMESTAMP'))
     campana = relationship('Campana', back_populates='estadisticas')
 
-# Vista para reportes: total donado por campaña
+# Resumen diario de donaciones, mantenido por triggers sobre donacion (ver db/ddl.py)
+class DonacionDiaria(Base):
+    __tablename__ = 'donacion_diaria'
+    dia = Column(Date, primary_key=True)
+    campana_id = Column(Integer, primary_key=True)
+    donante_id = Column(Integer, primary_key=True)
+    tipo = Column(PG_ENUM(TipoDonacionEnum, name='tipo_donacion', create_type=False), primary_key=True)
+    monto_total = Column(Numeric(14, 2), nullable=False, server_default=text('0'))
+    num_donaciones = Column(Integer, nullable=False, server_default=text('0'))
+    monto_min = Column(Numeric(12, 2))
+    monto_max = Column(Numeric(12, 2))
+
+# Vista materializada para reportes: total donado por campaña (ver db/ddl.py y services/vistas.py)
 class VistaDonacionesCampana(Base):
     __tablename__ = 'vista_donaciones_campana'
     __table_args__ = {'info': dict(is_view=True)}
 
     campana_id = Column(Integer, primary_key=True)
     nombre_campana = Column(String(100))
+    meta_monetaria = Column(Numeric(12, 2))
+    estado = Column(PG_ENUM(EstadoCampanaEnum, name='estado_campana', create_type=False))
     monto_total = Column(Numeric(12, 2))
     num_donaciones = Column(Integer)
     fecha_inicio = Column(Date)
     fecha_fin = Column(Date)
+    calculada_en = Column(TIMESTAMP(timezone=True))
 
-# Nota: Esta clase asume que existe una vista SQL llamada 'vista_donaciones_campana' en la base de datos.
-# Debes crearla en tu DDL.sql, por ejemplo:
-# CREATE OR REPLACE VIEW vista_donaciones_campana AS
-# SELECT c.campana_id, c.nombre AS nombre_campana, COALESCE(SUM(d.monto), 0) AS monto_total, COUNT(d.donacion_id) AS num_donaciones, c.fecha_inicio, c.fecha_fin
-# FROM campana c
-# LEFT JOIN donacion d ON d.campana_id = c.campana_id AND d.tipo = 'monetaria'
-# GROUP BY c.campana_id, c.nombre, c.fecha_inicio, c.fecha_fin;
+# La vista la crea db/ddl.py (VISTA_DONACIONES_CAMPANA); cuenta todas las donaciones, como los reportes.
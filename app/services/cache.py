@@ -0,0 +1,159 @@
+# services/cache.py
+# Caché de reportes de un solo proceso. Las versiones por tabla viven en la
+# memoria del proceso y sólo las incrementan los commits de sus propias sesiones
+# (registrar_cambios): las escrituras de otro proceso (otra réplica o worker,
+# la API, psql, los scripts de db/ y migrations/) no invalidan nada y se ven
+# recién al vencer el TTL. Con más de un proceso, o si importa ver de inmediato
+# los cambios ajenos, se apaga con REPORTES_CACHE=false.
+import datetime
+import decimal
+import enum
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+USAR_CACHE = os.getenv("REPORTES_CACHE", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+# Versión por tabla: cada commit que modifica una tabla la incrementa, y como la
+# versión forma parte de la clave, las entradas anteriores dejan de coincidir.
+_versiones: dict[str, int] = {}
+_versiones_lock = threading.Lock()
+
+
+def version_tablas(tablas) -> tuple:
+    with _versiones_lock:
+        return tuple(_versiones.get(t, 0) for t in tablas)
+
+
+def invalidar_tablas(*tablas: str):
+    with _versiones_lock:
+        for tabla in tablas:
+            _versiones[tabla] = _versiones.get(tabla, 0) + 1
+
+
+def registrar_cambios(db: Session, *tablas: str):
+    """Marca tablas modificadas en la transacción actual; se invalidan al hacer commit."""
+    db.info.setdefault("tablas_modificadas", set()).update(tablas)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_al_confirmar(session):
+    tablas = session.info.pop("tablas_modificadas", None)
+    if tablas:
+        invalidar_tablas(*tablas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_al_revertir(session):
+    session.info.pop("tablas_modificadas", None)
+
+
+class CacheReportes:
+    """LRU acotado en tamaño con expiración por TTL y contadores de aciertos."""
+
+    def __init__(self, max_entradas: int = 128, ttl: float = 300):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expiradas = 0
+        self.desalojadas = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.misses += 1
+                return False, None
+            guardado_en, valor = entrada
+            if time.monotonic() - guardado_en > self.ttl:
+                del self._datos[clave]
+                self.expiradas += 1
+                self.misses += 1
+                return False, None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return True, valor
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic(), valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.desalojadas += 1
+
+    def limpiar(self):
+        with self._lock:
+            self._datos.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "entradas": len(self._datos),
+                "hits": self.hits,
+                "misses": self.misses,
+                "tasa_aciertos": self.hits / consultas if consultas else 0.0,
+                "expiradas": self.expiradas,
+                "desalojadas": self.desalojadas,
+            }
+
+
+cache_reportes = CacheReportes(
+    max_entradas=int(os.getenv("REPORTES_CACHE_MAX", "128")),
+    ttl=float(os.getenv("REPORTES_CACHE_TTL", "300")),
+)
+
+
+def get_cache_stats() -> dict:
+    return cache_reportes.stats()
+
+
+def _normalizar(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    if isinstance(valor, bool) or valor is None:
+        return valor
+    if isinstance(valor, (int, float, decimal.Decimal)):
+        return float(valor)
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def cache_reporte(*tablas: str):
+    """Cachea un reporte por nombre, filtros normalizados y versión de las tablas que lee."""
+    def decorador(func):
+        firma = inspect.signature(func)
+
+        @wraps(func)
+        def envoltura(db, *args, **kwargs):
+            if not USAR_CACHE:
+                return func(db, *args, **kwargs)
+            argumentos = firma.bind(db, *args, **kwargs)
+            argumentos.apply_defaults()
+            filtros = tuple(sorted(
+                (nombre, _normalizar(valor))
+                for nombre, valor in argumentos.arguments.items()
+                if nombre != "db"
+            ))
+            # La fecha de hoy entra en la clave porque los filtros de edad dependen de ella
+            clave = (func.__name__, filtros, version_tablas(tablas), datetime.date.today())
+            encontrado, valor = cache_reportes.obtener(clave)
+            if not encontrado:
+                valor = func(db, *args, **kwargs)
+                cache_reportes.guardar(clave, valor)
+            # Copia por fila: los llamadores modifican los diccionarios que reciben
+            return [dict(fila) for fila in valor]
+
+        envoltura.sin_cache = func
+        return envoltura
+    return decorador
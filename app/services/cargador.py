@@ -0,0 +1,69 @@
+# services/cargador.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from db.connection import get_session, session_scope
+
+logger = logging.getLogger(__name__)
+
+# Hilos compartidos por todas las ejecuciones del script; no conviene pasar de
+# DB_POOL_SIZE + DB_MAX_OVERFLOW, cada hilo ocupa una conexión mientras consulta
+REPORTES_HILOS = int(os.getenv("REPORTES_HILOS", "5"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=REPORTES_HILOS, thread_name_prefix="reporte")
+    return _executor
+
+
+class CargadorReportes:
+    """Lanza los reportes de la página a la vez y entrega cada resultado cuando su sección lo pide.
+
+    Cada reporte corre en un hilo con su propia sesión (y conexión del pool);
+    la página tarda lo que el reporte más lento y no la suma de todos.
+    """
+
+    def __init__(self):
+        self._pendientes = {}
+        self.tiempos = {}
+
+    def lanzar(self, nombre: str, funcion, **filtros):
+        futuro = _get_executor().submit(self._ejecutar, nombre, funcion, filtros)
+        self._pendientes[nombre] = (funcion, filtros, futuro)
+
+    def _ejecutar(self, nombre, funcion, filtros):
+        inicio = time.perf_counter()
+        try:
+            with session_scope() as db:
+                return funcion(db, **filtros)
+        finally:
+            self.tiempos[nombre] = time.perf_counter() - inicio
+            logger.debug("Reporte %s cargado en %.3fs", nombre, self.tiempos[nombre])
+
+    def resultado(self, nombre: str, funcion, **filtros):
+        """Resultado del reporte lanzado con estos filtros; si no se lanzó (o con otros), se consulta aquí."""
+        lanzado = self._pendientes.pop(nombre, None)
+        if lanzado is not None and lanzado[0] is funcion and lanzado[1] == filtros:
+            return lanzado[2].result()
+        inicio = time.perf_counter()
+        try:
+            return funcion(get_session(), **filtros)
+        finally:
+            self.tiempos[nombre] = time.perf_counter() - inicio
+
+    def cancelar(self, *nombres: str):
+        """Descarta los reportes indicados (todos si no se indica ninguno) que nadie recogió."""
+        # Los que ya empezaron terminan solos; sus sesiones se cierran en session_scope
+        for nombre in nombres or list(self._pendientes):
+            lanzado = self._pendientes.pop(nombre, None)
+            if lanzado is not None:
+                lanzado[2].cancel()
@@ -1,32 +1,50 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
 from models import Campana
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
+from services.paginacion import Pagina, TAMANO_PAGINA, estimar_total, paginar, paginar_dataframe, proyeccion_plana
 from typing import Optional
 
 def get_campanas(db: Session):
     return db.query(Campana).all()
 
+def get_campanas_pagina(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    stmt = select(Campana)
+    pagina = paginar(db, stmt, [Campana.campana_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "campana")
+    return pagina
+
+def consulta_listado_campanas():
+    stmt = select(*proyeccion_plana(*Campana.__table__.columns))
+    return stmt
+
+def listar_campanas(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    pagina = paginar_dataframe(db, consulta_listado_campanas(), [Campana.campana_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "campana")
+    return pagina
+
 def get_campana(db: Session, campana_id: int):
     return db.query(Campana).filter(Campana.campana_id == campana_id).first()
 
 def create_campana(db: Session, data: dict):
-    campana = Campana(**data)
-    db.add(campana)
-    db.commit()
-    db.refresh(campana)
+    campana = insertar(db, Campana, data)
+    registrar_cambios(db, "campana")
+    confirmar(db)
     return campana
 
 def update_campana(db: Session, campana_id: int, data: dict):
-    campana = get_campana(db, campana_id)
-    if not campana:
-        return None
     # Validate that organizacion_id is not None
     if "organizacion_id" in data and data["organizacion_id"] is None:
         raise ValueError("El campo 'organizacion_id' no puede ser nulo.")
-    for key, value in data.items():
-        setattr(campana, key, value)
-    db.commit()
-    db.refresh(campana)
+    campana = actualizar(db, Campana, Campana.campana_id == campana_id, data)
+    if not campana:
+        return None
+    registrar_cambios(db, "campana")
+    confirmar(db)
     return campana
 
 def delete_campana(db: Session, campana_id: int):
@@ -35,23 +53,19 @@ def delete_campana(db: Session, campana_id: int):
         campana = get_campana(db, campana_id)
         if not campana:
             return False
-            
-        # First try to set organizacion_id to NULL if there are dependencies
-        db.execute(
-            text("UPDATE campana SET organizacion_id = NULL WHERE campana_id = :campana_id"),
-            {"campana_id": campana_id}
-        )
-        
-        # Then delete the campaign
+
+        # Donaciones, recursos y estadísticas los borra la BD (ON DELETE CASCADE);
+        # las actividades no tienen cascada y la FK rechaza el borrado
         db.delete(campana)
-        db.commit()
+        registrar_cambios(db, "campana", "donacion", "recurso", "estadisticas_campana")
+        confirmar(db)
         return True
         
     except IntegrityError as e:
         db.rollback()
         # If there are still dependencies, we need to handle them
-        if "foreign key violation" in str(e.orig).lower():
-            raise ValueError("No se puede eliminar la campaña porque tiene donaciones u otras dependencias asociadas")
+        if "foreign key" in str(e.orig).lower():
+            raise ValueError("No se puede eliminar la campaña porque tiene actividades asociadas")
         raise ValueError(f"Error de integridad al eliminar la campaña: {str(e)}")
     except Exception as e:
         db.rollback()
@@ -0,0 +1,44 @@
+# services/crud_categoria.py
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from models import Categoria
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
+from typing import List, Optional
+
+def get_categorias(db: Session) -> List[Categoria]:
+    return db.query(Categoria).order_by(Categoria.categoria_id).all()
+
+def get_categoria(db: Session, categoria_id: int) -> Optional[Categoria]:
+    return db.query(Categoria).filter(Categoria.categoria_id == categoria_id).first()
+
+def create_categoria(db: Session, data: dict) -> Categoria:
+    data.pop('categoria_id', None)
+    try:
+        categoria = insertar(db, Categoria, data)
+        registrar_cambios(db, "categoria")
+        confirmar(db)
+    except IntegrityError as e:
+        db.rollback()
+        raise ValueError(f"Error al crear categoría: {e.orig}")
+    return categoria
+
+def update_categoria(db: Session, categoria_id: int, data: dict) -> Optional[Categoria]:
+    categoria = actualizar(db, Categoria, Categoria.categoria_id == categoria_id, data)
+    if categoria:
+        registrar_cambios(db, "categoria")
+        confirmar(db)
+    return categoria
+
+def delete_categoria(db: Session, categoria_id: int) -> bool:
+    categoria = get_categoria(db, categoria_id)
+    if not categoria:
+        return False
+    db.delete(categoria)
+    registrar_cambios(db, "categoria", "campana")
+    try:
+        confirmar(db)
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("No se puede eliminar la categoría porque tiene campañas asociadas")
+    return True
@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Session
 from models import Donacion
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
 from typing import Optional
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
+from sqlalchemy import select
+from services.paginacion import Pagina, TAMANO_PAGINA, estimar_total, paginar, paginar_dataframe, proyeccion_plana
 
 def get_donaciones(db: Session, campana_id: Optional[int] = None):
     query = db.query(Donacion)
@@ -10,6 +12,27 @@ def get_donaciones(db: Session, campana_id: Optional[int] = None):
         query = query.filter(Donacion.campana_id == campana_id)
     return query.all()
 
+def get_donaciones_pagina(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, campana_id: Optional[int] = None, estimar: bool = False) -> Pagina:
+    stmt = select(Donacion)
+    if campana_id:
+        stmt = stmt.where(Donacion.campana_id == campana_id)
+    pagina = paginar(db, stmt, [Donacion.donacion_id], cursor, limite)
+    if estimar and not campana_id:
+        pagina.total_estimado = estimar_total(db, "donacion")
+    return pagina
+
+def consulta_listado_donaciones(campana_id: Optional[int] = None):
+    stmt = select(*proyeccion_plana(*Donacion.__table__.columns))
+    if campana_id:
+        stmt = stmt.where(Donacion.campana_id == campana_id)
+    return stmt
+
+def listar_donaciones(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, campana_id: Optional[int] = None, estimar: bool = False) -> Pagina:
+    pagina = paginar_dataframe(db, consulta_listado_donaciones(campana_id), [Donacion.donacion_id], cursor, limite)
+    if estimar and not campana_id:
+        pagina.total_estimado = estimar_total(db, "donacion")
+    return pagina
+
 def get_donacion(db: Session, donacion_id: int):
     return db.query(Donacion).filter(Donacion.donacion_id == donacion_id).first()
 
@@ -18,31 +41,20 @@ def create_donacion(db: Session, data: dict):
         # Ensure we're not trying to set the ID manually
         data.pop('donacion_id', None)
         
-        donacion = Donacion(**data)
-        db.add(donacion)
-        db.commit()
-        db.refresh(donacion)
+        donacion = insertar(db, Donacion, data)
+        registrar_cambios(db, "donacion", "estadisticas_campana")
+        confirmar(db)
         return donacion
-    except IntegrityError as e:
-        db.rollback()
-        if "duplicate key value violates unique constraint" in str(e.orig):
-            # Reset the sequence for the primary key
-            db.execute(text("SELECT setval(pg_get_serial_sequence('donacion', 'donacion_id'), MAX(donacion_id)) FROM donacion;"))
-            db.commit()
-            raise ValueError("Duplicate key detected. Sequence reset. Please try again.")
-        raise e
-    except Exception as e:
+    except Exception:
         db.rollback()
-        raise e
+        raise
 
 def update_donacion(db: Session, donacion_id: int, data: dict):
-    donacion = get_donacion(db, donacion_id)
+    donacion = actualizar(db, Donacion, Donacion.donacion_id == donacion_id, data)
     if not donacion:
         return None
-    for key, value in data.items():
-        setattr(donacion, key, value)
-    db.commit()
-    db.refresh(donacion)
+    registrar_cambios(db, "donacion", "estadisticas_campana")
+    confirmar(db)
     return donacion
 
 def delete_donacion(db: Session, donacion_id: int):
@@ -50,5 +62,6 @@ def delete_donacion(db: Session, donacion_id: int):
     if not donacion:
         return False
     db.delete(donacion)
-    db.commit()
+    registrar_cambios(db, "donacion", "estadisticas_campana")
+    confirmar(db)
     return True
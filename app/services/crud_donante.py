@@ -1,11 +1,32 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
+from sqlalchemy import select
 from models import Donante
+from services.paginacion import Pagina, TAMANO_PAGINA, estimar_total, paginar, paginar_dataframe, proyeccion_plana
+from typing import Optional
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
 
 def get_donantes(db: Session):
     return db.query(Donante).all()
 
+def get_donantes_pagina(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    stmt = select(Donante)
+    pagina = paginar(db, stmt, [Donante.donante_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "donante")
+    return pagina
+
+def consulta_listado_donantes():
+    stmt = select(*proyeccion_plana(*Donante.__table__.columns))
+    return stmt
+
+def listar_donantes(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    pagina = paginar_dataframe(db, consulta_listado_donantes(), [Donante.donante_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "donante")
+    return pagina
+
 def get_donante(db: Session, donante_id: int):
     return db.query(Donante).filter(Donante.donante_id == donante_id).first()
 
@@ -13,33 +34,26 @@ def create_donante(db: Session, data: dict):
     try:
         # No permitir setear donante_id manualmente
         data.pop('donante_id', None)
-        donante = Donante(**data)
-        db.add(donante)
-        db.commit()
-        db.refresh(donante)
+        donante = insertar(db, Donante, data)
+        registrar_cambios(db, "donante")
+        confirmar(db)
         return donante
     except IntegrityError as e:
         db.rollback()
-        # Si es un error de clave duplicada, intentar resetear la secuencia y avisar al usuario
-        if "duplicate key value violates unique constraint" in str(e.orig):
-            db.execute(text("SELECT setval(pg_get_serial_sequence('donante', 'donante_id'), COALESCE(MAX(donante_id), 1)) FROM donante;"))
-            db.commit()
-            raise ValueError("Error: Secuencia de Donante desincronizada. Intente de nuevo.")
         raise ValueError(f"Error al crear donante: {e}")
 
 def update_donante(db: Session, donante_id: int, data: dict):
-    donante = get_donante(db, donante_id)
+    donante = actualizar(db, Donante, Donante.donante_id == donante_id, data)
     if donante:
-        for key, value in data.items():
-            setattr(donante, key, value)
-        db.commit()
-        db.refresh(donante)
+        registrar_cambios(db, "donante")
+        confirmar(db)
     return donante
 
 def delete_donante(db: Session, donante_id: int):
     donante = get_donante(db, donante_id)
     if donante:
         db.delete(donante)
-        db.commit()
+        registrar_cambios(db, "donante", "donacion", "preferencia_contacto", "estadisticas_campana")
+        confirmar(db)
         return True
     return False
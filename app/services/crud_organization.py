@@ -1,13 +1,32 @@
 # services/crud_organizacion.py
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
-from models import Organizacion, Campana
-from typing import List, Optional
+from sqlalchemy import delete, func, select
+from models import Actividad, Campana, Donacion, EstadisticasCampana, Organizacion, Recurso, VoluntarioActividad
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
+from services.paginacion import Pagina, TAMANO_PAGINA, estimar_total, paginar, paginar_dataframe, proyeccion_plana
+from typing import Dict, List, Optional
 
 def get_organizaciones(db: Session, skip: int = 0, limit: int = 100) -> List[Organizacion]:
     return db.query(Organizacion).offset(skip).limit(limit).all()
 
+def get_organizaciones_pagina(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    stmt = select(Organizacion)
+    pagina = paginar(db, stmt, [Organizacion.organizacion_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "organizacion")
+    return pagina
+
+def consulta_listado_organizaciones():
+    stmt = select(*proyeccion_plana(*Organizacion.__table__.columns))
+    return stmt
+
+def listar_organizaciones(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    pagina = paginar_dataframe(db, consulta_listado_organizaciones(), [Organizacion.organizacion_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "organizacion")
+    return pagina
+
 def get_organizacion(db: Session, organizacion_id: int) -> Optional[Organizacion]:
     return db.query(Organizacion).filter(Organizacion.organizacion_id == organizacion_id).first()
 
@@ -16,44 +35,59 @@ def create_organizacion(db: Session, organizacion_data: dict):
         # Ensure we're not trying to set the ID manually
         organizacion_data.pop('organizacion_id', None)
         
-        db_organizacion = Organizacion(**organizacion_data)
-        db.add(db_organizacion)
-        db.commit()
-        db.refresh(db_organizacion)
+        db_organizacion = insertar(db, Organizacion, organizacion_data)
+        registrar_cambios(db, "organizacion")
+        confirmar(db)
         return db_organizacion
-    except IntegrityError as e:
+    except Exception:
         db.rollback()
-        if "duplicate key value violates unique constraint" in str(e.orig):
-            # Reset the sequence for the primary key
-            db.execute(text("SELECT setval(pg_get_serial_sequence('organizacion', 'organizacion_id'), MAX(organizacion_id)) FROM organizacion;"))
-            db.commit()
-            raise ValueError("Duplicate key detected. Sequence reset. Please try again.")
-        raise e
-    except Exception as e:
-        db.rollback()
-        raise e
+        raise
 
 def update_organizacion(db: Session, organizacion_id: int, update_data: dict) -> Optional[Organizacion]:
-    org = get_organizacion(db, organizacion_id)
+    org = actualizar(db, Organizacion, Organizacion.organizacion_id == organizacion_id, update_data)
     if org:
-        for key, value in update_data.items():
-            setattr(org, key, value)
-        db.commit()
-        db.refresh(org)
+        registrar_cambios(db, "organizacion")
+        confirmar(db)
     return org
 
-def delete_organizacion(db: Session, organizacion_id: int) -> bool:
-    org = get_organizacion(db, organizacion_id)
-    if not org:
-        return False
-    # Delete all related activities for each campaign
-    from models import Actividad  # Import here to avoid circular import
-    campanas = db.query(Campana).filter(Campana.organizacion_id == organizacion_id).all()
-    for campana in campanas:
-        actividades = db.query(Actividad).filter(Actividad.campana_id == campana.campana_id).all()
-        for actividad in actividades:
-            db.delete(actividad)
-        db.delete(campana)
-    db.delete(org)
-    db.commit()
-    return True
\ No newline at end of file
+def _borrado_organizacion(organizacion_id: int):
+    """(tabla, modelo, condición) de todo lo que cuelga de la organización, hojas primero."""
+    campanas = select(Campana.campana_id).where(Campana.organizacion_id == organizacion_id)
+    actividades = select(Actividad.actividad_id).where(Actividad.campana_id.in_(campanas))
+    # estadisticas_campana va después de donacion y voluntario_actividad: sus
+    # triggers la actualizan al borrar y volverían a insertar la fila
+    return [
+        ("voluntario_actividad", VoluntarioActividad, VoluntarioActividad.actividad_id.in_(actividades)),
+        ("actividad", Actividad, Actividad.campana_id.in_(campanas)),
+        ("donacion", Donacion, Donacion.campana_id.in_(campanas)),
+        ("recurso", Recurso, Recurso.campana_id.in_(campanas)),
+        ("estadisticas_campana", EstadisticasCampana, EstadisticasCampana.campana_id.in_(campanas)),
+        ("campana", Campana, Campana.organizacion_id == organizacion_id),
+        ("organizacion", Organizacion, Organizacion.organizacion_id == organizacion_id),
+    ]
+
+def delete_organizacion(db: Session, organizacion_id: int, simular: bool = False) -> Optional[Dict[str, int]]:
+    """Borra la organización y sus campañas con un DELETE por tabla, sin cargar filas en Python.
+
+    Devuelve las filas borradas por tabla, o None si la organización no existe.
+    Con simular=True sólo cuenta lo que se borraría (una consulta) y no modifica nada.
+    """
+    borrado = _borrado_organizacion(organizacion_id)
+    if simular:
+        conteos = db.execute(select(*(
+            select(func.count()).select_from(modelo).where(condicion).scalar_subquery().label(tabla)
+            for tabla, modelo, condicion in borrado
+        ))).one()._asdict()
+        return conteos if conteos["organizacion"] else None
+    conteos = {
+        tabla: db.execute(
+            delete(modelo).where(condicion).execution_options(synchronize_session=False)
+        ).rowcount
+        for tabla, modelo, condicion in borrado
+    }
+    if not conteos["organizacion"]:
+        # Sin organización no hay campañas: ningún DELETE tocó filas
+        return None
+    registrar_cambios(db, *conteos)
+    confirmar(db)
+    return conteos
@@ -0,0 +1,44 @@
+# services/crud_sede.py
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from models import Sede
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
+from typing import List, Optional
+
+def get_sedes(db: Session) -> List[Sede]:
+    return db.query(Sede).order_by(Sede.sede_id).all()
+
+def get_sede(db: Session, sede_id: int) -> Optional[Sede]:
+    return db.query(Sede).filter(Sede.sede_id == sede_id).first()
+
+def create_sede(db: Session, data: dict) -> Sede:
+    data.pop('sede_id', None)
+    try:
+        sede = insertar(db, Sede, data)
+        registrar_cambios(db, "sede")
+        confirmar(db)
+    except IntegrityError as e:
+        db.rollback()
+        raise ValueError(f"Error al crear sede: {e.orig}")
+    return sede
+
+def update_sede(db: Session, sede_id: int, data: dict) -> Optional[Sede]:
+    sede = actualizar(db, Sede, Sede.sede_id == sede_id, data)
+    if sede:
+        registrar_cambios(db, "sede")
+        confirmar(db)
+    return sede
+
+def delete_sede(db: Session, sede_id: int) -> bool:
+    sede = get_sede(db, sede_id)
+    if not sede:
+        return False
+    db.delete(sede)
+    registrar_cambios(db, "sede", "campana", "actividad")
+    try:
+        confirmar(db)
+    except IntegrityError:
+        db.rollback()
+        raise ValueError("No se puede eliminar la sede porque tiene campañas o actividades asociadas")
+    return True
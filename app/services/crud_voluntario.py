@@ -1,11 +1,32 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
+from sqlalchemy import select
 from models import Voluntario
+from services.paginacion import Pagina, TAMANO_PAGINA, estimar_total, paginar, paginar_dataframe, proyeccion_plana
+from typing import Optional
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
 
 def get_voluntarios(db: Session):
     return db.query(Voluntario).all()
 
+def get_voluntarios_pagina(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    stmt = select(Voluntario)
+    pagina = paginar(db, stmt, [Voluntario.voluntario_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "voluntario")
+    return pagina
+
+def consulta_listado_voluntarios():
+    stmt = select(*proyeccion_plana(*Voluntario.__table__.columns))
+    return stmt
+
+def listar_voluntarios(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, estimar: bool = False) -> Pagina:
+    pagina = paginar_dataframe(db, consulta_listado_voluntarios(), [Voluntario.voluntario_id], cursor, limite)
+    if estimar:
+        pagina.total_estimado = estimar_total(db, "voluntario")
+    return pagina
+
 def get_voluntario(db: Session, voluntario_id: int):
     return db.query(Voluntario).filter(Voluntario.voluntario_id == voluntario_id).first()
 
@@ -17,49 +38,30 @@ def create_voluntario(db: Session, data: dict):
             data["nivel_habilidad"] = (
                 data["nivel_habilidad"].lower().replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
             )
-        voluntario = Voluntario(**data)
-        db.add(voluntario)
-        db.commit()
-        db.refresh(voluntario)
+        voluntario = insertar(db, Voluntario, data)
+        registrar_cambios(db, "voluntario")
+        confirmar(db)
         return voluntario
     except IntegrityError as e:
         db.rollback()
-        # Si es un error de clave duplicada, resetear la secuencia y reintentar SOLO UNA VEZ
-        if "duplicate key value violates unique constraint" in str(e.orig):
-            db.execute(text("SELECT setval(pg_get_serial_sequence('voluntario', 'voluntario_id'), COALESCE(MAX(voluntario_id), 1)) FROM voluntario;"))
-            db.commit()
-            try:
-                if "nivel_habilidad" in data and isinstance(data["nivel_habilidad"], str):
-                    data["nivel_habilidad"] = (
-                        data["nivel_habilidad"].lower().replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
-                    )
-                voluntario = Voluntario(**data)
-                db.add(voluntario)
-                db.commit()
-                db.refresh(voluntario)
-                return voluntario
-            except IntegrityError as e2:
-                db.rollback()
-                raise ValueError(f"Error persistente de secuencia de Voluntario: {e2}")
         raise ValueError(f"Error al crear voluntario: {e}")
 
 def update_voluntario(db: Session, voluntario_id: int, data: dict):
-    voluntario = get_voluntario(db, voluntario_id)
+    if "nivel_habilidad" in data and isinstance(data["nivel_habilidad"], str):
+        data["nivel_habilidad"] = (
+            data["nivel_habilidad"].lower().replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
+        )
+    voluntario = actualizar(db, Voluntario, Voluntario.voluntario_id == voluntario_id, data)
     if voluntario:
-        if "nivel_habilidad" in data and isinstance(data["nivel_habilidad"], str):
-            data["nivel_habilidad"] = (
-                data["nivel_habilidad"].lower().replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
-            )
-        for key, value in data.items():
-            setattr(voluntario, key, value)
-        db.commit()
-        db.refresh(voluntario)
+        registrar_cambios(db, "voluntario")
+        confirmar(db)
     return voluntario
 
 def delete_voluntario(db: Session, voluntario_id: int):
     voluntario = get_voluntario(db, voluntario_id)
     if voluntario:
         db.delete(voluntario)
-        db.commit()
+        registrar_cambios(db, "voluntario", "voluntario_actividad", "voluntario_habilidad", "disponibilidad_voluntario", "estadisticas_campana")
+        confirmar(db)
         return True
     return False
\ No newline at end of file
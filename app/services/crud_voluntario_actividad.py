@@ -1,5 +1,9 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import and_, select
 from models import VoluntarioActividad
+from services.cache import registrar_cambios
+from services.escritura import actualizar, confirmar, insertar
+from services.paginacion import Pagina, TAMANO_PAGINA, estimar_total, paginar, paginar_dataframe, proyeccion_plana
 from typing import Optional
 
 def get_voluntario_actividades(db: Session, actividad_id: Optional[int] = None, voluntario_id: Optional[int] = None):
@@ -10,6 +14,31 @@ def get_voluntario_actividades(db: Session, actividad_id: Optional[int] = None,
         query = query.filter(VoluntarioActividad.voluntario_id == voluntario_id)
     return query.all()
 
+def get_voluntario_actividades_pagina(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, actividad_id: Optional[int] = None, voluntario_id: Optional[int] = None, estimar: bool = False) -> Pagina:
+    stmt = select(VoluntarioActividad)
+    if actividad_id:
+        stmt = stmt.where(VoluntarioActividad.actividad_id == actividad_id)
+    if voluntario_id:
+        stmt = stmt.where(VoluntarioActividad.voluntario_id == voluntario_id)
+    pagina = paginar(db, stmt, [VoluntarioActividad.voluntario_id, VoluntarioActividad.actividad_id], cursor, limite)
+    if estimar and not actividad_id and not voluntario_id:
+        pagina.total_estimado = estimar_total(db, "voluntario_actividad")
+    return pagina
+
+def consulta_listado_voluntario_actividades(actividad_id: Optional[int] = None, voluntario_id: Optional[int] = None):
+    stmt = select(*proyeccion_plana(*VoluntarioActividad.__table__.columns))
+    if actividad_id:
+        stmt = stmt.where(VoluntarioActividad.actividad_id == actividad_id)
+    if voluntario_id:
+        stmt = stmt.where(VoluntarioActividad.voluntario_id == voluntario_id)
+    return stmt
+
+def listar_voluntario_actividades(db: Session, cursor: Optional[str] = None, limite: int = TAMANO_PAGINA, actividad_id: Optional[int] = None, voluntario_id: Optional[int] = None, estimar: bool = False) -> Pagina:
+    pagina = paginar_dataframe(db, consulta_listado_voluntario_actividades(actividad_id, voluntario_id), [VoluntarioActividad.voluntario_id, VoluntarioActividad.actividad_id], cursor, limite)
+    if estimar and not actividad_id and not voluntario_id:
+        pagina.total_estimado = estimar_total(db, "voluntario_actividad")
+    return pagina
+
 def get_voluntario_actividad(db: Session, voluntario_id: int, actividad_id: int):
     return db.query(VoluntarioActividad).filter(
         VoluntarioActividad.voluntario_id == voluntario_id,
@@ -17,20 +46,20 @@ def get_voluntario_actividad(db: Session, voluntario_id: int, actividad_id: int)
     ).first()
 
 def create_voluntario_actividad(db: Session, data: dict):
-    va = VoluntarioActividad(**data)
-    db.add(va)
-    db.commit()
-    db.refresh(va)
+    va = insertar(db, VoluntarioActividad, data)
+    registrar_cambios(db, "voluntario_actividad", "estadisticas_campana")
+    confirmar(db)
     return va
 
 def update_voluntario_actividad(db: Session, voluntario_id: int, actividad_id: int, data: dict):
-    va = get_voluntario_actividad(db, voluntario_id, actividad_id)
+    va = actualizar(db, VoluntarioActividad, and_(
+        VoluntarioActividad.voluntario_id == voluntario_id,
+        VoluntarioActividad.actividad_id == actividad_id
+    ), data)
     if not va:
         return None
-    for key, value in data.items():
-        setattr(va, key, value)
-    db.commit()
-    db.refresh(va)
+    registrar_cambios(db, "voluntario_actividad")
+    confirmar(db)
     return va
 
 def delete_voluntario_actividad(db: Session, voluntario_id: int, actividad_id: int):
@@ -38,5 +67,6 @@ def delete_voluntario_actividad(db: Session, voluntario_id: int, actividad_id: i
     if not va:
         return False
     db.delete(va)
-    db.commit()
+    registrar_cambios(db, "voluntario_actividad", "estadisticas_campana")
+    confirmar(db)
     return True
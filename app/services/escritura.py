@@ -0,0 +1,60 @@
+# services/escritura.py
+from contextlib import contextmanager
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+# Profundidad de unidades de trabajo abiertas en la sesión (ver unidad_de_trabajo)
+_PROFUNDIDAD = "unidad_de_trabajo"
+
+
+def insertar(db: Session, modelo, data: dict):
+    """INSERT ... RETURNING: una sentencia, y la fila vuelve como objeto del modelo."""
+    return db.scalars(insert(modelo).values(**data).returning(modelo)).one()
+
+
+def actualizar(db: Session, modelo, condicion, data: dict):
+    """UPDATE ... WHERE ... RETURNING; None si ninguna fila cumple la condición."""
+    if not data:
+        return db.scalars(select(modelo).where(condicion)).first()
+    return db.scalars(update(modelo).where(condicion).values(**data).returning(modelo)).first()
+
+
+def _commit(db: Session):
+    """Commit sin expirar los objetos de la sesión.
+
+    Los crud_* devuelven la fila de INSERT/UPDATE ... RETURNING, ya al día:
+    expirarla haría que leerla tras el commit volviera a consultar. Fuera de
+    este commit la sesión conserva su expire_on_commit.
+    """
+    expirar = db.expire_on_commit
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expirar
+
+
+def confirmar(db: Session):
+    """Commit de una operación de crud_*, salvo dentro de una unidad de trabajo."""
+    if not db.info.get(_PROFUNDIDAD):
+        _commit(db)
+
+
+@contextmanager
+def unidad_de_trabajo(db: Session):
+    """Agrupa varias operaciones de crud_* en una sola transacción.
+
+    Dentro del bloque confirmar() no hace commit; al salir del bloque más
+    externo se confirma todo junto, o se revierte todo si hubo un error.
+    """
+    db.info[_PROFUNDIDAD] = db.info.get(_PROFUNDIDAD, 0) + 1
+    try:
+        yield db
+    except Exception:
+        db.info[_PROFUNDIDAD] -= 1
+        if not db.info[_PROFUNDIDAD]:
+            db.rollback()
+        raise
+    db.info[_PROFUNDIDAD] -= 1
+    if not db.info[_PROFUNDIDAD]:
+        _commit(db)
@@ -0,0 +1,96 @@
+# services/exportacion.py
+import csv
+import datetime
+import decimal
+import enum
+import io
+import os
+import tempfile
+import xlsxwriter
+from db.connection import get_engine
+
+# Filas por lote que se traen del cursor de servidor
+LOTE_FILAS = int(os.getenv("EXPORT_LOTE_FILAS", "5000"))
+# Límite de filas por hoja de Excel (1.048.576 menos el encabezado)
+MAX_FILAS_HOJA = 1_048_575
+
+
+def _valor_plano(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.value
+    return valor
+
+
+def _lotes(conn, stmt, lote: int):
+    # stream_results abre un cursor con nombre en el servidor: la memoria queda
+    # acotada a `lote` filas en lugar del resultado completo
+    resultado = conn.execution_options(stream_results=True, yield_per=lote).execute(stmt)
+    return list(resultado.keys()), resultado.partitions()
+
+
+def _contenido(archivo) -> bytes:
+    # st.download_button sólo acepta bytes, str, BytesIO o archivos de sólo
+    # lectura, y de todos modos lee el archivo completo a memoria al entregarlo
+    try:
+        archivo.seek(0)
+        return archivo.read()
+    finally:
+        archivo.close()
+
+
+def exportar_consulta_csv(stmt, lote: int = LOTE_FILAS) -> bytes:
+    """CSV de la consulta leída con cursor de servidor y escrito por lotes en un archivo temporal.
+
+    Mientras se consulta y escribe, la memoria queda acotada a un lote; el
+    archivo terminado se devuelve completo como bytes.
+    """
+    archivo = tempfile.TemporaryFile()
+    texto = io.TextIOWrapper(archivo, encoding="utf-8", newline="")
+    escritor = csv.writer(texto, lineterminator="\n")
+    with get_engine().connect() as conn:
+        columnas, lotes = _lotes(conn, stmt, lote)
+        escritor.writerow(columnas)
+        for filas in lotes:
+            escritor.writerows([_valor_plano(v) for v in fila] for fila in filas)
+    texto.flush()
+    texto.detach()
+    return _contenido(archivo)
+
+
+def _valor_excel(valor):
+    valor = _valor_plano(valor)
+    if isinstance(valor, decimal.Decimal):
+        return float(valor)
+    if isinstance(valor, datetime.datetime) and valor.tzinfo is not None:
+        return valor.replace(tzinfo=None)
+    return valor
+
+
+def exportar_consulta_excel(stmt, lote: int = LOTE_FILAS) -> bytes:
+    """XLSX en modo constant_memory de xlsxwriter: cada fila se vuelca a disco al escribirse.
+
+    Como en el CSV, el archivo terminado se devuelve completo como bytes.
+    """
+    archivo = tempfile.TemporaryFile()
+    libro = xlsxwriter.Workbook(archivo, {
+        "constant_memory": True,
+        "default_date_format": "yyyy-mm-dd",
+    })
+    with get_engine().connect() as conn:
+        columnas, lotes = _lotes(conn, stmt, lote)
+        hoja = None
+        num_hoja = 0
+        fila_actual = MAX_FILAS_HOJA
+        for filas in lotes:
+            for fila in filas:
+                if fila_actual >= MAX_FILAS_HOJA:
+                    num_hoja += 1
+                    hoja = libro.add_worksheet("Datos" if num_hoja == 1 else f"Datos_{num_hoja}")
+                    hoja.write_row(0, 0, columnas)
+                    fila_actual = 0
+                fila_actual += 1
+                hoja.write_row(fila_actual, 0, [_valor_excel(v) for v in fila])
+        if hoja is None:
+            libro.add_worksheet("Datos").write_row(0, 0, columnas)
+    libro.close()
+    return _contenido(archivo)
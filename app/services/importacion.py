@@ -0,0 +1,139 @@
+# services/importacion.py
+import csv
+import datetime
+import io
+import time
+from dataclasses import dataclass, field
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from models import Campana, Donante, TipoDonacionEnum
+from services.cache import registrar_cambios
+
+# Columnas que acepta el archivo; las tres primeras son obligatorias
+COLUMNAS_DONACION = ["campana_id", "donante_id", "tipo", "monto", "descripcion_especie", "fecha", "anonima", "mensaje"]
+COLUMNAS_OBLIGATORIAS = ["campana_id", "donante_id", "tipo"]
+# NUMERIC(12, 2)
+MONTO_MAXIMO = 10 ** 10
+
+_VERDADEROS = {"1", "true", "yes", "si", "sí", "verdadero"}
+_FALSOS = {"0", "false", "no", "falso"}
+
+
+@dataclass
+class ResultadoImportacion:
+    insertadas: int = 0
+    # Filas rechazadas con su número en el archivo (fila) y el motivo (error)
+    rechazadas: pd.DataFrame = field(default_factory=pd.DataFrame)
+    duracion: float = 0.0
+
+
+def leer_archivo(archivo, nombre: str) -> pd.DataFrame:
+    """CSV o XLSX como texto (sin inferir tipos); las celdas vacías quedan en NaN."""
+    if nombre.lower().endswith(".xlsx"):
+        df = pd.read_excel(archivo, dtype=str)
+    elif nombre.lower().endswith(".csv"):
+        df = pd.read_csv(archivo, dtype=str, keep_default_na=False)
+    else:
+        raise ValueError("Formato no soportado: use un archivo .csv o .xlsx")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in df.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(faltantes)}")
+    df = df.reindex(columns=COLUMNAS_DONACION).astype("string").apply(lambda s: s.str.strip())
+    # Número de fila en el archivo (la 1 es el encabezado) para el reporte de errores
+    df.index = pd.RangeIndex(2, len(df) + 2, name="fila")
+    return df.replace("", pd.NA)
+
+
+def _ids_existentes(db: Session, columna, ids: pd.Series) -> set:
+    unicos = [int(i) for i in ids.dropna().unique()]
+    if not unicos:
+        return set()
+    return set(db.scalars(select(columna).where(columna.in_(unicos))))
+
+
+def validar_donaciones(db: Session, df: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Valida por columnas (sin ir fila por fila) y devuelve (válidas, rechazadas).
+
+    Replica chk_tipo_donacion y monto > 0, y comprueba que campañas y donantes
+    existan con una consulta por tabla.
+    """
+    errores = pd.Series("", index=df.index)
+
+    def marcar(mascara, mensaje):
+        errores.loc[mascara] += mensaje + "; "
+
+    limpio = pd.DataFrame(index=df.index)
+    for columna in ("campana_id", "donante_id"):
+        numero = pd.to_numeric(df[columna], errors="coerce")
+        entero = numero.notna() & (numero % 1 == 0)
+        marcar(~entero, f"{columna} inválido")
+        limpio[columna] = numero.where(entero).astype("Int64")
+
+    tipo = df["tipo"].str.lower()
+    marcar(~tipo.isin([t.value for t in TipoDonacionEnum]), "tipo debe ser 'monetaria' o 'especie'")
+    limpio["tipo"] = tipo
+
+    monto = pd.to_numeric(df["monto"], errors="coerce")
+    marcar(df["monto"].notna() & monto.isna(), "monto inválido")
+    marcar(monto.notna() & ((monto <= 0) | (monto >= MONTO_MAXIMO)), "monto fuera de rango")
+    limpio["monto"] = monto.round(2)
+
+    # chk_tipo_donacion
+    especie = df["descripcion_especie"]
+    marcar((tipo == "monetaria") & monto.isna(), "una donación monetaria requiere monto")
+    marcar((tipo == "monetaria") & especie.notna(), "una donación monetaria no lleva descripcion_especie")
+    marcar((tipo == "especie") & especie.isna(), "una donación en especie requiere descripcion_especie")
+    limpio["descripcion_especie"] = especie
+
+    fecha = pd.to_datetime(df["fecha"], errors="coerce", format="mixed")
+    marcar(df["fecha"].notna() & fecha.isna(), "fecha inválida")
+    # Sin fecha vale la de la importación, como el DEFAULT de la columna
+    limpio["fecha"] = fecha.fillna(pd.Timestamp(datetime.datetime.now()))
+
+    anonima = df["anonima"].str.lower()
+    marcar(anonima.notna() & ~anonima.isin(_VERDADEROS | _FALSOS), "anonima debe ser sí/no")
+    limpio["anonima"] = anonima.isin(_VERDADEROS)
+    limpio["mensaje"] = df["mensaje"]
+
+    marcar(limpio["campana_id"].notna() & ~limpio["campana_id"].isin(
+        _ids_existentes(db, Campana.campana_id, limpio["campana_id"])), "la campaña no existe")
+    marcar(limpio["donante_id"].notna() & ~limpio["donante_id"].isin(
+        _ids_existentes(db, Donante.donante_id, limpio["donante_id"])), "el donante no existe")
+
+    invalidas = errores != ""
+    rechazadas = df[invalidas].assign(error=errores[invalidas].str.rstrip("; ")).reset_index()
+    return limpio[~invalidas], rechazadas
+
+
+def cargar_donaciones(db: Session, validas: pd.DataFrame) -> int:
+    """COPY de las filas ya validadas en la transacción de la sesión; hace commit."""
+    if validas.empty:
+        return 0
+    buffer = io.StringIO()
+    # NaN se escribe vacío y sin comillas: COPY csv lo toma como NULL
+    validas.to_csv(buffer, header=False, index=False, quoting=csv.QUOTE_MINIMAL, date_format="%Y-%m-%d %H:%M:%S.%f")
+    buffer.seek(0)
+    try:
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY donacion ({', '.join(validas.columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+        # Un solo COPY: los triggers por sentencia de donacion corren una vez
+        registrar_cambios(db, "donacion", "estadisticas_campana")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(validas)
+
+
+def importar_donaciones(db: Session, archivo, nombre: str) -> ResultadoImportacion:
+    """Lee, valida y carga en una transacción las filas válidas; informa las rechazadas."""
+    inicio = time.perf_counter()
+    df = leer_archivo(archivo, nombre)
+    validas, rechazadas = validar_donaciones(db, df)
+    insertadas = cargar_donaciones(db, validas)
+    return ResultadoImportacion(insertadas, rechazadas, time.perf_counter() - inicio)
@@ -0,0 +1,50 @@
+# services/opciones.py
+import os
+import threading
+import time
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from models import Actividad, Campana, Categoria, Donante, Organizacion, Sede
+from services.cache import version_tablas
+
+# Tabla -> (id, etiqueta) que muestran los selectbox de los formularios
+_COLUMNAS = {
+    "campana": (Campana.campana_id, Campana.nombre),
+    # Las empresas no tienen nombre ni apellido (chk_tipo_donante)
+    "donante": (Donante.donante_id, func.coalesce(Donante.empresa, Donante.nombre + " " + Donante.apellido)),
+    "organizacion": (Organizacion.organizacion_id, Organizacion.nombre),
+    "categoria": (Categoria.categoria_id, Categoria.nombre),
+    "sede": (Sede.sede_id, Sede.nombre),
+    "actividad": (Actividad.actividad_id, Actividad.nombre),
+}
+
+# Red de seguridad para cambios hechos fuera de este proceso (otra réplica, psql)
+OPCIONES_TTL = float(os.getenv("OPCIONES_TTL", "300"))
+
+# Tabla -> (versión, cargado_en, mapa); la versión la incrementan los CRUD al
+# confirmar (registrar_cambios), así una escritura invalida su tabla
+_opciones: dict = {}
+_opciones_lock = threading.Lock()
+
+
+def get_opciones(db: Session, tabla: str) -> dict:
+    """{id: "id - etiqueta"} ordenado por id, compartido por proceso; no modificarlo."""
+    if tabla not in _COLUMNAS:
+        raise ValueError(f"No hay opciones para la tabla {tabla}")
+    # La versión se lee antes de consultar: si una escritura confirma en medio,
+    # la entrada queda con la versión vieja y la próxima lectura la recarga
+    version = version_tablas((tabla,))
+    with _opciones_lock:
+        guardado = _opciones.get(tabla)
+    if guardado and guardado[0] == version and time.monotonic() - guardado[1] <= OPCIONES_TTL:
+        return guardado[2]
+    id_col, etiqueta = _COLUMNAS[tabla]
+    mapa = {id_: f"{id_} - {texto}" for id_, texto in db.execute(select(id_col, etiqueta).order_by(id_col))}
+    with _opciones_lock:
+        _opciones[tabla] = (version, time.monotonic(), mapa)
+    return mapa
+
+
+def limpiar_opciones():
+    with _opciones_lock:
+        _opciones.clear()
@@ -0,0 +1,103 @@
+# services/paginacion.py
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+import pandas as pd
+from sqlalchemy import Enum, Float, Numeric, String, cast, text, tuple_
+from sqlalchemy.orm import Session
+
+TAMANO_PAGINA = 50
+
+
+@dataclass
+class Pagina:
+    items: Any = field(default_factory=list)
+    siguiente_cursor: Optional[str] = None
+    total_estimado: Optional[int] = None
+
+
+def codificar_cursor(valores: tuple) -> str:
+    crudo = json.dumps(list(valores), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(crudo).decode("ascii")
+
+
+def decodificar_cursor(cursor: str) -> tuple:
+    try:
+        valores = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Cursor de paginación inválido")
+    if not isinstance(valores, list):
+        raise ValueError("Cursor de paginación inválido")
+    return tuple(valores)
+
+
+def _filtrar_cursor(stmt, columnas_clave: list, cursor: Optional[str]):
+    if not cursor:
+        return stmt
+    valores = decodificar_cursor(cursor)
+    if len(valores) != len(columnas_clave):
+        raise ValueError("Cursor de paginación inválido")
+    if len(columnas_clave) == 1:
+        return stmt.where(columnas_clave[0] > valores[0])
+    return stmt.where(tuple_(*columnas_clave) > tuple_(*valores))
+
+
+def paginar(db: Session, stmt, columnas_clave: list, cursor: Optional[str] = None,
+            limite: int = TAMANO_PAGINA, entidades: bool = True) -> Pagina:
+    """Paginación por keyset: WHERE (claves) > (cursor) ORDER BY claves LIMIT n.
+
+    Las columnas clave deben identificar cada fila de forma única (la PK o
+    una columna de orden más la PK), así el cursor es estable aunque se
+    inserten filas entre página y página.
+    """
+    stmt = _filtrar_cursor(stmt, columnas_clave, cursor)
+    # Se pide una fila extra para saber si existe una página siguiente
+    stmt = stmt.order_by(*columnas_clave).limit(limite + 1)
+    filas = db.scalars(stmt).all() if entidades else db.execute(stmt).all()
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]
+        siguiente = codificar_cursor(tuple(getattr(ultima, c.key) for c in columnas_clave))
+    return Pagina(items=list(filas), siguiente_cursor=siguiente)
+
+
+def proyeccion_plana(*columnas) -> list:
+    """Columnas listas para un DataFrame: enums como texto y decimales como float, en SQL."""
+    proyeccion = []
+    for columna in columnas:
+        if isinstance(columna.type, Enum):
+            proyeccion.append(cast(columna, String).label(columna.key))
+        elif isinstance(columna.type, Numeric) and not isinstance(columna.type, Float):
+            proyeccion.append(cast(columna, Float).label(columna.key))
+        else:
+            proyeccion.append(columna)
+    return proyeccion
+
+
+def paginar_dataframe(db: Session, stmt, columnas_clave: list, cursor: Optional[str] = None,
+                      limite: int = TAMANO_PAGINA) -> Pagina:
+    """Como paginar(), pero para un select() de columnas: devuelve un DataFrame sin pasar por el ORM."""
+    stmt = _filtrar_cursor(stmt, columnas_clave, cursor)
+    resultado = db.execute(stmt.order_by(*columnas_clave).limit(limite + 1))
+    nombres = list(resultado.keys())
+    filas = resultado.all()
+    siguiente = None
+    if len(filas) > limite:
+        filas = filas[:limite]
+        ultima = filas[-1]._mapping
+        siguiente = codificar_cursor(tuple(ultima[c.key] for c in columnas_clave))
+    return Pagina(items=pd.DataFrame.from_records(filas, columns=nombres), siguiente_cursor=siguiente)
+
+
+def estimar_total(db: Session, tabla: str) -> Optional[int]:
+    """Número aproximado de filas según las estadísticas del planificador (sin COUNT(*))."""
+    reltuples = db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:tabla)"),
+        {"tabla": tabla}
+    ).scalar()
+    # -1 indica que la tabla nunca ha sido analizada
+    if reltuples is None or reltuples < 0:
+        return None
+    return int(reltuples)
@@ -1,42 +1,202 @@
 # services/reports.py
 from sqlalchemy.orm import Session
-from models import Donacion, Campana, Voluntario, VoluntarioActividad, Donante
-from sqlalchemy import func, and_, or_
+from models import Donacion, Campana, Voluntario, VoluntarioActividad, Donante, Actividad, VistaDonacionesCampana, EstadisticasCampana, DonacionDiaria
+from sqlalchemy import func, and_, or_, not_, select, literal, union_all, Date
+from sqlalchemy.dialects.postgresql import array
+from services.cache import cache_reporte
+from services.vistas import VISTA_CAMPANAS, asegurar_vista_fresca
+from utils.helpers import restar_anios, rango_fecha_nacimiento
 import datetime
+import os
 
-def get_donaciones_por_campana(db: Session, fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
-    query = db.query(
+# Cada reporte tiene un constructor consulta_* (un select() reutilizable, p. ej. para
+# exportar con cursor de servidor) y una función get_* que lo ejecuta y da formato.
+
+# Fuente de los totales por campaña:
+#   'contadores': estadisticas_campana, mantenida por los triggers (siempre al día)
+#   'vista': vista materializada, refrescada según VISTA_CAMPANAS_MAX_ANTIGUEDAD
+#   'vivo': agregación sobre donacion en cada llamada
+FUENTE_CAMPANAS = os.getenv("REPORTES_FUENTE_CAMPANAS", "contadores")
+
+
+def fuente_campanas(*filtros_donacion) -> str:
+    """Contadores y vista sólo tienen totales por campaña: con filtros sobre donaciones se agrega en vivo"""
+    if any(f is not None for f in filtros_donacion):
+        return "vivo"
+    return FUENTE_CAMPANAS
+
+
+# Con rangos de días completos los reportes de donaciones leen donacion_diaria
+USAR_RESUMEN_DIARIO = os.getenv("REPORTES_RESUMEN_DIARIO", "true").strip().lower() in ("1", "true", "yes", "si", "sí")
+
+
+def dias_completos(fecha_inicio=None, fecha_fin=None):
+    """(desde, hasta) con hasta exclusivo, o None si el rango corta algún día.
+
+    Una fecha sin hora (date) como fecha_fin incluye ese día entero.
+    """
+    desde = hasta = None
+    if fecha_inicio:
+        if isinstance(fecha_inicio, datetime.datetime):
+            if fecha_inicio.time() != datetime.time.min:
+                return None
+            fecha_inicio = fecha_inicio.date()
+        desde = fecha_inicio
+    if fecha_fin:
+        if isinstance(fecha_fin, datetime.datetime):
+            if fecha_fin.time() != datetime.time.max:
+                return None
+            fecha_fin = fecha_fin.date()
+        hasta = fecha_fin + datetime.timedelta(days=1)
+    return desde, hasta
+
+
+def _hasta_fecha(columna, fecha_fin):
+    # Mismo criterio que dias_completos: una fecha incluye todo el día. Antes
+    # era columna <= fecha_fin, que compara con la medianoche y dejaba fuera
+    # el último día; la fecha y hora exacta sigue siendo un límite inclusivo.
+    if isinstance(fecha_fin, datetime.datetime):
+        return columna <= fecha_fin
+    return columna < fecha_fin + datetime.timedelta(days=1)
+
+
+def _donaciones_resumidas(fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
+    """Subconsulta (campana_id, donante_id, monto, num) sobre donacion_diaria, o None si no aplica.
+
+    Con límites de monto, un grupo del día entra entero si [monto_min, monto_max]
+    cae dentro de ellos; sólo los grupos que los cruzan se resuelven con sus donaciones.
+    """
+    dias = dias_completos(fecha_inicio, fecha_fin) if USAR_RESUMEN_DIARIO else None
+    if dias is None:
+        return None
+    r = DonacionDiaria
+    desde, hasta = dias
+    en_rango = []
+    if desde:
+        en_rango.append(r.dia >= desde)
+    if hasta:
+        en_rango.append(r.dia < hasta)
+    grupos = select(r.campana_id, r.donante_id, r.monto_total.label('monto'), r.num_donaciones.label('num')).where(*en_rango)
+    if monto_minimo is None and monto_maximo is None:
+        return grupos.subquery()
+
+    # Un monto NULL (donación en especie) no pasa ningún límite de monto
+    dentro, cruza = [r.tipo == 'monetaria'], [r.tipo == 'monetaria']
+    if monto_minimo is not None:
+        dentro.append(r.monto_min >= monto_minimo)
+        cruza.append(r.monto_max >= monto_minimo)
+    if monto_maximo is not None:
+        dentro.append(r.monto_max <= monto_maximo)
+        cruza.append(r.monto_min <= monto_maximo)
+    d = Donacion
+    parciales = select(d.campana_id, d.donante_id, d.monto, literal(1).label('num')).select_from(r).join(d, and_(
+        d.campana_id == r.campana_id,
+        d.donante_id == r.donante_id,
+        d.tipo == r.tipo,
+        d.fecha >= r.dia,
+        d.fecha < r.dia + datetime.timedelta(days=1)
+    )).where(*en_rango, *cruza, not_(and_(*dentro)))
+    if monto_minimo is not None:
+        parciales = parciales.where(d.monto >= monto_minimo)
+    if monto_maximo is not None:
+        parciales = parciales.where(d.monto <= monto_maximo)
+    return union_all(grupos.where(*dentro), parciales).subquery()
+
+
+def consulta_donaciones_por_campana(fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
+    fuente = fuente_campanas(fecha_inicio or None, fecha_fin or None, monto_minimo, monto_maximo)
+    if fuente == "contadores":
+        # El JOIN interno de la consulta en vivo omite campañas sin donaciones
+        return select(
+            Campana.campana_id,
+            Campana.nombre.label('campana'),
+            EstadisticasCampana.monto_recaudado.label('monto_total'),
+            EstadisticasCampana.num_donaciones
+        ).join(EstadisticasCampana, EstadisticasCampana.campana_id == Campana.campana_id
+        ).where(EstadisticasCampana.num_donaciones > 0)
+    if fuente == "vista":
+        vista = VistaDonacionesCampana
+        return select(
+            vista.campana_id,
+            vista.nombre_campana.label('campana'),
+            vista.monto_total,
+            vista.num_donaciones
+        ).where(vista.num_donaciones > 0)
+    resumen = _donaciones_resumidas(fecha_inicio, fecha_fin, monto_minimo, monto_maximo)
+    if resumen is not None:
+        return select(
+            Campana.campana_id,
+            Campana.nombre.label('campana'),
+            func.sum(resumen.c.monto).label('monto_total'),
+            func.sum(resumen.c.num).label('num_donaciones')
+        ).join(resumen, resumen.c.campana_id == Campana.campana_id
+        ).group_by(Campana.campana_id, Campana.nombre)
+    query = select(
         Campana.campana_id,
         Campana.nombre.label('campana'),
         func.sum(Donacion.monto).label('monto_total'),
         func.count(Donacion.donacion_id).label('num_donaciones')
     ).join(Donacion, Donacion.campana_id == Campana.campana_id)
     if fecha_inicio:
-        query = query.filter(Donacion.fecha >= fecha_inicio)
+        query = query.where(Donacion.fecha >= fecha_inicio)
     if fecha_fin:
-        query = query.filter(Donacion.fecha <= fecha_fin)
+        query = query.where(_hasta_fecha(Donacion.fecha, fecha_fin))
     if monto_minimo is not None:
-        query = query.filter(Donacion.monto >= monto_minimo)
+        query = query.where(Donacion.monto >= monto_minimo)
     if monto_maximo is not None:
-        query = query.filter(Donacion.monto <= monto_maximo)
-    query = query.group_by(Campana.campana_id, Campana.nombre)
-    result = query.all()
-    return [
-        {
-            'campana_id': r.campana_id,
-            'campana': r.campana,
-            'monto_total': float(r.monto_total or 0),
-            'num_donaciones': r.num_donaciones
-        }
-        for r in result
-    ]
+        query = query.where(Donacion.monto <= monto_maximo)
+    return query.group_by(Campana.campana_id, Campana.nombre)
 
-def get_voluntarios_por_actividad(db: Session, fecha_inicio=None, fecha_fin=None, edad_minima=None, edad_maxima=None):
-    import datetime
-    from models import Actividad
+def get_donaciones_por_campana(db: Session, fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
+    if fuente_campanas(fecha_inicio or None, fecha_fin or None, monto_minimo, monto_maximo) == "vista":
+        asegurar_vista_fresca()
+    return _donaciones_por_campana(db, fecha_inicio, fecha_fin, monto_minimo, monto_maximo)
 
-    today = datetime.date.today()
-    query = db.query(
+@cache_reporte("donacion", "campana", "estadisticas_campana", VISTA_CAMPANAS)
+def _donaciones_por_campana(db: Session, fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
+    result = db.execute(consulta_donaciones_por_campana(fecha_inicio, fecha_fin, monto_minimo, monto_maximo)).all()
+    return [fila_donaciones_por_campana(r) for r in result]
+
+# Las funciones fila_* dan forma a cada fila de su consulta_*; las comparten
+# los get_* de la UI y la API (api/reportes.py)
+def fila_donaciones_por_campana(r) -> dict:
+    return {
+        'campana_id': r.campana_id,
+        'campana': r.campana,
+        'monto_total': float(r.monto_total or 0),
+        'num_donaciones': r.num_donaciones
+    }
+
+# Filtros y grupos de edad se traducen a rangos de fecha_nacimiento (ver
+# utils.helpers.rango_fecha_nacimiento) para que idx_voluntario_fecha_nacimiento sirva
+def _filtro_edad(query, edad_minima=None, edad_maxima=None, hoy=None):
+    desde, hasta = rango_fecha_nacimiento(edad_minima, edad_maxima, hoy)
+    if desde is not None:
+        query = query.where(Voluntario.fecha_nacimiento >= desde)
+    if hasta is not None:
+        query = query.where(Voluntario.fecha_nacimiento <= hasta)
+    return query
+
+
+# Edad más alta que se agrupa con exactitud si no se pide edad_maxima
+EDAD_TOPE = 150
+
+
+def _grupo_edad(anios_por_grupo, edad_maxima=None, hoy=None):
+    """floor(edad / anios_por_grupo) * anios_por_grupo con width_bucket sobre fecha_nacimiento."""
+    hoy = hoy or datetime.date.today()
+    grupos = (edad_maxima if edad_maxima is not None else EDAD_TOPE) // anios_por_grupo
+    # Haber nacido en o después del umbral j equivale a edad < j * anios_por_grupo;
+    # width_bucket cuenta los umbrales (ascendentes) que la fecha alcanza
+    umbrales = [
+        restar_anios(hoy, j * anios_por_grupo) + datetime.timedelta(days=1)
+        for j in range(grupos, -1, -1)
+    ]
+    cubeta = func.width_bucket(Voluntario.fecha_nacimiento, array(umbrales, type_=Date))
+    return (grupos - cubeta) * anios_por_grupo
+
+def consulta_voluntarios_por_actividad(fecha_inicio=None, fecha_fin=None, edad_minima=None, edad_maxima=None):
+    query = select(
         VoluntarioActividad.actividad_id,
         Actividad.nombre.label('nombre_actividad'),
         func.count(VoluntarioActividad.voluntario_id).label('num_voluntarios')
@@ -44,29 +204,37 @@ def get_voluntarios_por_actividad(db: Session, fecha_inicio=None, fecha_fin=None
     ).join(Actividad, Actividad.actividad_id == VoluntarioActividad.actividad_id)
 
     if fecha_inicio:
-        query = query.filter(VoluntarioActividad.fecha_registro >= fecha_inicio)
+        query = query.where(VoluntarioActividad.fecha_registro >= fecha_inicio)
     if fecha_fin:
-        query = query.filter(VoluntarioActividad.fecha_registro <= fecha_fin)
-    if edad_minima is not None:
-        fecha_nac_max = today - datetime.timedelta(days=edad_minima*365)
-        query = query.filter(Voluntario.fecha_nacimiento <= fecha_nac_max)
-    if edad_maxima is not None:
-        fecha_nac_min = today - datetime.timedelta(days=edad_maxima*365)
-        query = query.filter(Voluntario.fecha_nacimiento >= fecha_nac_min)
-
-    query = query.group_by(VoluntarioActividad.actividad_id, Actividad.nombre)
-    result = query.all()
-    return [
-        {
-            'actividad_id': r.actividad_id,
-            'nombre_actividad': r.nombre_actividad,
-            'num_voluntarios': r.num_voluntarios
-        }
-        for r in result
-    ]
+        query = query.where(VoluntarioActividad.fecha_registro <= fecha_fin)
+    query = _filtro_edad(query, edad_minima, edad_maxima)
 
-def get_donaciones_por_donante(db: Session, fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
-    query = db.query(
+    return query.group_by(VoluntarioActividad.actividad_id, Actividad.nombre)
+
+@cache_reporte("voluntario_actividad", "voluntario", "actividad")
+def get_voluntarios_por_actividad(db: Session, fecha_inicio=None, fecha_fin=None, edad_minima=None, edad_maxima=None):
+    result = db.execute(consulta_voluntarios_por_actividad(fecha_inicio, fecha_fin, edad_minima, edad_maxima)).all()
+    return [fila_voluntarios_por_actividad(r) for r in result]
+
+def fila_voluntarios_por_actividad(r) -> dict:
+    return {
+        'actividad_id': r.actividad_id,
+        'nombre_actividad': r.nombre_actividad,
+        'num_voluntarios': r.num_voluntarios
+    }
+
+def consulta_donaciones_por_donante(fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
+    resumen = _donaciones_resumidas(fecha_inicio, fecha_fin, monto_minimo, monto_maximo)
+    if resumen is not None:
+        return select(
+            Donante.donante_id,
+            Donante.nombre,
+            Donante.apellido,
+            func.sum(resumen.c.monto).label('monto_total'),
+            func.sum(resumen.c.num).label('num_donaciones')
+        ).join(resumen, resumen.c.donante_id == Donante.donante_id
+        ).group_by(Donante.donante_id, Donante.nombre, Donante.apellido)
+    query = select(
         Donante.donante_id,
         Donante.nombre,
         Donante.apellido,
@@ -74,52 +242,89 @@ def get_donaciones_por_donante(db: Session, fecha_inicio=None, fecha_fin=None, m
         func.count(Donacion.donacion_id).label('num_donaciones')
     ).join(Donacion, Donacion.donante_id == Donante.donante_id)
     if fecha_inicio:
-        query = query.filter(Donacion.fecha >= fecha_inicio)
+        query = query.where(Donacion.fecha >= fecha_inicio)
     if fecha_fin:
-        query = query.filter(Donacion.fecha <= fecha_fin)
+        query = query.where(_hasta_fecha(Donacion.fecha, fecha_fin))
     if monto_minimo is not None:
-        query = query.filter(Donacion.monto >= monto_minimo)
+        query = query.where(Donacion.monto >= monto_minimo)
     if monto_maximo is not None:
-        query = query.filter(Donacion.monto <= monto_maximo)
-    query = query.group_by(Donante.donante_id, Donante.nombre, Donante.apellido)
-    result = query.all()
-    return [
-        {
-            'donante_id': r.donante_id,
-            'nombre': r.nombre,
-            'apellido': r.apellido,
-            'monto_total': float(r.monto_total or 0),
-            'num_donaciones': r.num_donaciones
-        }
-        for r in result
-    ]
+        query = query.where(Donacion.monto <= monto_maximo)
+    return query.group_by(Donante.donante_id, Donante.nombre, Donante.apellido)
 
-def get_distribucion_voluntarios_por_edad(db: Session, edad_minima=None, edad_maxima=None, anios_por_grupo=10):
+@cache_reporte("donacion", "donante")
+def get_donaciones_por_donante(db: Session, fecha_inicio=None, fecha_fin=None, monto_minimo=None, monto_maximo=None):
+    result = db.execute(consulta_donaciones_por_donante(fecha_inicio, fecha_fin, monto_minimo, monto_maximo)).all()
+    return [fila_donaciones_por_donante(r) for r in result]
+
+def fila_donaciones_por_donante(r) -> dict:
+    return {
+        'donante_id': r.donante_id,
+        'nombre': r.nombre,
+        'apellido': r.apellido,
+        'monto_total': float(r.monto_total or 0),
+        'num_donaciones': r.num_donaciones
+    }
+
+def consulta_distribucion_voluntarios_por_edad(edad_minima=None, edad_maxima=None, anios_por_grupo=10):
     today = datetime.date.today()
-    # Calcula la edad
-    edad_expr = func.extract('year', func.age(today, Voluntario.fecha_nacimiento)).label('edad')
-    # Calcula el grupo de edad (ej: 0-9, 10-19, ...)
-    grupo_edad_expr = (func.floor(edad_expr / anios_por_grupo) * anios_por_grupo).label('grupo_edad')
-    query = db.query(
+    # Grupo de edad (ej: 0-9, 10-19, ...)
+    grupo_edad_expr = _grupo_edad(anios_por_grupo, edad_maxima, today).label('grupo_edad')
+    query = select(
         grupo_edad_expr,
         func.count(Voluntario.voluntario_id).label('num_voluntarios')
     )
-    if edad_minima is not None:
-        query = query.filter(edad_expr >= edad_minima)
-    if edad_maxima is not None:
-        query = query.filter(edad_expr <= edad_maxima)
-    query = query.group_by(grupo_edad_expr).order_by(grupo_edad_expr)
-    result = query.all()
-    return [
-        {
-            'grupo_edad': f"{int(r.grupo_edad)}-{int(r.grupo_edad + anios_por_grupo - 1)}",
-            'num_voluntarios': r.num_voluntarios
-        }
-        for r in result
-    ]
+    query = _filtro_edad(query, edad_minima, edad_maxima, today)
+    return query.group_by(grupo_edad_expr).order_by(grupo_edad_expr)
 
-def get_efectividad_campanas(db: Session, fecha_inicio=None, fecha_fin=None, estado=None):
-    query = db.query(
+@cache_reporte("voluntario")
+def get_distribucion_voluntarios_por_edad(db: Session, edad_minima=None, edad_maxima=None, anios_por_grupo=10):
+    result = db.execute(consulta_distribucion_voluntarios_por_edad(edad_minima, edad_maxima, anios_por_grupo)).all()
+    return [fila_distribucion_voluntarios_por_edad(r, anios_por_grupo) for r in result]
+
+def fila_distribucion_voluntarios_por_edad(r, anios_por_grupo=10) -> dict:
+    return {
+        'grupo_edad': f"{int(r.grupo_edad)}-{int(r.grupo_edad + anios_por_grupo - 1)}",
+        'num_voluntarios': r.num_voluntarios
+    }
+
+def consulta_efectividad_campanas(fecha_inicio=None, fecha_fin=None, estado=None):
+    fuente = fuente_campanas()
+    if fuente == "contadores":
+        # Los filtros son de la campaña: basta un JOIN 1:1 con sus contadores, sin agregar
+        monto = func.coalesce(EstadisticasCampana.monto_recaudado, 0)
+        query = select(
+            Campana.campana_id,
+            Campana.nombre,
+            Campana.meta_monetaria,
+            monto.label('monto_recaudado'),
+            ((monto / func.nullif(Campana.meta_monetaria, 0)) * 100).label('porcentaje_cumplimiento'),
+            Campana.estado
+        ).outerjoin(EstadisticasCampana, EstadisticasCampana.campana_id == Campana.campana_id)
+        if fecha_inicio:
+            query = query.where(Campana.fecha_inicio >= fecha_inicio)
+        if fecha_fin:
+            query = query.where(Campana.fecha_fin <= fecha_fin)
+        if estado and estado != 'Todos':
+            query = query.where(Campana.estado == estado)
+        return query
+    if fuente == "vista":
+        vista = VistaDonacionesCampana
+        query = select(
+            vista.campana_id,
+            vista.nombre_campana.label('nombre'),
+            vista.meta_monetaria,
+            vista.monto_total.label('monto_recaudado'),
+            ((vista.monto_total / func.nullif(vista.meta_monetaria, 0)) * 100).label('porcentaje_cumplimiento'),
+            vista.estado
+        )
+        if fecha_inicio:
+            query = query.where(vista.fecha_inicio >= fecha_inicio)
+        if fecha_fin:
+            query = query.where(vista.fecha_fin <= fecha_fin)
+        if estado and estado != 'Todos':
+            query = query.where(vista.estado == estado)
+        return query
+    query = select(
         Campana.campana_id,
         Campana.nombre,
         Campana.meta_monetaria,
@@ -128,21 +333,29 @@ def get_efectividad_campanas(db: Session, fecha_inicio=None, fecha_fin=None, est
         Campana.estado
     ).outerjoin(Donacion, Donacion.campana_id == Campana.campana_id)
     if fecha_inicio:
-        query = query.filter(Campana.fecha_inicio >= fecha_inicio)
+        query = query.where(Campana.fecha_inicio >= fecha_inicio)
     if fecha_fin:
-        query = query.filter(Campana.fecha_fin <= fecha_fin)
+        query = query.where(Campana.fecha_fin <= fecha_fin)
     if estado and estado != 'Todos':
-        query = query.filter(Campana.estado == estado)
-    query = query.group_by(Campana.campana_id, Campana.nombre, Campana.meta_monetaria, Campana.estado)
-    result = query.all()
-    return [
-        {
-            'campana_id': r.campana_id,
-            'nombre': r.nombre,
-            'meta_monetaria': float(r.meta_monetaria or 0),
-            'monto_recaudado': float(r.monto_recaudado or 0),
-            'porcentaje_cumplimiento': float(r.porcentaje_cumplimiento or 0),
-            'estado': r.estado
-        }
-        for r in result
-    ]
+        query = query.where(Campana.estado == estado)
+    return query.group_by(Campana.campana_id, Campana.nombre, Campana.meta_monetaria, Campana.estado)
+
+def get_efectividad_campanas(db: Session, fecha_inicio=None, fecha_fin=None, estado=None):
+    if fuente_campanas() == "vista":
+        asegurar_vista_fresca()
+    return _efectividad_campanas(db, fecha_inicio, fecha_fin, estado)
+
+@cache_reporte("campana", "donacion", "estadisticas_campana", VISTA_CAMPANAS)
+def _efectividad_campanas(db: Session, fecha_inicio=None, fecha_fin=None, estado=None):
+    result = db.execute(consulta_efectividad_campanas(fecha_inicio, fecha_fin, estado)).all()
+    return [fila_efectividad_campanas(r) for r in result]
+
+def fila_efectividad_campanas(r) -> dict:
+    return {
+        'campana_id': r.campana_id,
+        'nombre': r.nombre,
+        'meta_monetaria': float(r.meta_monetaria or 0),
+        'monto_recaudado': float(r.monto_recaudado or 0),
+        'porcentaje_cumplimiento': float(r.porcentaje_cumplimiento or 0),
+        'estado': r.estado
+    }
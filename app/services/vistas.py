@@ -0,0 +1,86 @@
+# services/vistas.py
+import logging
+import os
+import threading
+import time
+from typing import Optional
+from sqlalchemy import text
+from db.connection import get_engine
+from services.cache import invalidar_tablas
+
+logger = logging.getLogger(__name__)
+
+VISTA_CAMPANAS = "vista_donaciones_campana"
+# Antigüedad máxima (segundos) tolerada antes de refrescar la vista al leerla
+VISTA_MAX_ANTIGUEDAD = float(os.getenv("VISTA_CAMPANAS_MAX_ANTIGUEDAD", "300"))
+
+# Un solo refresco a la vez por proceso; los demás lectores usan la versión anterior
+_refresco_lock = threading.Lock()
+_ultimo_refresco: dict = {}
+
+
+def antiguedad_vista(conn) -> Optional[float]:
+    """Segundos desde el último refresco, o None si la vista no tiene datos."""
+    poblada = conn.execute(
+        text("SELECT ispopulated FROM pg_matviews WHERE matviewname = :vista"),
+        {"vista": VISTA_CAMPANAS}
+    ).scalar()
+    if not poblada:
+        return None
+    # calculada_en es now() del refresco: igual en todas las filas
+    return conn.execute(
+        text(f"SELECT EXTRACT(EPOCH FROM now() - calculada_en) FROM {VISTA_CAMPANAS} LIMIT 1")
+    ).scalar()
+
+
+def refrescar_vista(concurrente: bool = True) -> float:
+    """REFRESH MATERIALIZED VIEW; devuelve la duración en segundos.
+
+    CONCURRENTLY no bloquea a quienes leen la vista, pero requiere que ya
+    tenga datos: la primera vez se refresca de forma normal.
+    """
+    inicio = time.perf_counter()
+    with get_engine().begin() as conn:
+        if concurrente and antiguedad_vista(conn) is None:
+            concurrente = False
+        modo = "CONCURRENTLY " if concurrente else ""
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW {modo}{VISTA_CAMPANAS}"))
+    duracion = time.perf_counter() - inicio
+    # Los reportes cacheados sobre la vista dependen de su "versión"
+    invalidar_tablas(VISTA_CAMPANAS)
+    _ultimo_refresco.update(duracion=duracion, concurrente=concurrente, en=time.time())
+    logger.info("Vista %s refrescada en %.3fs (concurrente=%s)", VISTA_CAMPANAS, duracion, concurrente)
+    return duracion
+
+
+def asegurar_vista_fresca(max_antiguedad: Optional[float] = None) -> bool:
+    """Refresca la vista si es más antigua que max_antiguedad. Devuelve True si refrescó.
+
+    Si otro hilo ya está refrescando no se espera: se sirve la versión vigente.
+    """
+    if max_antiguedad is None:
+        max_antiguedad = VISTA_MAX_ANTIGUEDAD
+    # Si este proceso la refrescó hace poco no hace falta preguntar a la BD
+    if time.time() - _ultimo_refresco.get("en", 0) <= max_antiguedad:
+        return False
+    with get_engine().connect() as conn:
+        antiguedad = antiguedad_vista(conn)
+    if antiguedad is not None and antiguedad <= max_antiguedad:
+        return False
+    if not _refresco_lock.acquire(blocking=antiguedad is None):
+        return False
+    try:
+        refrescar_vista()
+        return True
+    finally:
+        _refresco_lock.release()
+
+
+def get_estado_vista() -> dict:
+    with get_engine().connect() as conn:
+        antiguedad = antiguedad_vista(conn)
+    return {
+        "antiguedad": antiguedad,
+        "max_antiguedad": VISTA_MAX_ANTIGUEDAD,
+        "ultimo_refresco": dict(_ultimo_refresco),
+    }
@@ -0,0 +1,25 @@
+# tests/conftest.py
+# Las pruebas se ejecutan desde app/ (python -m pytest), que es la raíz de importación.
+# Las marcadas con @pytest.mark.bd usan la BD sembrada (variables POSTGRES_*) y se
+# omiten si no hay conexión.
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "bd: necesita la base PostgreSQL sembrada; se omite sin conexión")
+
+
+@pytest.fixture(scope="session")
+def engine_bd():
+    from db.connection import get_engine
+    engine = get_engine()
+    try:
+        with engine.connect():
+            pass
+    except Exception as e:
+        pytest.skip(f"Sin conexión a la BD: {e.__class__.__name__}")
+    return engine
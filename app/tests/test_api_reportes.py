@@ -0,0 +1,149 @@
+# tests/test_api_reportes.py
+# La API se llama directamente como aplicación ASGI (sin servidor ni cliente HTTP).
+import asyncio
+import datetime
+import decimal
+import json
+import re
+import urllib.parse
+import pytest
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as dialecto_asyncpg
+from api.reportes import REPORTES, app, leer_filtros
+from db.connection import dispose_async_engine
+from db.ddl import construir_ddl
+
+# Filtros que comparan columnas ENUM: asyncpg manda los parámetros con el tipo
+# de la columna ($1::estado_campana), que debe existir en la BD
+FILTRADOS = [
+    ("efectividad_campanas", "estado=activa"),
+    ("efectividad_campanas", "fecha_inicio=2024-01-01&estado=finalizada"),
+    ("donaciones_por_campana", "fecha_inicio=2024-01-01&monto_minimo=100"),
+    ("donaciones_por_campana", "fecha_inicio=2024-01-01T08:00:00&monto_maximo=500"),
+    ("donaciones_por_donante", "fecha_fin=2024-12-31&monto_minimo=10&monto_maximo=1000"),
+]
+
+
+async def llamar_async(ruta: str, consulta: str = "") -> tuple[int, bytes]:
+    respuesta = {"cuerpo": b""}
+    pedido_enviado = False
+    terminada = asyncio.Event()
+
+    async def recibir():
+        # Como un servidor: el cuerpo (vacío) una vez, y la desconexión sólo
+        # cuando la respuesta terminó (StreamingResponse escucha mientras envía)
+        nonlocal pedido_enviado
+        if not pedido_enviado:
+            pedido_enviado = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await terminada.wait()
+        return {"type": "http.disconnect"}
+
+    async def enviar(mensaje):
+        if mensaje["type"] == "http.response.start":
+            respuesta["estado"] = mensaje["status"]
+        elif mensaje["type"] == "http.response.body":
+            respuesta["cuerpo"] += mensaje.get("body", b"")
+            if not mensaje.get("more_body", False):
+                terminada.set()
+
+    alcance = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": ruta, "raw_path": ruta.encode(), "root_path": "",
+        "query_string": consulta.encode(), "headers": [], "server": ("prueba", 80), "client": ("prueba", 1),
+    }
+    await app(alcance, recibir, enviar)
+    return respuesta["estado"], respuesta["cuerpo"]
+
+
+def llamar(ruta: str, consulta: str = "") -> tuple[int, bytes]:
+    return asyncio.run(llamar_async(ruta, consulta))
+
+
+def test_listar_reportes_con_sus_filtros():
+    estado, cuerpo = llamar("/reportes")
+    assert estado == 200
+    reportes = json.loads(cuerpo)
+    assert reportes == {nombre: sorted(r.filtros) for nombre, r in REPORTES.items()}
+    assert reportes["donaciones_por_campana"] == ["fecha_fin", "fecha_inicio", "monto_maximo", "monto_minimo"]
+    assert reportes["distribucion_voluntarios_por_edad"] == ["anios_por_grupo", "edad_maxima", "edad_minima"]
+
+
+def test_reporte_desconocido_404():
+    estado, cuerpo = llamar("/reportes/no_existe")
+    assert estado == 404
+    assert json.loads(cuerpo) == {"error": "Reporte desconocido: no_existe"}
+
+
+@pytest.mark.parametrize("reporte, consulta, error", [
+    ("donaciones_por_campana", "formato=csv", "Formato no soportado: csv"),
+    ("donaciones_por_campana", "fecha_inicio=2024-13-01", "Fecha inválida: 2024-13-01"),
+    ("donaciones_por_campana", "monto_minimo=-5", "Monto inválido: -5"),
+    ("donaciones_por_campana", "monto_maximo=NaN", "Monto inválido: NaN"),
+    ("donaciones_por_donante", "edad_minima=18", "Filtros no admitidos: edad_minima"),
+    ("voluntarios_por_actividad", "edad_maxima=viejo", "Número entero inválido: viejo"),
+    ("distribucion_voluntarios_por_edad", "anios_por_grupo=0", "El valor debe ser mayor o igual a 1: 0"),
+    ("efectividad_campanas", "estado=cerrada", "Estado de campaña inválido: cerrada"),
+])
+def test_filtros_invalidos_400(reporte, consulta, error):
+    # Se rechazan antes de tocar la BD
+    estado, cuerpo = llamar(f"/reportes/{reporte}", consulta)
+    assert estado == 400
+    assert json.loads(cuerpo) == {"error": error}
+
+
+def test_leer_filtros_convierte_tipos():
+    filtros = leer_filtros(REPORTES["donaciones_por_campana"], {
+        "fecha_inicio": "2024-01-01", "fecha_fin": "2024-01-31T12:00:00",
+        "monto_minimo": "100.50", "monto_maximo": "", "formato": "ndjson",
+    })
+    assert filtros == {
+        "fecha_inicio": datetime.date(2024, 1, 1),
+        "fecha_fin": datetime.datetime(2024, 1, 31, 12, 0),
+        "monto_minimo": decimal.Decimal("100.50"),
+    }
+    assert leer_filtros(REPORTES["distribucion_voluntarios_por_edad"], {"anios_por_grupo": "5"}) == {"anios_por_grupo": 5}
+
+
+@pytest.mark.parametrize("reporte, consulta", FILTRADOS)
+def test_parametros_enum_usan_los_tipos_de_ddl(reporte, consulta):
+    rep = REPORTES[reporte]
+    filtros = leer_filtros(rep, dict(urllib.parse.parse_qsl(consulta)))
+    sql = str(rep.consulta(**filtros).compile(dialect=dialecto_asyncpg()))
+    tipos_bd = set(re.findall(r"CREATE TYPE (\w+)", construir_ddl()))
+    # Los tipos propios van en minúsculas; INTEGER, DATE, etc. son de PostgreSQL
+    casts = {t for t in re.findall(r"::(\w+)", sql) if t.islower()}
+    assert casts <= tipos_bd
+
+
+@pytest.mark.bd
+@pytest.mark.parametrize("reporte, consulta", FILTRADOS)
+def test_reportes_filtrados_en_la_bd(engine_bd, reporte, consulta):
+    pytest.importorskip("asyncpg")
+
+    async def pedir():
+        try:
+            return await llamar_async(f"/reportes/{reporte}", consulta)
+        finally:
+            await dispose_async_engine()
+
+    estado, cuerpo = asyncio.run(pedir())
+    assert estado == 200, cuerpo
+    assert isinstance(json.loads(cuerpo), list)
+
+
+@pytest.mark.bd
+def test_json_y_ndjson_devuelven_las_mismas_filas(engine_bd):
+    pytest.importorskip("asyncpg")
+
+    async def ambos():
+        # El pool asíncrono queda atado al event loop: las dos llamadas en el mismo
+        try:
+            return (await llamar_async("/reportes/donaciones_por_donante"),
+                    await llamar_async("/reportes/donaciones_por_donante", "formato=ndjson"))
+        finally:
+            await dispose_async_engine()
+
+    (estado, cuerpo), (estado_nd, cuerpo_nd) = asyncio.run(ambos())
+    assert estado == 200
+    assert estado_nd == 200
+    assert [json.loads(linea) for linea in cuerpo_nd.decode().splitlines()] == json.loads(cuerpo)
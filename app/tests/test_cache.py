@@ -0,0 +1,55 @@
+# tests/test_cache.py
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from services import cache
+from services.cache import cache_reporte, registrar_cambios
+
+
+@pytest.fixture
+def reporte():
+    cache.cache_reportes.limpiar()
+    llamadas = []
+
+    @cache_reporte("tabla_prueba")
+    def reporte_prueba(db, minimo=None):
+        llamadas.append(minimo)
+        return [{"minimo": minimo}]
+
+    yield reporte_prueba, llamadas
+    cache.cache_reportes.limpiar()
+
+
+@pytest.fixture
+def db():
+    with Session(create_engine("sqlite://")) as sesion:
+        yield sesion
+
+
+def test_repite_el_reporte_desde_la_cache(reporte, db):
+    reporte_prueba, llamadas = reporte
+    assert reporte_prueba(db, 5) == reporte_prueba(db, minimo=5.0) == [{"minimo": 5}]
+    assert llamadas == [5]
+
+
+def test_commit_con_cambios_invalida_y_rollback_no(reporte, db):
+    reporte_prueba, llamadas = reporte
+    reporte_prueba(db)
+    registrar_cambios(db, "tabla_prueba")
+    db.rollback()
+    reporte_prueba(db)
+    assert len(llamadas) == 1
+    registrar_cambios(db, "tabla_prueba")
+    db.commit()
+    reporte_prueba(db)
+    assert len(llamadas) == 2
+
+
+def test_apagada_consulta_siempre(reporte, db, monkeypatch):
+    # Las escrituras de otros procesos no invalidan: con varios procesos se apaga
+    monkeypatch.setattr(cache, "USAR_CACHE", False)
+    reporte_prueba, llamadas = reporte
+    reporte_prueba(db, 5)
+    reporte_prueba(db, 5)
+    assert llamadas == [5, 5]
+    assert cache.cache_reportes.stats()["entradas"] == 0
@@ -0,0 +1,123 @@
+# tests/test_cascadas.py
+# Los borrados en cascada los hace PostgreSQL (ON DELETE CASCADE) y no el ORM:
+# toda relación con cascade delete lleva passive_deletes, y borrar un donante o
+# una campaña no carga en Python ninguna de sus donaciones ni recursos.
+import os
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import Base, Donacion, Recurso
+from services.crud_campana import delete_campana
+from services.crud_donante import delete_donante
+
+# Volumen de un donante o campaña grande; con menos filas una carga por el ORM
+# pasaría inadvertida. PRUEBAS_CASCADA_DONACIONES=1000 para una corrida rápida.
+DONACIONES = int(os.getenv("PRUEBAS_CASCADA_DONACIONES", "100000"))
+
+RELACIONES_EN_CASCADA = [
+    (mapper.class_.__name__, relacion)
+    for mapper in Base.registry.mappers
+    for relacion in mapper.relationships
+    if relacion.cascade.delete
+]
+
+
+@pytest.mark.parametrize("clase, relacion", RELACIONES_EN_CASCADA,
+                         ids=[f"{clase}.{relacion.key}" for clase, relacion in RELACIONES_EN_CASCADA])
+def test_relacion_en_cascada_es_pasiva(clase, relacion):
+    assert relacion.passive_deletes
+    for columna in relacion.remote_side:
+        for fk in columna.foreign_keys:
+            assert fk.ondelete == 'CASCADE', f"{columna.table.name}.{columna.name}"
+
+
+@pytest.mark.bd
+def test_fk_de_la_bd_con_on_delete_cascade(engine_bd):
+    with engine_bd.connect() as conn:
+        faltan = []
+        for tabla in Base.metadata.sorted_tables:
+            if tabla.info.get("is_view"):
+                continue
+            for fk in inspect(conn).get_foreign_keys(tabla.name):
+                columnas = fk["constrained_columns"]
+                esperada = any(
+                    f.ondelete == 'CASCADE' for f in tabla.foreign_keys if [f.parent.name] == columnas
+                )
+                if esperada and (fk["options"].get("ondelete") or "").upper() != 'CASCADE':
+                    faltan.append(f"{tabla.name}.{', '.join(columnas)}")
+    assert not faltan, "Falta ON DELETE CASCADE (python -m migrations.cascadas)"
+
+
+@pytest.fixture
+def conn_bd(engine_bd):
+    """Conexión dentro de una transacción que se revierte: la BD queda como estaba."""
+    with engine_bd.connect() as conn:
+        trans = conn.begin()
+        try:
+            yield conn
+        finally:
+            trans.rollback()
+
+
+def _borrar_sin_cargar(conn, borrar, objeto_id):
+    """Cuenta las donaciones y recursos que llegan a cargarse en Python durante el borrado."""
+    cargadas = {Donacion: 0, Recurso: 0}
+
+    def contador(modelo):
+        def contar(*_):
+            cargadas[modelo] += 1
+        return contar
+
+    contadores = {modelo: contador(modelo) for modelo in cargadas}
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    for modelo, contar in contadores.items():
+        event.listen(modelo, "load", contar)
+    try:
+        assert borrar(db, objeto_id)
+    finally:
+        for modelo, contar in contadores.items():
+            event.remove(modelo, "load", contar)
+        db.close()
+    return cargadas
+
+
+@pytest.mark.bd
+def test_delete_donante_no_carga_donaciones(conn_bd):
+    donante_id = conn_bd.exec_driver_sql(
+        "INSERT INTO donante (tipo, nombre, apellido) VALUES ('individual', 'Prueba', 'Cascada') "
+        "RETURNING donante_id"
+    ).scalar()
+    conn_bd.exec_driver_sql("""
+        INSERT INTO donacion (campana_id, donante_id, tipo, monto)
+        SELECT (SELECT MIN(campana_id) FROM campana), %(donante)s, 'monetaria', 10
+        FROM generate_series(1, %(n)s)
+    """, {"donante": donante_id, "n": DONACIONES})
+
+    assert _borrar_sin_cargar(conn_bd, delete_donante, donante_id) == {Donacion: 0, Recurso: 0}
+    assert conn_bd.exec_driver_sql(
+        "SELECT COUNT(*) FROM donacion WHERE donante_id = %(donante)s", {"donante": donante_id}
+    ).scalar() == 0
+
+
+@pytest.mark.bd
+def test_delete_campana_no_carga_donaciones_ni_recursos(conn_bd):
+    campana_id = conn_bd.exec_driver_sql(
+        "INSERT INTO campana (organizacion_id, nombre, fecha_inicio, meta_monetaria) "
+        "SELECT MIN(organizacion_id), 'Campaña de prueba', CURRENT_DATE, 1000 FROM organizacion "
+        "RETURNING campana_id"
+    ).scalar()
+    conn_bd.exec_driver_sql("""
+        INSERT INTO donacion (campana_id, donante_id, tipo, monto)
+        SELECT %(campana)s, (SELECT MIN(donante_id) FROM donante), 'monetaria', 10
+        FROM generate_series(1, %(n)s)
+    """, {"campana": campana_id, "n": DONACIONES})
+    conn_bd.exec_driver_sql("""
+        INSERT INTO recurso (campana_id, nombre, cantidad_requerida)
+        SELECT %(campana)s, 'Recurso de prueba ' || i, 10 FROM generate_series(1, 10) AS g(i)
+    """, {"campana": campana_id})
+
+    assert _borrar_sin_cargar(conn_bd, delete_campana, campana_id) == {Donacion: 0, Recurso: 0}
+    for tabla in ("donacion", "recurso"):
+        assert conn_bd.exec_driver_sql(
+            f"SELECT COUNT(*) FROM {tabla} WHERE campana_id = %(campana)s", {"campana": campana_id}
+        ).scalar() == 0
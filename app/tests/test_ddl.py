@@ -0,0 +1,46 @@
+# tests/test_ddl.py
+# Los índices de los reportes se declaran dos veces, en db/ddl.py (DDL.sql) y en
+# models.py (create_all): los dos deben emitir las mismas sentencias.
+import re
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateIndex
+from db.ddl import construir_ddl
+from models import Base
+
+INDICES_REPORTES = [
+    "CREATE INDEX idx_campana_fecha_inicio ON campana (fecha_inicio);",
+    "CREATE INDEX idx_campana_organizacion ON campana (organizacion_id);",
+    "CREATE INDEX idx_actividad_campana ON actividad (campana_id);",
+    "CREATE INDEX idx_donacion_campana ON donacion (campana_id) INCLUDE (monto);",
+    "CREATE INDEX idx_donacion_donante ON donacion (donante_id) INCLUDE (monto);",
+    "CREATE INDEX idx_donacion_fecha ON donacion (fecha) INCLUDE (campana_id, donante_id, monto);",
+    "CREATE INDEX idx_recurso_campana ON recurso (campana_id);",
+    "CREATE INDEX idx_voluntario_fecha_nacimiento ON voluntario (fecha_nacimiento) INCLUDE (voluntario_id);",
+    "CREATE INDEX idx_voluntario_actividad_actividad ON voluntario_actividad (actividad_id);",
+    "CREATE INDEX idx_voluntario_actividad_fecha ON voluntario_actividad (fecha_registro) "
+    "INCLUDE (actividad_id, voluntario_id);",
+]
+
+
+@pytest.fixture(scope="module")
+def indices_ddl():
+    return {
+        re.search(r"INDEX (\w+)", linea).group(1): linea
+        for linea in construir_ddl().splitlines()
+        if linea.startswith("CREATE INDEX") and " ON vista_" not in linea
+    }
+
+
+@pytest.mark.parametrize("sentencia", INDICES_REPORTES, ids=lambda s: s.split()[2])
+def test_ddl_emite_indice_de_reporte(indices_ddl, sentencia):
+    assert indices_ddl[sentencia.split()[2]] == sentencia
+
+
+def test_models_declara_los_mismos_indices(indices_ddl):
+    indices_models = {
+        indice.name: str(CreateIndex(indice).compile(dialect=postgresql.dialect())).strip() + ';'
+        for tabla in Base.metadata.sorted_tables
+        for indice in tabla.indexes
+    }
+    assert indices_models == indices_ddl
@@ -0,0 +1,94 @@
+# tests/test_edades.py
+# Los filtros y grupos de edad por rangos de fecha_nacimiento (services/reports.py)
+# deben contar lo mismo que la edad exacta, EXTRACT(YEAR FROM age(hoy, fecha_nacimiento)),
+# que usaban los reportes antes. Sin BD se recorren todas las fechas de nacimiento
+# de 120 años para varios "hoy" difíciles (29 de febrero, fin de año).
+import bisect
+import datetime
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.sql import visitors
+from models import Voluntario
+from services.reports import _grupo_edad, consulta_distribucion_voluntarios_por_edad
+from utils.helpers import calcular_edad, rango_fecha_nacimiento
+
+DIAS_PRUEBA = [
+    datetime.date(anio, mes, dia)
+    for anio in (2023, 2024, 2025)
+    for mes, dia in ((1, 1), (2, 28), (3, 1), (12, 31))
+] + [datetime.date(2024, 2, 29)]
+RANGOS_PRUEBA = [(16, 16), (16, 99), (0, 40), (20, None), (None, 35), (30, 59)]
+GRUPOS_PRUEBA = [1, 5, 7, 10]
+
+
+def _nacimientos(hoy):
+    return [hoy - datetime.timedelta(days=d) for d in range(-1, 366 * 120)]
+
+
+@pytest.mark.parametrize("nacimiento, hoy, edad", [
+    (datetime.date(2000, 2, 29), datetime.date(2001, 2, 28), 0),
+    (datetime.date(2000, 2, 29), datetime.date(2001, 3, 1), 1),
+    (datetime.date(2000, 2, 29), datetime.date(2004, 2, 29), 4),
+    (datetime.date(2000, 3, 1), datetime.date(2024, 2, 29), 23),
+    (datetime.date(2008, 12, 31), datetime.date(2024, 12, 31), 16),
+    (datetime.date(2009, 1, 1), datetime.date(2024, 12, 31), 15),
+])
+def test_calcular_edad_como_age(nacimiento, hoy, edad):
+    assert calcular_edad(nacimiento, hoy) == edad
+
+
+@pytest.mark.parametrize("hoy", DIAS_PRUEBA, ids=str)
+def test_rango_fecha_nacimiento_equivale_al_filtro_por_edad(hoy):
+    nacimientos = _nacimientos(hoy)
+    for edad_minima, edad_maxima in RANGOS_PRUEBA:
+        desde, hasta = rango_fecha_nacimiento(edad_minima, edad_maxima, hoy)
+        fallas = [
+            fecha for fecha in nacimientos
+            if ((edad_minima is None or calcular_edad(fecha, hoy) >= edad_minima)
+                and (edad_maxima is None or calcular_edad(fecha, hoy) <= edad_maxima))
+            != ((desde is None or fecha >= desde) and (hasta is None or fecha <= hasta))
+        ]
+        assert not fallas, f"rango ({edad_minima}, {edad_maxima}): {fallas[:3]}"
+
+
+def _umbrales(expresion):
+    """Fechas del array que _grupo_edad pasa a width_bucket."""
+    arreglo = next(e for e in visitors.iterate(expresion) if isinstance(e, array))
+    return [c.value for c in arreglo.clauses]
+
+
+@pytest.mark.parametrize("hoy", DIAS_PRUEBA, ids=str)
+def test_grupo_edad_equivale_a_floor_de_la_edad(hoy):
+    nacimientos = _nacimientos(hoy)
+    for anios_por_grupo in GRUPOS_PRUEBA:
+        umbrales = _umbrales(_grupo_edad(anios_por_grupo, hoy=hoy))
+        grupos = len(umbrales) - 1
+        fallas = [
+            fecha for fecha in nacimientos
+            # width_bucket(fecha, umbrales) = bisect_right para umbrales ascendentes
+            if (grupos - bisect.bisect_right(umbrales, fecha)) * anios_por_grupo
+            != calcular_edad(fecha, hoy) // anios_por_grupo * anios_por_grupo
+        ]
+        assert not fallas, f"anios_por_grupo={anios_por_grupo}: {fallas[:3]}"
+
+
+@pytest.mark.bd
+@pytest.mark.parametrize("edad_minima, edad_maxima", RANGOS_PRUEBA)
+def test_distribucion_por_edad_como_age_en_la_bd(engine_bd, edad_minima, edad_maxima):
+    hoy = datetime.date.today()
+    edad = func.extract('year', func.age(hoy, Voluntario.fecha_nacimiento))
+    with engine_bd.connect() as conn:
+        for anios_por_grupo in GRUPOS_PRUEBA:
+            grupo = (func.floor(edad / anios_por_grupo) * anios_por_grupo).label('grupo_edad')
+            exacta = select(grupo, func.count().label('num_voluntarios'))
+            if edad_minima is not None:
+                exacta = exacta.where(edad >= edad_minima)
+            if edad_maxima is not None:
+                exacta = exacta.where(edad <= edad_maxima)
+            esperado = {int(g): n for g, n in conn.execute(exacta.group_by(grupo))}
+            obtenido = {
+                int(g): n for g, n in conn.execute(
+                    consulta_distribucion_voluntarios_por_edad(edad_minima, edad_maxima, anios_por_grupo))
+            }
+            assert obtenido == esperado, f"anios_por_grupo={anios_por_grupo}"
@@ -0,0 +1,67 @@
+# tests/test_escritura.py
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from models import Donante
+from services.escritura import actualizar, confirmar, insertar, unidad_de_trabajo
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Donante.__table__.create(engine)
+    with Session(engine) as sesion:
+        yield sesion
+
+
+def _contar_sentencias(db):
+    conteo = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: conteo.append(args[2]))
+    return conteo
+
+
+def _datos(nombre):
+    return {"tipo": "individual", "nombre": nombre, "apellido": "Pérez"}
+
+
+def test_fila_devuelta_se_lee_sin_consultar_tras_confirmar(db):
+    donante = insertar(db, Donante, _datos("Ana"))
+    confirmar(db)
+    sentencias = _contar_sentencias(db)
+    assert (donante.donante_id, donante.nombre) == (1, "Ana")
+    assert sentencias == []
+    # La sesión conserva su configuración para los commits ajenos a escritura
+    assert db.expire_on_commit
+
+
+def test_actualizar_devuelve_fila_al_dia(db):
+    insertar(db, Donante, _datos("Ana"))
+    confirmar(db)
+    donante = actualizar(db, Donante, Donante.donante_id == 1, {"telefono": "5555-0000"})
+    confirmar(db)
+    assert donante.telefono == "5555-0000"
+    assert actualizar(db, Donante, Donante.donante_id == 99, {"telefono": "1"}) is None
+
+
+def test_unidad_de_trabajo_confirma_al_final(db):
+    commits = []
+    event.listen(db, "after_commit", lambda sesion: commits.append(sesion))
+    with unidad_de_trabajo(db):
+        insertar(db, Donante, _datos("Ana"))
+        confirmar(db)
+        with unidad_de_trabajo(db):
+            insertar(db, Donante, _datos("Luis"))
+            confirmar(db)
+        assert commits == []
+    assert len(commits) == 1
+    assert db.scalar(select(func.count()).select_from(Donante)) == 2
+
+
+def test_unidad_de_trabajo_revierte_todo_si_falla(db):
+    with pytest.raises(ValueError):
+        with unidad_de_trabajo(db):
+            insertar(db, Donante, _datos("Ana"))
+            raise ValueError("No se ingresó monto")
+    assert db.scalar(select(func.count()).select_from(Donante)) == 0
+    assert not db.info["unidad_de_trabajo"]
@@ -0,0 +1,71 @@
+# tests/test_exportacion.py
+import io
+import pytest
+from openpyxl import load_workbook
+from sqlalchemy import create_engine, select, table, column
+from sqlalchemy.pool import StaticPool
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+import components.ui_elements as ui_elements
+import services.exportacion as exportacion
+
+FILAS = [(i, f"nombre {i}") for i in range(1, 13)]
+
+
+@pytest.fixture
+def consulta(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.exec_driver_sql("CREATE TABLE datos (id INTEGER, nombre TEXT)")
+        conn.exec_driver_sql("INSERT INTO datos VALUES (?, ?)", FILAS)
+    monkeypatch.setattr(exportacion, "get_engine", lambda: engine)
+    datos = table("datos", column("id"), column("nombre"))
+    return select(datos.c.id, datos.c.nombre).order_by(datos.c.id)
+
+
+@pytest.fixture
+def descargas(monkeypatch, consulta):
+    """Los callables `data=` que render_descargas_streaming entrega a st.download_button."""
+    botones = {}
+
+    class Columna:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(ui_elements.st, "columns", lambda n: [Columna() for _ in range(n)])
+    monkeypatch.setattr(ui_elements.st, "download_button",
+                        lambda label, data, file_name, **kwargs: botones.__setitem__(file_name, data))
+    ui_elements.render_descargas_streaming("Prueba", consulta)
+    return botones
+
+
+def _entregar(data) -> bytes:
+    # Lo mismo que hace Streamlit con el resultado del callable al hacer clic
+    contenido, _ = convert_data_to_bytes_and_infer_mime(data, unsupported_error=TypeError(type(data)))
+    return contenido
+
+
+def test_csv_completo_es_aceptado_por_streamlit(descargas):
+    data = descargas["prueba_completo.csv"]()
+    assert isinstance(data, bytes)
+    lineas = _entregar(data).decode("utf-8").splitlines()
+    assert lineas[0] == "id,nombre"
+    assert lineas[1:] == [f"{i},{nombre}" for i, nombre in FILAS]
+
+
+def test_excel_completo_es_aceptado_por_streamlit(descargas):
+    data = descargas["prueba_completo.xlsx"]()
+    assert isinstance(data, bytes)
+    hoja = load_workbook(io.BytesIO(_entregar(data)), read_only=True)["Datos"]
+    filas = list(hoja.iter_rows(values_only=True))
+    assert filas[0] == ("id", "nombre")
+    assert filas[1:] == FILAS
+
+
+def test_excel_reparte_en_hojas_al_llegar_al_limite(monkeypatch, consulta):
+    monkeypatch.setattr(exportacion, "MAX_FILAS_HOJA", 5)
+    libro = load_workbook(io.BytesIO(exportacion.exportar_consulta_excel(consulta, lote=4)), read_only=True)
+    assert libro.sheetnames == ["Datos", "Datos_2", "Datos_3"]
+    assert [len(list(libro[h].iter_rows())) - 1 for h in libro.sheetnames] == [5, 5, 2]
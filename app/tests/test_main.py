@@ -0,0 +1,24 @@
+# tests/test_main.py
+import datetime
+import pytest
+from main import filtros_reportes
+
+
+@pytest.mark.parametrize("hoy, desde, hasta", [
+    (datetime.date(2024, 12, 15), datetime.date(2021, 12, 1), datetime.date(2025, 1, 15)),
+    (datetime.date(2025, 1, 31), datetime.date(2022, 1, 1), datetime.date(2025, 2, 28)),
+    (datetime.date(2024, 1, 31), datetime.date(2021, 1, 1), datetime.date(2024, 2, 29)),
+    (datetime.date(2024, 2, 29), datetime.date(2021, 2, 1), datetime.date(2024, 3, 29)),
+])
+def test_rango_por_defecto_de_los_filtros(hoy, desde, hasta):
+    filtros = filtros_reportes(hoy)["donaciones_por_campana"]
+    assert filtros["fecha_inicio_campana"]["value"] == desde
+    assert filtros["fecha_fin_campana"]["value"] == hasta
+
+
+def test_filtros_para_cualquier_dia_del_anio():
+    for dias in range(366):
+        hoy = datetime.date(2024, 1, 1) + datetime.timedelta(days=dias)
+        for filtros in filtros_reportes(hoy).values():
+            fechas = [c["value"] for c in filtros.values() if c["type"] == "date"]
+            assert all(f <= hoy for f in fechas[:1]) and all(f > hoy for f in fechas[1:])
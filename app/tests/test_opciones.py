@@ -0,0 +1,30 @@
+# tests/test_opciones.py
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from models import Donante
+from services.opciones import get_opciones, limpiar_opciones
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Donante.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(Donante), [
+            {"donante_id": 1, "tipo": "individual", "nombre": "Ana", "apellido": "Pérez", "empresa": None},
+            {"donante_id": 2, "tipo": "empresa", "nombre": None, "apellido": None, "empresa": "Acme S.A."},
+        ])
+    limpiar_opciones()
+    with Session(engine) as sesion:
+        yield sesion
+    limpiar_opciones()
+
+
+def test_etiquetas_de_donantes_individuales_y_empresas(db):
+    assert get_opciones(db, "donante") == {1: "1 - Ana Pérez", 2: "2 - Acme S.A."}
+
+
+def test_tabla_sin_opciones(db):
+    with pytest.raises(ValueError):
+        get_opciones(db, "donacion")
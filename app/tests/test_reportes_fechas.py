@@ -0,0 +1,77 @@
+# tests/test_reportes_fechas.py
+# Una fecha sin hora como fecha_fin incluye ese día entero en los reportes de
+# donaciones, tanto sobre donacion_diaria como sobre donacion; una fecha y
+# hora es un límite inclusivo exacto (sólo sobre donacion).
+import datetime
+import re
+from decimal import Decimal
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.dialects.postgresql.asyncpg import dialect as dialecto_asyncpg
+from sqlalchemy.pool import StaticPool
+from models import Campana, Donacion, DonacionDiaria, Donante
+from services import reports
+
+FECHAS = [
+    datetime.datetime(2024, 1, 30, 12, 0),
+    datetime.datetime(2024, 1, 31, 0, 0),
+    datetime.datetime(2024, 1, 31, 23, 59, 59),
+    datetime.datetime(2024, 2, 1, 0, 0),
+]
+
+
+@pytest.fixture
+def conn():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    for modelo in (Donante, Campana, Donacion, DonacionDiaria):
+        modelo.__table__.create(engine)
+    with engine.begin() as c:
+        c.execute(insert(Donante), [{"donante_id": 1, "tipo": "individual", "nombre": "Ana", "apellido": "Pérez"}])
+        c.execute(insert(Campana), [{"campana_id": 1, "organizacion_id": 1, "nombre": "Invierno",
+                                     "fecha_inicio": datetime.date(2024, 1, 1)}])
+        c.execute(insert(Donacion), [
+            {"donacion_id": i, "campana_id": 1, "donante_id": 1, "tipo": "monetaria", "monto": Decimal(10 ** i), "fecha": fecha}
+            for i, fecha in enumerate(FECHAS)
+        ])
+        # Lo que mantienen los triggers de DDL.sql en PostgreSQL
+        c.execute(insert(DonacionDiaria), [
+            {"dia": dia, "campana_id": 1, "donante_id": 1, "tipo": "monetaria", "monto_total": Decimal(total),
+             "num_donaciones": num, "monto_min": Decimal(minimo), "monto_max": Decimal(maximo)}
+            for dia, total, num, minimo, maximo in (
+                (datetime.date(2024, 1, 30), 1, 1, 1, 1),
+                (datetime.date(2024, 1, 31), 110, 2, 10, 100),
+                (datetime.date(2024, 2, 1), 1000, 1, 1000, 1000),
+            )
+        ])
+    with engine.connect() as c:
+        yield c
+
+
+def _monto(conn, consulta, **filtros):
+    filas = conn.execute(consulta(**filtros)).all()
+    return sum(Decimal(f.monto_total) for f in filas)
+
+
+@pytest.mark.parametrize("resumen_diario", [True, False], ids=["donacion_diaria", "donacion"])
+@pytest.mark.parametrize("consulta", [reports.consulta_donaciones_por_campana, reports.consulta_donaciones_por_donante])
+def test_fecha_fin_sin_hora_incluye_el_dia(conn, monkeypatch, consulta, resumen_diario):
+    monkeypatch.setattr(reports, "USAR_RESUMEN_DIARIO", resumen_diario)
+    hasta_31 = dict(fecha_inicio=datetime.date(2024, 1, 1), fecha_fin=datetime.date(2024, 1, 31))
+    assert _monto(conn, consulta, **hasta_31) == 111
+    desde_31 = dict(fecha_inicio=datetime.date(2024, 1, 31), fecha_fin=datetime.date(2024, 2, 1))
+    assert _monto(conn, consulta, **desde_31) == 1110
+
+
+@pytest.mark.parametrize("consulta", [reports.consulta_donaciones_por_campana, reports.consulta_donaciones_por_donante])
+def test_fecha_fin_con_hora_es_limite_exacto(conn, consulta):
+    assert reports.dias_completos(None, datetime.datetime(2024, 1, 31, 12, 0)) is None
+    assert _monto(conn, consulta, fecha_fin=datetime.datetime(2024, 1, 31, 0, 0)) == 11
+    assert _monto(conn, consulta, fecha_fin=datetime.datetime(2024, 1, 31, 23, 59, 59)) == 111
+
+
+def test_resumen_diario_compara_tipo_con_el_tipo_de_ddl():
+    # asyncpg (api/reportes.py) manda el parámetro con el tipo de la columna
+    stmt = reports.consulta_donaciones_por_donante(fecha_inicio=datetime.date(2024, 1, 1), monto_minimo=10)
+    sql = str(stmt.compile(dialect=dialecto_asyncpg()))
+    assert "donacion_diaria.tipo = $" in sql
+    assert set(re.findall(r"::(\w+)", sql)) - {"INTEGER", "DATE", "INTERVAL", "NUMERIC"} == {"tipo_donacion"}
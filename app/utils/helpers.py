@@ -1,3 +1,5 @@
+import datetime
+
 def format_currency(value: float) -> str:
     return f"${value:,.2f}"
 
@@ -6,3 +8,28 @@ def format_percentage(value: float) -> str:
 
 def safe_divide(numerator: float, denominator: float) -> float:
     return numerator / denominator if denominator else 0.0
+
+def restar_anios(fecha: datetime.date, anios: int) -> datetime.date:
+    """La misma fecha `anios` años antes; un 29 de febrero cae en 28 si el año no es bisiesto."""
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:
+        return fecha.replace(year=fecha.year - anios, day=28)
+
+def calcular_edad(fecha_nacimiento: datetime.date, hoy: datetime.date) -> int:
+    """Años cumplidos a `hoy`; coincide con EXTRACT(YEAR FROM age(hoy, fecha_nacimiento))."""
+    return hoy.year - fecha_nacimiento.year - ((hoy.month, hoy.day) < (fecha_nacimiento.month, fecha_nacimiento.day))
+
+def rango_fecha_nacimiento(edad_minima=None, edad_maxima=None, hoy=None):
+    """(desde, hasta) tales que edad_minima <= edad <= edad_maxima  <=>  desde <= fecha_nacimiento <= hasta.
+
+    Cualquiera de los dos límites es None si no se pidió; así el filtro es un rango
+    sobre fecha_nacimiento que resuelve idx_voluntario_fecha_nacimiento.
+    """
+    hoy = hoy or datetime.date.today()
+    desde = hasta = None
+    if edad_minima is not None:
+        hasta = restar_anios(hoy, edad_minima)
+    if edad_maxima is not None:
+        desde = restar_anios(hoy, edad_maxima + 1) + datetime.timedelta(days=1)
+    return desde, hasta